@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class MatchesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matches'
+
+    def ready(self):
+        from server_app.metrics import registry
+        from . import signals  # registra los receptores
+        from .weather import metric_lines
+
+        registry.register(metric_lines)
@@ -0,0 +1,196 @@
+# matches/broadcast.py
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+def encode_event(event, payload):
+    """
+    Serializa un evento en formato Server-Sent Events.
+
+    Se llama una sola vez por publicación: todos los suscriptores reciben
+    los mismos bytes.
+    """
+    data = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return f"event: {event}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """
+    Suscripción de un cliente a los eventos de un partido.
+
+    Las publicaciones pueden llegar desde cualquier hilo (las vistas de
+    escritura son síncronas); se entregan a la cola asyncio del lazo de
+    eventos del cliente. Si el cliente es demasiado lento se descartan los
+    eventos más antiguos en lugar de acumular memoria.
+    """
+
+    def __init__(self, match_id, max_pending=100):
+        self.match_id = match_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def _put(self, frame):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(frame)
+
+    def push(self, frame):
+        try:
+            self.loop.call_soon_threadsafe(self._put, frame)
+        except RuntimeError:
+            # El lazo del cliente ya se cerró
+            pass
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class LocalBroker:
+    """
+    Broker en memoria del proceso para difundir cambios de marcador.
+
+    Alcanza para desarrollo, tests y despliegues con un único proceso ASGI:
+    los clientes conectados a un worker no reciben las jugadas anotadas en
+    otro. Con varios procesos se usa ``RedisBroker`` (``SCOREBOARD_BROKER``,
+    que lo elige cuando ``REDIS_URL`` está definido).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, match_id):
+        subscription = Subscription(match_id)
+        with self._lock:
+            self._subscribers[match_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.match_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.match_id]
+
+    def subscriber_count(self, match_id):
+        with self._lock:
+            return len(self._subscribers.get(match_id, ()))
+
+    def publish(self, match_id, event, payload):
+        with self._lock:
+            if not self._subscribers.get(match_id):
+                return 0
+        return self.deliver(match_id, encode_event(event, payload))
+
+    def deliver(self, match_id, frame):
+        """Entrega un evento ya serializado a los suscriptores de este proceso."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(match_id, ()))
+        for subscription in subscribers:
+            subscription.push(frame)
+        return len(subscribers)
+
+
+class RedisBroker(LocalBroker):
+    """
+    Broker para varios procesos ASGI: las publicaciones pasan por Redis
+    pub/sub (``SCOREBOARD_BROKER_URL``) y cada proceso las entrega a sus
+    propios suscriptores.
+
+    Cada proceso escucha un único patrón con todos los partidos, en un hilo
+    que se inicia con la primera suscripción. Si Redis no responde, la
+    publicación se descarta con una advertencia: las jugadas ya están
+    guardadas y los clientes reciben el marcador completo al reconectarse.
+    """
+
+    CHANNEL = 'volley:scoreboard:{}'
+
+    def __init__(self, url=None):
+        import redis
+
+        super().__init__()
+        self._errors = redis.RedisError
+        self._redis = redis.Redis.from_url(url or settings.SCOREBOARD_BROKER_URL)
+        self._listener = None
+
+    def subscribe(self, match_id):
+        self._listen()
+        return super().subscribe(match_id)
+
+    def _listen(self):
+        with self._lock:
+            if self._listener is None:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(**{self.CHANNEL.format('*'): self._receive})
+                self._listener = pubsub.run_in_thread(
+                    sleep_time=1, daemon=True, exception_handler=self._listener_failed)
+
+    def _receive(self, message):
+        match_id = int(message['channel'].rsplit(b':', 1)[1])
+        self.deliver(match_id, message['data'])
+
+    def _listener_failed(self, error, pubsub, thread):
+        # El hilo sigue; pubsub se reconecta y vuelve a suscribirse solo
+        logger.warning("Suscripción a Redis interrumpida: %s", error)
+        time.sleep(1)
+
+    def publish(self, match_id, event, payload):
+        """Devuelve la cantidad de procesos que recibieron el evento."""
+        try:
+            return self._redis.publish(self.CHANNEL.format(match_id),
+                                       encode_event(event, payload))
+        except self._errors as e:
+            logger.warning("No se pudo publicar el evento %s del partido %s: %s",
+                           event, match_id, e)
+            return 0
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Devuelve la instancia única del broker configurado."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.SCOREBOARD_BROKER)()
+    return _broker
+
+
+def publish(match_id, event, payload):
+    """
+    Publica un evento cuando la transacción en curso confirme sus cambios,
+    para no difundir jugadas que terminen revirtiéndose.
+    """
+    transaction.on_commit(lambda: get_broker().publish(match_id, event, payload))
+
+
+def score_payload(set_instance):
+    """
+    Delta compacto de marcador a partir de un set con su partido cargado.
+    """
+    match = set_instance.match
+    return {
+        'match_id': match.pk,
+        'status': match.status,
+        'set_number': set_instance.set_number,
+        'team_a_points': set_instance.team_a_points,
+        'team_b_points': set_instance.team_b_points,
+        'completed': set_instance.completed,
+        'team_a_sets_won': match.team_a_sets_won,
+        'team_b_sets_won': match.team_b_sets_won,
+    }
@@ -0,0 +1,121 @@
+# matches/leaderboards.py
+
+from django.db import transaction
+from django.db.models import F, Sum
+from .models import PlayerPerformance, TournamentPlayerStats
+
+LEADERBOARD_STATS = ('points', 'aces', 'assists', 'blocks')
+
+
+def add_stats(tournament_id, deltas):
+    """
+    Suma (o resta, con valores negativos) estadísticas a los totales de
+    torneo de varios jugadores.
+
+    Se llama desde ``matches.scoring`` en la misma transacción que modifica
+    los ``PlayerPerformance``. Un solo jugador con fila existente cuesta un
+    ``UPDATE``; varios, una lectura y un ``bulk_update`` (más la creación
+    de las filas que falten la primera vez). Los incrementos son ``F()``, así que dos
+    partidos del torneo anotando a la vez no se pisan.
+
+    Args:
+        tournament_id (int): ID del torneo
+        deltas (dict): ``{player_id: {estadística: variación}}``
+    """
+    deltas = {
+        player_id: {field: value for field, value in stats.items() if value}
+        for player_id, stats in deltas.items()
+    }
+    deltas = {player_id: stats for player_id, stats in deltas.items() if stats}
+    if not deltas:
+        return
+
+    rows = TournamentPlayerStats.objects.filter(tournament_id=tournament_id)
+    if len(deltas) == 1:
+        [(player_id, stats)] = deltas.items()
+        if rows.filter(player_id=player_id).update(
+                **{field: F(field) + value for field, value in stats.items()}):
+            return
+
+    to_update = list(rows.filter(player_id__in=deltas).only('id', 'player_id'))
+    if len(to_update) < len(deltas):
+        existing = {row.player_id for row in to_update}
+        TournamentPlayerStats.objects.bulk_create(
+            [TournamentPlayerStats(tournament_id=tournament_id, player_id=player_id)
+             for player_id in deltas if player_id not in existing],
+            ignore_conflicts=True)
+        to_update = list(rows.filter(player_id__in=deltas).only('id', 'player_id'))
+    for row in to_update:
+        for field in LEADERBOARD_STATS:
+            setattr(row, field, F(field) + deltas[row.player_id].get(field, 0))
+    TournamentPlayerStats.objects.bulk_update(to_update, LEADERBOARD_STATS)
+
+
+def rebuild(tournament_id):
+    """
+    Recalcula desde cero los totales de un torneo sumando sus
+    ``PlayerPerformance``.
+
+    Returns:
+        int: Jugadores con totales
+    """
+    totals = [
+        TournamentPlayerStats(tournament_id=tournament_id, player_id=row['player_id'],
+                              **{field: row[field] for field in LEADERBOARD_STATS})
+        for row in PlayerPerformance.objects.filter(set__match__tournament_id=tournament_id)
+        .values('player_id')
+        .annotate(**{field: Sum(field) for field in LEADERBOARD_STATS})
+        .order_by()
+    ]
+    with transaction.atomic():
+        TournamentPlayerStats.objects.filter(tournament_id=tournament_id).delete()
+        TournamentPlayerStats.objects.bulk_create(totals, batch_size=1000)
+    return len(totals)
+
+
+def leaders(tournament_id, stat):
+    """
+    Jugadores con la estadística en el torneo, del mejor al peor.
+
+    El orden (estadística descendente, luego jugador) coincide con el
+    índice de la tabla, así que una página cuesta lo mismo sin importar
+    cuántas jugadas tenga el torneo.
+
+    Returns:
+        QuerySet: ``TournamentPlayerStats`` con jugador y equipo cargados
+    """
+    return (TournamentPlayerStats.objects
+            .filter(tournament_id=tournament_id, **{f'{stat}__gt': 0})
+            .select_related('player__team')
+            .order_by(f'-{stat}', 'player_id'))
+
+
+def rank(rows, offset, tournament_id, stat):
+    """
+    Asigna la posición a una página de ``leaders`` con empates de tipo
+    competición (1, 2, 2, 4).
+
+    Una fila con un valor menor que la anterior ocupa su lugar en el orden
+    global (``offset`` más su índice). Solo la primera fila de una página
+    que no es la primera necesita una consulta (indexada), por si empata
+    con jugadores de la página anterior.
+
+    Args:
+        rows (list[TournamentPlayerStats]): Página de ``leaders``
+        offset (int): Filas anteriores a la página
+
+    Returns:
+        list[tuple[int, TournamentPlayerStats]]: ``(posición, fila)``
+    """
+    ranked = []
+    for index, row in enumerate(rows):
+        value = getattr(row, stat)
+        if index and value == getattr(rows[index - 1], stat):
+            position = ranked[-1][0]
+        elif index or not offset:
+            position = offset + index + 1
+        else:
+            position = 1 + TournamentPlayerStats.objects.filter(
+                tournament_id=tournament_id, **{f'{stat}__gt': value}).count()
+        ranked.append((position, row))
+    return ranked
@@ -0,0 +1,173 @@
+# matches/live.py
+
+from functools import partial
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from .models import Match
+from .scoreboard import build_scoreboard
+
+# Las entradas guardan {'version', 'data'}; el sufijo v2 evita leer las del
+# formato anterior (solo los datos) en una caché compartida.
+SCOREBOARD_KEY = 'live:scoreboard:v2:{}'
+DETAIL_KEY = 'live:detail:v2:{}'
+
+
+def _cache():
+    return caches[settings.LIVE_SCOREBOARD_CACHE]
+
+
+def change_version(match_id):
+    """
+    Versión de todo lo que muestra un partido, con una sola consulta.
+
+    Combina la ``version`` del partido con la de sus sets, que avanzan en
+    cada escritura (jugadas, cierres de set, tiempos fuera, sustituciones y
+    ediciones). Los cambios en equipos, jugadores y torneos que muestra el
+    detalle avanzan la del partido (``teams_changed`` y
+    ``tournament_changed``). Es la base de los ETag; las entradas en caché
+    guardan la versión con la que se construyeron.
+
+    Returns:
+        str | None: Versión, o None si el partido no existe
+    """
+    row = Match.objects.filter(pk=match_id).annotate(
+        sets_version=Sum('sets__version', default=0),
+        sets_count=Count('sets'),
+    ).values_list('version', 'sets_version', 'sets_count').first()
+    if row is None:
+        return None
+    return '.'.join(str(part) for part in row)
+
+
+def _entry(key):
+    return _cache().get(key)
+
+
+def get_scoreboard_entry(match_id):
+    """
+    Devuelve la entrada en caché del marcador, ``{'version', 'data'}``, o
+    None. La versión es la del partido cuando se construyó el marcador.
+    """
+    return _entry(SCOREBOARD_KEY.format(match_id))
+
+
+def get_scoreboard(match_id):
+    """Devuelve el marcador en caché de un partido en vivo, o None."""
+    entry = get_scoreboard_entry(match_id)
+    return entry['data'] if entry else None
+
+
+def store_scoreboard(match_id, data, version):
+    """
+    Guarda el marcador solo si el partido está en vivo.
+
+    ``version`` debe leerse antes de construir ``data``: así una entrada
+    nunca dice ser más nueva que su contenido.
+    """
+    if data['status'] == 'live':
+        _cache().set(SCOREBOARD_KEY.format(match_id), {'version': version, 'data': data})
+
+
+def current_scoreboard(match_id, version=None):
+    """
+    Devuelve el marcador de un partido desde la caché o, si no está,
+    reconstruyéndolo desde la base de datos.
+
+    Args:
+        match_id (int): ID del partido
+        version (str, optional): Versión ya leída con ``change_version``
+
+    Returns:
+        dict | None: Marcador, o None si el partido no existe
+    """
+    scoreboard = get_scoreboard(match_id)
+    if scoreboard is None:
+        if version is None:
+            version = change_version(match_id)
+        match = Match.objects.filter(pk=match_id).first()
+        if match is None:
+            return None
+        scoreboard = build_scoreboard(match)
+        store_scoreboard(match_id, scoreboard, version)
+    return scoreboard
+
+
+def get_detail_entry(match_id):
+    """Devuelve la entrada en caché del detalle, ``{'version', 'data'}``, o None."""
+    return _entry(DETAIL_KEY.format(match_id))
+
+
+def get_detail(match_id):
+    """Devuelve el detalle serializado en caché de un partido en vivo, o None."""
+    entry = get_detail_entry(match_id)
+    return entry['data'] if entry else None
+
+
+def store_detail(match_id, data, version):
+    """Guarda el detalle serializado solo si el partido está en vivo."""
+    if data['status'] == 'live':
+        _cache().set(DETAIL_KEY.format(match_id), {'version': version, 'data': data})
+
+
+def evict(match_id):
+    """Elimina todo el estado en caché de un partido."""
+    _cache().delete_many([SCOREBOARD_KEY.format(match_id), DETAIL_KEY.format(match_id)])
+
+
+def refresh(match_id, scoreboard=None, version=None):
+    """
+    Reconstruye el marcador en caché tras un cambio (write-through).
+
+    El detalle completo solo se invalida: se vuelve a serializar en la
+    siguiente lectura. Si el partido ya no está en vivo se desaloja.
+
+    Args:
+        match_id (int): ID del partido
+        scoreboard (dict, optional): Marcador ya calculado por quien
+            hizo el cambio, para no volver a consultarlo
+        version (str, optional): Versión leída antes de calcular
+            ``scoreboard``; obligatoria si se pasa el marcador
+    """
+    if scoreboard is None:
+        version = change_version(match_id)
+        match = Match.objects.filter(pk=match_id).first()
+        if match is None or match.status != 'live':
+            evict(match_id)
+            return
+        scoreboard = build_scoreboard(match)
+    if scoreboard['status'] != 'live':
+        evict(match_id)
+        return
+    _cache().delete(DETAIL_KEY.format(match_id))
+    store_scoreboard(match_id, scoreboard, version)
+
+
+def match_changed(match_id):
+    """
+    Programa la actualización del estado en vivo para cuando la transacción
+    en curso confirme sus cambios (o de inmediato si no hay transacción).
+    """
+    transaction.on_commit(partial(refresh, match_id))
+
+
+def teams_changed(team_ids):
+    """
+    Avanza la versión de los partidos de esos equipos tras editar el equipo
+    o sus jugadores, que el detalle del partido incluye, y actualiza el
+    estado en caché de los que están en vivo.
+    """
+    _bump(Match.objects.filter(Q(team_a_id__in=team_ids) | Q(team_b_id__in=team_ids)))
+
+
+def tournament_changed(tournament_id):
+    """Como ``teams_changed``, para los partidos de un torneo editado."""
+    _bump(Match.objects.filter(tournament_id=tournament_id))
+
+
+def _bump(matches):
+    live_ids = list(matches.filter(status='live').values_list('pk', flat=True))
+    matches.update(version=F('version') + 1)
+    for match_id in live_ids:
+        match_changed(match_id)
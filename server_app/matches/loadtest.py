@@ -0,0 +1,458 @@
+"""
+Prueba de carga de un día de partidos contra un servidor en marcha.
+
+Simula ``K`` partidos en vivo, cada uno con un anotador que envía jugadas
+(``PATCH /matches/<id>/performance/``), tiempos fuera y sustituciones, y
+``N`` espectadores que consultan el detalle y el marcador de un partido
+con ``If-None-Match``, como el cliente web. Cada usuario virtual es un
+hilo con su propia sesión HTTP (keep-alive) y su propio token.
+
+Los datos de partida (usuarios, tokens, equipos, torneo y partidos) se
+crean con el ORM, así que el proceso debe usar la misma base de datos que
+el servidor; todo lo demás pasa por los endpoints reales. Cuando un
+partido termina, su anotador inicia otro entre los mismos equipos.
+
+Los resultados son un diccionario serializable a JSON con latencias
+p50/p95/p99, rendimiento y consultas SQL por endpoint (de la cabecera
+``X-Query-Count``, ver ``server_app.middleware``), pensado para guardarse
+y compararse entre versiones con ``compare``. El servidor solo envía esa
+cabecera con ``SERVER_TIMING=True`` (por defecto igual a ``DEBUG``); si
+no, las consultas por endpoint y en total quedan en ``None``.
+"""
+
+import math
+import random
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+import requests
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from matches.models import SETS_TO_WIN, Match, set_winner
+from teams.models import Player, Team
+from tournaments.models import Tournament
+
+ON_COURT = 7  # seis en cancha más el líbero
+
+# Nombres de endpoint en los resultados: estables entre versiones
+RALLY = 'PATCH /matches/{id}/performance/'
+SCOREBOARD = 'GET /matches/{id}/performance/'
+DETAIL = 'GET /matches/{id}/'
+TIMEOUT = 'POST /matches/{id}/timeout/'
+SUBSTITUTE = 'POST /matches/{id}/substitute/'
+START = 'POST /matches/{id}/start/'
+
+
+def percentile(values, fraction):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not values:
+        return None
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+class Recorder:
+    """Acumula latencias, estados y consultas por endpoint entre hilos."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.queries = defaultdict(int)
+        self.counted = defaultdict(int)  # respuestas que traían X-Query-Count
+
+    def record(self, endpoint, status, elapsed, queries=None):
+        with self.lock:
+            self.latencies[endpoint].append(elapsed)
+            self.statuses[endpoint][status] += 1
+            if queries is not None:
+                self.queries[endpoint] += queries
+                self.counted[endpoint] += 1
+
+    def summary(self, duration):
+        """
+        Resume lo registrado en ``duration`` segundos.
+
+        Se consideran errores las respuestas que no son 2xx ni 304 y los
+        fallos de conexión (estado 0). Las consultas son ``None`` si el
+        servidor no envió ``X-Query-Count``.
+        """
+        endpoints, totals = {}, {'requests': 0, 'errors': 0, 'db_queries': None}
+        with self.lock:
+            for endpoint in sorted(self.latencies):
+                latencies = sorted(self.latencies[endpoint])
+                statuses = self.statuses[endpoint]
+                errors = sum(count for status, count in statuses.items()
+                             if not (200 <= status < 300 or status == 304))
+                queries = self.queries[endpoint] if self.counted[endpoint] else None
+                endpoints[endpoint] = {
+                    'requests': len(latencies),
+                    'errors': errors,
+                    'statuses': {str(status): count for status, count in sorted(statuses.items())},
+                    'throughput_rps': round(len(latencies) / duration, 2),
+                    'latency_ms': {
+                        'p50': _ms(percentile(latencies, 0.50)),
+                        'p95': _ms(percentile(latencies, 0.95)),
+                        'p99': _ms(percentile(latencies, 0.99)),
+                        'mean': _ms(sum(latencies) / len(latencies)),
+                        'max': _ms(latencies[-1]),
+                    },
+                    'db_queries': queries,
+                    'db_queries_per_request': (round(queries / self.counted[endpoint], 2)
+                                               if queries is not None else None),
+                }
+                totals['requests'] += len(latencies)
+                totals['errors'] += errors
+                if queries is not None:
+                    totals['db_queries'] = (totals['db_queries'] or 0) + queries
+        totals['throughput_rps'] = round(totals['requests'] / duration, 2)
+        return endpoints, totals
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+
+class Client:
+    """Sesión HTTP de un usuario virtual que registra cada solicitud."""
+
+    def __init__(self, base_url, token, recorder, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.recorder = recorder
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def call(self, endpoint, method, path, **kwargs):
+        """Devuelve la respuesta, o ``None`` si falló la conexión."""
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path,
+                                             timeout=self.timeout, **kwargs)
+        except requests.RequestException:
+            self.recorder.record(endpoint, 0, time.perf_counter() - started)
+            return None
+        queries = response.headers.get('X-Query-Count')
+        self.recorder.record(endpoint, response.status_code, time.perf_counter() - started,
+                             int(queries) if queries is not None else None)
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class LiveMatch:
+    """Estado de un partido tal como lo lleva la planilla del anotador."""
+
+    def __init__(self, match, rosters):
+        self.id = match.pk
+        self.team_ids = {'A': match.team_a_id, 'B': match.team_b_id}
+        self.max_timeouts = match.max_timeouts_per_set
+        self.max_substitutions = match.max_substitutions_per_set
+        self.court = {team: list(rosters[team_id][:ON_COURT])
+                      for team, team_id in self.team_ids.items()}
+        self.bench = {team: list(rosters[team_id][ON_COURT:])
+                      for team, team_id in self.team_ids.items()}
+        self.timeouts = {'A': 0, 'B': 0}
+        self.sets_won = {'A': 0, 'B': 0}
+        self.finished = False
+        self.new_set(1)
+
+    def new_set(self, number):
+        self.set_number = number
+        self.points = {'A': 0, 'B': 0}
+        self.substitutions = {'A': 0, 'B': 0}
+
+    def score(self, team):
+        """Suma el punto y avanza de set o termina el partido si corresponde."""
+        self.points[team] += 1
+        winner = set_winner(self.set_number, self.points['A'], self.points['B'])
+        if winner:
+            self.sets_won[winner] += 1
+            if self.sets_won[winner] >= SETS_TO_WIN:
+                self.finished = True
+            else:
+                self.new_set(self.set_number + 1)
+
+    def sync(self, scoreboard):
+        """Adopta el marcador del servidor tras una respuesta inesperada."""
+        self.finished = scoreboard['status'] == 'finished'
+        self.sets_won = {'A': scoreboard['team_a_sets_won'], 'B': scoreboard['team_b_sets_won']}
+        current = next((set_data for set_data in scoreboard['sets']
+                        if set_data['set_number'] == scoreboard['current_set']), None)
+        if current is not None:
+            self.set_number = current['set_number']
+            self.points = {'A': current['team_a_points'], 'B': current['team_b_points']}
+
+
+class Scorer(threading.Thread):
+    """
+    Anotador de un partido: una jugada cada ``rally_interval`` segundos en
+    promedio (llegadas exponenciales) y, tras cada jugada, un tiempo fuera
+    o una sustitución con las probabilidades indicadas, dentro de los
+    límites del partido.
+    """
+
+    def __init__(self, harness, client, slot, seed):
+        super().__init__(daemon=True)
+        self.harness = harness
+        self.client = client
+        self.slot = slot
+        self.rng = random.Random(seed)
+        self.match = None
+
+    def run(self):
+        try:
+            while not self.harness.stopped.is_set():
+                if self.match is None or self.match.finished:
+                    if self.match is not None:
+                        self.harness.match_finished()
+                    self.match = self.harness.start_match(self.client, self.slot)
+                    if self.match is None:
+                        return
+                if self.harness.stopped.wait(self.rng.expovariate(1 / self.harness.rally_interval)):
+                    return
+                self.rally()
+                if self.match.finished:
+                    continue
+                roll = self.rng.random()
+                if roll < self.harness.timeout_rate:
+                    self.timeout()
+                elif roll < self.harness.timeout_rate + self.harness.substitution_rate:
+                    self.substitute()
+        finally:
+            self.client.close()
+            connections.close_all()
+
+    def path(self, suffix=''):
+        return f'/api/matches/{self.match.id}/{suffix}'
+
+    def rally(self):
+        match = self.match
+        team = self.rng.choice('AB')
+        player_id = self.rng.choice(match.court[team])
+        play = self.rng.random()
+        payload = {'player_id': player_id, 'set_number': match.set_number, 'points': 1,
+                   'aces': int(play < 0.08), 'blocks': int(0.08 <= play < 0.2)}
+        response = self.client.call(RALLY, 'PATCH', self.path('performance/'), json=payload)
+        if response is not None and response.status_code == 200:
+            match.score(team)
+        else:
+            self.resync()
+
+    def timeout(self):
+        team = self.rng.choice('AB')
+        if self.match.timeouts[team] >= self.match.max_timeouts:
+            return
+        response = self.client.call(TIMEOUT, 'POST', self.path('timeout/'), json={'team': team})
+        if response is not None and response.status_code == 200:
+            self.match.timeouts[team] += 1
+
+    def substitute(self):
+        match = self.match
+        team = self.rng.choice('AB')
+        if match.substitutions[team] >= match.max_substitutions or not match.bench[team]:
+            return
+        court_index = self.rng.randrange(len(match.court[team]))
+        bench_index = self.rng.randrange(len(match.bench[team]))
+        player_out, player_in = match.court[team][court_index], match.bench[team][bench_index]
+        response = self.client.call(SUBSTITUTE, 'POST', self.path('substitute/'), json={
+            'team': team, 'player_in': player_in, 'player_out': player_out})
+        if response is not None and response.status_code == 200:
+            match.court[team][court_index], match.bench[team][bench_index] = player_in, player_out
+            match.substitutions[team] += 1
+
+    def resync(self):
+        response = self.client.call(SCOREBOARD, 'GET', self.path('performance/'))
+        if response is not None and response.status_code == 200:
+            self.match.sync(response.json())
+
+
+class Spectator(threading.Thread):
+    """
+    Espectador que cada ``poll_interval`` segundos (±50 %) consulta el
+    detalle y el marcador de un partido en vivo, reenviando el ``ETag``
+    recibido para aprovechar las respuestas 304.
+    """
+
+    def __init__(self, harness, client, seed):
+        super().__init__(daemon=True)
+        self.harness = harness
+        self.client = client
+        self.rng = random.Random(seed)
+        self.etags = {}
+
+    def run(self):
+        try:
+            # Arranques escalonados para no sincronizar a todos los espectadores
+            wait = self.rng.uniform(0, self.harness.poll_interval)
+            while not self.harness.stopped.wait(wait):
+                match_id = self.rng.choice(self.harness.live_ids)
+                if match_id is not None:
+                    self.poll(DETAIL, f'/api/matches/{match_id}/')
+                    self.poll(SCOREBOARD, f'/api/matches/{match_id}/performance/')
+                wait = self.harness.poll_interval * self.rng.uniform(0.5, 1.5)
+        finally:
+            self.client.close()
+
+    def poll(self, endpoint, path):
+        headers = {'If-None-Match': self.etags[path]} if path in self.etags else {}
+        response = self.client.call(endpoint, 'GET', path, headers=headers)
+        if response is not None and response.headers.get('ETag'):
+            self.etags[path] = response.headers['ETag']
+
+
+class LoadTest:
+    """
+    Prepara los datos, lanza anotadores y espectadores durante
+    ``duration`` segundos y devuelve los resultados.
+
+    Args:
+        base_url (str): URL del servidor, p. ej. ``http://127.0.0.1:8000``
+        matches (int): Partidos en vivo simultáneos (un anotador por partido)
+        spectators (int): Espectadores consultando los partidos
+        duration (float): Segundos de carga
+        rally_interval (float): Segundos promedio entre jugadas de un partido
+        poll_interval (float): Segundos promedio entre consultas de un espectador
+        timeout_rate (float): Probabilidad de pedir tiempo fuera tras una jugada
+        substitution_rate (float): Probabilidad de sustituir tras una jugada
+        roster (int): Jugadores por equipo
+        seed (int): Semilla de los usuarios virtuales
+        request_timeout (float): Segundos máximos por solicitud
+    """
+
+    def __init__(self, base_url, matches=4, spectators=50, duration=60, rally_interval=2.0,
+                 poll_interval=1.0, timeout_rate=0.03, substitution_rate=0.08, roster=12,
+                 seed=42, request_timeout=10):
+        self.base_url = base_url
+        self.matches = matches
+        self.spectators = spectators
+        self.duration = duration
+        self.rally_interval = rally_interval
+        self.poll_interval = poll_interval
+        self.timeout_rate = timeout_rate
+        self.substitution_rate = substitution_rate
+        self.roster = roster
+        self.seed = seed
+        self.request_timeout = request_timeout
+        self.recorder = Recorder()
+        self.stopped = threading.Event()
+        self.live_ids = [None] * matches  # partido en curso de cada anotador
+        self.finished_matches = 0
+        self.lock = threading.Lock()
+        self.label = timezone.now().strftime('%Y%m%d%H%M%S%f')
+
+    def prepare(self):
+        """Crea usuarios con token, un torneo y dos equipos por anotador."""
+        User = get_user_model()
+        users = User.objects.bulk_create(
+            User(username=f'carga-{self.label}-{index}', email=f'carga-{self.label}-{index}@example.com',
+                 password=make_password(None))
+            for index in range(self.matches + self.spectators))
+        tokens = Token.objects.bulk_create(
+            Token(key=Token.generate_key(), user=user) for user in users)
+        today = timezone.localdate()
+        self.tournament = Tournament.objects.create(
+            name=f'Carga {self.label}', start_date=today, end_date=today)
+        teams = Team.objects.bulk_create(
+            Team(name=f'Carga {self.label} {index:03}', gender='M', coach='-')
+            for index in range(2 * self.matches))
+        self.tournament.teams.set(teams)
+        players = Player.objects.bulk_create(
+            Player(team=team, name=f'Jugador {team.pk}-{number:02}', jersey_number=number,
+                   position='OP', is_starter=number <= ON_COURT,
+                   avatar=Player.DEFAULT_AVATAR_MALE)
+            for team in teams for number in range(1, self.roster + 1))
+        self.rosters = defaultdict(list)
+        for player in players:
+            self.rosters[player.team_id].append(player.pk)
+        self.tokens = [token.key for token in tokens]
+        self.team_pairs = [(teams[2 * index], teams[2 * index + 1])
+                           for index in range(self.matches)]
+
+    def start_match(self, client, slot):
+        """Crea un partido entre los equipos del anotador y lo inicia por la API."""
+        team_a, team_b = self.team_pairs[slot]
+        match = Match.objects.create(
+            tournament=self.tournament, team_a=team_a, team_b=team_b,
+            scheduled_date=timezone.now(), location='Gimnasio', weather_status='skipped')
+        response = client.call(START, 'POST', f'/api/matches/{match.pk}/start/')
+        if response is None or response.status_code != 200:
+            return None
+        live_match = LiveMatch(match, {team_a.pk: self.rosters[team_a.pk],
+                                       team_b.pk: self.rosters[team_b.pk]})
+        self.live_ids[slot] = match.pk
+        return live_match
+
+    def match_finished(self):
+        with self.lock:
+            self.finished_matches += 1
+
+    def client(self, token):
+        return Client(self.base_url, token, self.recorder, self.request_timeout)
+
+    def run(self):
+        """
+        Ejecuta la prueba completa.
+
+        Returns:
+            dict: Resultados serializables a JSON (``meta``, ``totals`` y
+            ``endpoints``)
+        """
+        self.prepare()
+        rng = random.Random(self.seed)
+        workers = [Scorer(self, self.client(self.tokens[slot]), slot, rng.random())
+                   for slot in range(self.matches)]
+        workers += [Spectator(self, self.client(token), rng.random())
+                    for token in self.tokens[self.matches:]]
+        started_at = datetime.now(dt_timezone.utc)
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        self.stopped.wait(self.duration)
+        self.stopped.set()
+        for worker in workers:
+            worker.join(self.request_timeout + 1)
+        elapsed = time.perf_counter() - started
+
+        endpoints, totals = self.recorder.summary(elapsed)
+        return {
+            'meta': {
+                'base_url': self.base_url,
+                'started_at': started_at.isoformat(timespec='seconds'),
+                'duration_s': round(elapsed, 2),
+                'matches': self.matches,
+                'spectators': self.spectators,
+                'rally_interval_s': self.rally_interval,
+                'poll_interval_s': self.poll_interval,
+                'timeout_rate': self.timeout_rate,
+                'substitution_rate': self.substitution_rate,
+                'seed': self.seed,
+                'tournament_id': self.tournament.pk,
+            },
+            'totals': dict(totals, matches_finished=self.finished_matches),
+            'endpoints': endpoints,
+        }
+
+
+def compare(previous, current):
+    """
+    Compara dos resultados por endpoint.
+
+    Returns:
+        list: ``(endpoint, p95 anterior, p95 actual, variación %, consultas
+        por solicitud anterior, actual)`` para los endpoints de ambos
+    """
+    rows = []
+    for endpoint, now in current['endpoints'].items():
+        before = previous['endpoints'].get(endpoint)
+        if before is None:
+            continue
+        old_p95, new_p95 = before['latency_ms']['p95'], now['latency_ms']['p95']
+        change = round((new_p95 - old_p95) / old_p95 * 100, 1) if old_p95 else None
+        rows.append((endpoint, old_p95, new_p95, change,
+                     before['db_queries_per_request'], now['db_queries_per_request']))
+    return rows
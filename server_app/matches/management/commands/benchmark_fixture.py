@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from matches.scheduling import FixtureError, generate_fixture
+
+
+class Command(BaseCommand):
+    """
+    Mide el tiempo de generación del calendario todos contra todos según la
+    cantidad de equipos.
+
+    Solo genera el calendario en memoria: no toca la base de datos. Para
+    cada cantidad de equipos informa los partidos, el mejor tiempo de
+    ``--repeat`` ejecuciones y los días que ocupa el calendario.
+
+    Ejemplos:
+        python manage.py benchmark_fixture
+        python manage.py benchmark_fixture --teams 50 100 200 --courts 8 --double
+        python manage.py benchmark_fixture --teams 120 --pools 4 --rest 60
+    """
+
+    help = "Mide la generación del calendario todos contra todos según la cantidad de equipos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, nargs='+', default=[8, 16, 32, 64, 128],
+                            help="Cantidades de equipos a medir")
+        parser.add_argument('--courts', type=int, default=4, help="Canchas (por defecto 4)")
+        parser.add_argument('--slot-minutes', type=int, default=90,
+                            help="Duración de cada franja (por defecto 90)")
+        parser.add_argument('--rest', type=int, default=0,
+                            help="Minutos de descanso mínimo entre partidos de un equipo")
+        parser.add_argument('--pools', type=int, default=1, help="Grupos (por defecto 1)")
+        parser.add_argument('--double', action='store_true', help="Ida y vuelta")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Ejecuciones por medición; se informa la mejor (por defecto 3)")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat debe ser mayor que cero.")
+        start = (timezone.now() + timedelta(days=1)).replace(
+            hour=0, minute=0, second=0, microsecond=0)
+
+        self.stdout.write(f"{'equipos':>8} {'partidos':>9} {'segundos':>9} {'días':>6}")
+        for count in options['teams']:
+            best = None
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                try:
+                    fixture = generate_fixture(
+                        range(count), start,
+                        courts=options['courts'],
+                        slot_minutes=options['slot_minutes'],
+                        min_rest_minutes=options['rest'],
+                        double=options['double'],
+                        pools=options['pools'],
+                    )
+                except FixtureError as e:
+                    raise CommandError(f"{count} equipos: {e}")
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            days = (fixture[-1]['scheduled_date'].date() - start.date()).days + 1
+            self.stdout.write(f"{count:>8} {len(fixture):>9} {best:>9.3f} {days:>6}")
@@ -0,0 +1,78 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from matches.models import Match
+from matches.serializers import MATCH_LIST_COLUMNS, MatchSerializer, match_list_rows
+from server_app.pagination import StandardResultsSetPagination
+from teams.models import Team
+from tournaments.models import Tournament
+
+
+class Command(BaseCommand):
+    """
+    Compara filas por segundo del listado de partidos: ``MatchSerializer``
+    con modelos y serializers anidados contra la lectura rápida con
+    ``values()`` y ``match_list_rows``.
+
+    Mide consulta y serialización juntas, para cada tamaño de página hasta
+    ``max_page_size``. Si la base tiene menos partidos que la página más
+    grande, crea los que falten dentro de una transacción que se revierte
+    al terminar.
+
+    Ejemplos:
+        python manage.py benchmark_match_list
+        python manage.py benchmark_match_list --page-sizes 10 100 --repeat 50
+    """
+
+    help = "Compara el listado de partidos con MatchSerializer y con la lectura rápida"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-sizes', type=int, nargs='+',
+            default=[6, 25, 50, StandardResultsSetPagination.max_page_size],
+            help="Tamaños de página a medir")
+        parser.add_argument('--repeat', type=int, default=20,
+                            help="Páginas leídas por medición (por defecto 20)")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1 or min(options['page_sizes']) < 1:
+            raise CommandError("--repeat y --page-sizes deben ser mayores que cero.")
+
+        with transaction.atomic():
+            self.ensure_matches(max(options['page_sizes']))
+            self.stdout.write(
+                f"{'página':>7} {'serializer filas/s':>19} {'values() filas/s':>17} {'mejora':>7}")
+            for size in options['page_sizes']:
+                slow = self.measure(options['repeat'], size, lambda: MatchSerializer(
+                    Match.objects.select_related('team_a', 'team_b', 'tournament')[:size],
+                    many=True).data)
+                fast = self.measure(options['repeat'], size, lambda: match_list_rows(
+                    Match.objects.values(*MATCH_LIST_COLUMNS)[:size]))
+                self.stdout.write(f"{size:>7} {slow:>19,.0f} {fast:>17,.0f} {fast / slow:>6.1f}x")
+            transaction.set_rollback(True)
+
+    def measure(self, repeat, size, read):
+        read()  # calentamiento
+        started = time.perf_counter()
+        for _ in range(repeat):
+            read()
+        return repeat * size / (time.perf_counter() - started)
+
+    def ensure_matches(self, count):
+        missing = count - Match.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f"Creando {missing} partidos temporales...")
+        team_a = Team.objects.create(name="Benchmark A", gender="M", coach="-")
+        team_b = Team.objects.create(name="Benchmark B", gender="M", coach="-")
+        today = timezone.now()
+        tournament = Tournament.objects.create(
+            name="Benchmark", start_date=today.date(), end_date=today.date())
+        Match.objects.bulk_create(
+            Match(tournament=tournament, team_a=team_a, team_b=team_b,
+                  scheduled_date=today + timedelta(hours=index), location="Gimnasio",
+                  latitude=-33.45, longitude=-70.66,
+                  weather_info={'temperature': 20.0, 'weather_code': 1})
+            for index in range(missing))
@@ -0,0 +1,103 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+from matches.models import Match, Set
+from matches.scoreboard import TOTAL_FIELDS, raw_team_stats
+
+
+class Command(BaseCommand):
+    """
+    Verifica las columnas desnormalizadas del marcador contra los datos
+    crudos: los totales por equipo de cada ``Set`` contra la suma de sus
+    ``PlayerPerformance`` y ``Match.current_set`` contra el set en juego.
+
+    Con ``--fix`` corrige las diferencias encontradas.
+
+    Ejemplos:
+        python manage.py check_scoreboard --match 12
+        python manage.py check_scoreboard --tournament 3 --fix
+    """
+
+    help = "Verifica (y opcionalmente corrige) los totales desnormalizados del marcador"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--match', type=int, help="ID del partido")
+        parser.add_argument('--tournament', type=int, help="ID del torneo")
+        parser.add_argument('--fix', action='store_true', help="Corrige las diferencias")
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help="Partidos verificados por consulta (por defecto 200)")
+
+    def handle(self, *args, **options):
+        matches = Match.objects.order_by('id')
+        if options['match']:
+            matches = matches.filter(pk=options['match'])
+        if options['tournament']:
+            matches = matches.filter(tournament_id=options['tournament'])
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size debe ser mayor que cero.")
+
+        self.problems = 0
+        batch = []
+        for match in matches.only('id', 'current_set', 'version').iterator(chunk_size=options['batch_size']):
+            batch.append(match)
+            if len(batch) == options['batch_size']:
+                self.check_batch(batch, options['fix'])
+                batch = []
+        if batch:
+            self.check_batch(batch, options['fix'])
+
+        if self.problems:
+            message = f"{self.problems} diferencias encontradas"
+            if options['fix']:
+                self.stdout.write(self.style.WARNING(f"{message} y corregidas."))
+            else:
+                raise CommandError(f"{message}. Ejecute con --fix para corregirlas.")
+        else:
+            self.stdout.write(self.style.SUCCESS("Marcadores consistentes."))
+
+    def check_batch(self, matches, fix):
+        match_ids = [match.pk for match in matches]
+        stats = raw_team_stats(match_ids)
+        sets_by_match = {}
+        for set_obj in Set.objects.filter(match_id__in=match_ids).order_by('match_id', 'set_number'):
+            sets_by_match.setdefault(set_obj.match_id, []).append(set_obj)
+
+        sets_to_fix = []
+        for set_obj in (set_obj for sets in sets_by_match.values() for set_obj in sets):
+            wrong = False
+            for team in ('A', 'B'):
+                expected = stats.get((set_obj.pk, team), {})
+                for total, stat in TOTAL_FIELDS.items():
+                    field = f'team_{team.lower()}_total_{stat}'
+                    value = expected.get(total) or 0
+                    if getattr(set_obj, field) != value:
+                        self.report(f"Set {set_obj.pk}: {field}={getattr(set_obj, field)}, esperado {value}")
+                        setattr(set_obj, field, value)
+                        wrong = True
+            if wrong:
+                sets_to_fix.append(set_obj)
+
+        matches_to_fix = []
+        for match in matches:
+            sets = sets_by_match.get(match.pk, [])
+            expected = next((set_obj for set_obj in sets if not set_obj.completed), None)
+            if expected is None and sets:
+                expected = sets[-1]
+            expected_id = expected.pk if expected else None
+            if match.current_set_id != expected_id:
+                self.report(f"Partido {match.pk}: current_set={match.current_set_id}, esperado {expected_id}")
+                match.current_set_id = expected_id
+                matches_to_fix.append(match)
+
+        if fix:
+            for obj in sets_to_fix + matches_to_fix:
+                obj.version = F('version') + 1
+            Set.objects.bulk_update(sets_to_fix, [
+                f'team_{team}_total_{stat}'
+                for team in ('a', 'b') for stat in TOTAL_FIELDS.values()
+            ] + ['version'])
+            Match.objects.bulk_update(matches_to_fix, ['current_set', 'version'])
+
+    def report(self, message):
+        self.problems += 1
+        self.stdout.write(message)
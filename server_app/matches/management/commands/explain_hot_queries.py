@@ -0,0 +1,118 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from matches.models import Match, PlayerPerformance, Set
+from teams.models import Player, Team
+from tournaments.models import Tournament
+
+TEAMS = 16
+
+
+class Command(BaseCommand):
+    """
+    Muestra el plan de ejecución (``EXPLAIN``) de las consultas más
+    frecuentes sobre partidos, sets y rendimientos.
+
+    Genera un conjunto de datos grande dentro de una transacción que se
+    revierte al terminar, actualiza las estadísticas del planificador y
+    explica cada consulta. Para comparar con el esquema anterior a los
+    índices, ejecutar primero ``migrate matches 0010`` y luego volver a
+    migrar: los recorridos secuenciales deben pasar a búsquedas por índice.
+
+    Ejemplos:
+        python manage.py explain_hot_queries
+        python manage.py explain_hot_queries --matches 100000 --analyze
+    """
+
+    help = "Muestra el EXPLAIN de las consultas frecuentes sobre un conjunto de datos generado"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=20000,
+                            help="Partidos a generar (por defecto 20000)")
+        parser.add_argument('--tournaments', type=int, default=50,
+                            help="Torneos entre los que se reparten (por defecto 50)")
+        parser.add_argument('--analyze', action='store_true',
+                            help="Ejecutar las consultas (EXPLAIN ANALYZE) para ver tiempos reales")
+
+    def handle(self, *args, **options):
+        if options['matches'] < 1 or options['tournaments'] < 1:
+            raise CommandError("--matches y --tournaments deben ser mayores que cero.")
+
+        with transaction.atomic():
+            sample = self.generate(options['matches'], options['tournaments'])
+            self.analyze_tables()
+            for title, queryset in self.queries(sample):
+                self.stdout.write(self.style.MIGRATE_HEADING(title))
+                self.stdout.write(queryset.explain(analyze=options['analyze'])
+                                  if options['analyze'] and connection.vendor == 'postgresql'
+                                  else queryset.explain())
+                self.stdout.write('')
+            transaction.set_rollback(True)
+
+    def queries(self, sample):
+        return [
+            ("Set por partido y número",
+             Set.objects.filter(match_id=sample['match'], set_number=2)),
+            ("Rendimiento por set y jugador",
+             PlayerPerformance.objects.filter(set_id=sample['set'], player_id=sample['player'])),
+            ("Calendario de un torneo",
+             Match.objects.filter(tournament_id=sample['tournament'],
+                                  scheduled_date__gte=sample['date']).order_by('scheduled_date')),
+            ("Partidos de un torneo por estado",
+             Match.objects.filter(tournament_id=sample['tournament'], status='finished')),
+            ("Página del listado por cursor",
+             Match.objects.filter(scheduled_date__lt=sample['date'])
+             .order_by('-scheduled_date', 'id')[:6]),
+        ]
+
+    def generate(self, match_count, tournament_count):
+        self.stdout.write(f"Generando {match_count} partidos en {tournament_count} torneos...")
+        today = timezone.now()
+        teams = Team.objects.bulk_create(
+            Team(name=f"Explain {index}", gender="M", coach="-") for index in range(TEAMS))
+        players = Player.objects.bulk_create(
+            Player(team=team, name=f"Jugador {team.name}", jersey_number=1,
+                   position="OP", is_starter=True)
+            for team in teams)
+        tournaments = Tournament.objects.bulk_create(
+            Tournament(name=f"Explain {index}", start_date=today.date(), end_date=today.date())
+            for index in range(tournament_count))
+
+        statuses = ('finished', 'upcoming', 'live')
+        matches = Match.objects.bulk_create(
+            (Match(tournament=tournaments[index % tournament_count],
+                   team_a=teams[index % TEAMS], team_b=teams[(index + 1) % TEAMS],
+                   scheduled_date=today + timedelta(hours=index), location="Gimnasio",
+                   status=statuses[index % 3])
+             for index in range(match_count)),
+            batch_size=1000)
+        sets = Set.objects.bulk_create(
+            (Set(match=match, set_number=number, completed=True)
+             for match in matches for number in (1, 2, 3)),
+            batch_size=1000)
+        by_team = {player.team_id: player for player in players}
+        match_teams = {match.pk: (match.team_a_id, match.team_b_id) for match in matches}
+        PlayerPerformance.objects.bulk_create(
+            (PlayerPerformance(set=set_obj, player=by_team[team_id], points=10)
+             for set_obj in sets for team_id in match_teams[set_obj.match_id]),
+            batch_size=1000)
+
+        middle = matches[len(matches) // 2]
+        middle_set = sets[len(sets) // 2]
+        return {
+            'match': middle.pk,
+            'set': middle_set.pk,
+            'player': by_team[match_teams[middle_set.match_id][0]].pk,
+            'tournament': middle.tournament_id,
+            'date': middle.scheduled_date,
+        }
+
+    def analyze_tables(self):
+        """Actualiza las estadísticas para que el plan refleje el volumen generado."""
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                for model in (Match, Set, PlayerPerformance):
+                    cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+            elif connection.vendor == 'sqlite':
+                cursor.execute('ANALYZE')
@@ -0,0 +1,294 @@
+import csv
+import io
+import random
+import time
+from datetime import date, datetime, time as day_time, timedelta, timezone as dt_timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from matches import leaderboards, standings
+from matches.models import Match, PlayerPerformance, RallyEvent, Set, set_winner
+from matches.scheduling import round_robin
+from matches.scoring import STAT_FIELDS, team_total_field
+from teams.models import Player, Team
+from tournaments.models import Tournament
+
+# Plantel tipo: armador, opuesto, dos puntas, dos centrales y líbero; el
+# resto son suplentes de las mismas posiciones
+ROSTER_POSITIONS = ('AR', 'OP', 'PR', 'PR', 'CE', 'CE', 'LI')
+VENUES = ("Coliseo Central", "Gimnasio Municipal", "Polideportivo Norte",
+          "Estadio Cubierto", "Gimnasio Universitario", "Arena Sur")
+ON_COURT = 7  # seis en cancha más el líbero
+
+
+class Command(BaseCommand):
+    """
+    Genera una liga sintética y determinista para pruebas de carga y de
+    escala: equipos con planteles completos, temporadas de torneos todos
+    contra todos, partidos terminados con estadísticas simuladas punto a
+    punto y algunos partidos en vivo.
+
+    La misma ``--seed`` produce siempre los mismos resultados. Cada punto
+    se simula (error rival, ataque, ace o bloqueo) y se agrega en un
+    ``PlayerPerformance`` por jugador y set; el registro de eventos recibe
+    un ``RallyEvent`` de carga inicial por rendimiento y por equipo y set,
+    así que ``rebuild_rally_projections`` reconstruye exactamente lo
+    generado. Se escribe un torneo por transacción: equipos, partidos y
+    sets con ``bulk_create``; rendimientos y eventos, que son la gran
+    mayoría de las filas, como tuplas (``COPY`` en PostgreSQL). Al final
+    de cada torneo se recalculan su tabla y sus líderes.
+
+    Ejemplos:
+        python manage.py generate_league
+        python manage.py generate_league --teams 4000 --seasons 3 --live 20
+        python manage.py generate_league --seed 7 --prefix Copa --teams 64 --division-size 8
+    """
+
+    help = "Genera una liga sintética determinista (equipos, torneos, partidos y estadísticas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=400,
+                            help="Equipos a generar (por defecto 400)")
+        parser.add_argument('--roster', type=int, default=14,
+                            help="Jugadores por equipo (por defecto 14)")
+        parser.add_argument('--seasons', type=int, default=2,
+                            help="Temporadas (por defecto 2)")
+        parser.add_argument('--division-size', type=int, default=16,
+                            help="Equipos por torneo en cada temporada (por defecto 16)")
+        parser.add_argument('--live', type=int, default=4,
+                            help="Partidos de la última fecha que quedan en vivo (por defecto 4)")
+        parser.add_argument('--seed', type=int, default=42,
+                            help="Semilla del generador (por defecto 42)")
+        parser.add_argument('--start-year', type=int, default=2024,
+                            help="Año de la primera temporada (por defecto 2024)")
+        parser.add_argument('--prefix', default="Sim",
+                            help="Prefijo de los nombres de equipos y torneos (por defecto 'Sim')")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Filas por INSERT (por defecto 2000)")
+
+    def handle(self, *args, **options):
+        if min(options['teams'], options['roster'], options['seasons'],
+               options['batch_size']) < 1 or options['live'] < 0:
+            raise CommandError("Las cantidades deben ser mayores que cero.")
+        if options['roster'] < ON_COURT:
+            raise CommandError(f"--roster debe ser al menos {ON_COURT}.")
+        if not 2 <= options['division_size'] <= options['teams']:
+            raise CommandError("--division-size debe estar entre 2 y --teams.")
+        if Team.objects.filter(name__startswith=f"{options['prefix']} ").exists():
+            raise CommandError(
+                f"Ya existen equipos con el prefijo '{options['prefix']}'; use otro --prefix.")
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.counts = dict.fromkeys(
+            ('teams', 'players', 'tournaments', 'matches', 'sets', 'performances', 'events'), 0)
+        started = time.perf_counter()
+
+        teams = self.create_teams(options['prefix'], options['teams'], options['roster'])
+        for season in range(options['seasons']):
+            last = season == options['seasons'] - 1
+            self.play_season(options['prefix'], options['start_year'] + season, teams,
+                             options['division_size'], options['live'] if last else 0)
+            self.stdout.write(f"Temporada {options['start_year'] + season} generada")
+
+        elapsed = time.perf_counter() - started
+        rows = sum(self.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f"{count} {name}" for name, count in self.counts.items())
+            + f" en {elapsed:.1f} s ({rows / elapsed:,.0f} filas/s)"))
+
+    def create_teams(self, prefix, count, roster_size):
+        """Crea los equipos y sus planteles; devuelve ``(team_id, [player_id, ...])``."""
+        with transaction.atomic():
+            teams = Team.objects.bulk_create(
+                (Team(name=f"{prefix} {number:05}", gender=self.rng.choice('MF'),
+                      coach=f"Entrenador {number:05}")
+                 for number in range(1, count + 1)),
+                batch_size=self.batch_size)
+            players = Player.objects.bulk_create(
+                (Player(team=team, name=f"Jugador {index:05}-{number:02}",
+                        jersey_number=number,
+                        position=ROSTER_POSITIONS[(number - 1) % len(ROSTER_POSITIONS)],
+                        is_starter=number <= ON_COURT,
+                        avatar=(Player.DEFAULT_AVATAR_MALE if team.gender == 'M'
+                                else Player.DEFAULT_AVATAR_FEMALE))
+                 for index, team in enumerate(teams, start=1)
+                 for number in range(1, roster_size + 1)),
+                batch_size=self.batch_size)
+        self.counts['teams'] += len(teams)
+        self.counts['players'] += len(players)
+
+        rosters = {}
+        for player in players:
+            rosters.setdefault(player.team_id, []).append(player.pk)
+        return [(team.pk, rosters[team.pk]) for team in teams]
+
+    def play_season(self, prefix, year, teams, division_size, live):
+        teams = list(teams)
+        self.rng.shuffle(teams)
+        divisions = [teams[index:index + division_size]
+                     for index in range(0, len(teams), division_size)]
+        if len(divisions) > 1 and len(divisions[-1]) < 2:
+            divisions[-2] += divisions.pop()
+        for number, division in enumerate(divisions, start=1):
+            # Los partidos en vivo quedan en la última división generada
+            self.play_tournament(f"{prefix} {year} División {number:03}", year, division,
+                                 live if number == len(divisions) else 0)
+
+    def play_tournament(self, name, year, division, live):
+        rosters = dict(division)
+        rounds = round_robin([team_id for team_id, _ in division])
+        season_start = datetime.combine(date(year, 3, 1), day_time(18), tzinfo=dt_timezone.utc)
+        strength = {team_id: self.rng.uniform(0.35, 0.65) for team_id in rosters}
+        fixtures = [(round_number, slot, home, away)
+                    for round_number, pairs in enumerate(rounds)
+                    for slot, (home, away) in enumerate(pairs)]
+        live_from = len(fixtures) - live
+
+        with transaction.atomic():
+            tournament = Tournament.objects.create(
+                name=name, start_date=season_start.date(),
+                end_date=(season_start + timedelta(weeks=len(rounds))).date(),
+                location=self.rng.choice(VENUES))
+            Tournament.teams.through.objects.bulk_create(
+                Tournament.teams.through(tournament_id=tournament.pk, team_id=team_id)
+                for team_id in rosters)
+
+            matches, results = [], []
+            for index, (round_number, slot, home, away) in enumerate(fixtures):
+                scheduled = season_start + timedelta(weeks=round_number, hours=slot % 4 * 2)
+                is_live = index >= live_from
+                sets = self.play_match(strength[home] / (strength[home] + strength[away]),
+                                       live=is_live)
+                won = [0, 0]
+                for number, (a, b, completed) in enumerate(sets, start=1):
+                    if completed:
+                        won[set_winner(number, a, b) == 'B'] += 1
+                matches.append(Match(
+                    tournament=tournament, team_a_id=home, team_b_id=away,
+                    scheduled_date=scheduled, location=tournament.location,
+                    weather_status='skipped', status='live' if is_live else 'finished',
+                    start_time=scheduled,
+                    end_time=None if is_live else scheduled + timedelta(minutes=25 * len(sets)),
+                    team_a_sets_won=won[0], team_b_sets_won=won[1]))
+                results.append(sets)
+            matches = Match.objects.bulk_create(matches, batch_size=self.batch_size)
+            self.write_sets(matches, results, rosters)
+
+        standings.rebuild(tournament.pk)
+        leaderboards.rebuild(tournament.pk)
+        self.counts['tournaments'] += 1
+        self.counts['matches'] += len(matches)
+
+    def play_match(self, probability_a, live=False):
+        """
+        Simula los sets de un partido como ``(puntos A, puntos B, terminado)``.
+
+        Un partido en vivo conserva algunos sets terminados y uno en juego.
+        """
+        sets, won = [], [0, 0]
+        while max(won) < 3:
+            number = len(sets) + 1
+            target = 15 if number == 5 else 25
+            winner = 0 if self.rng.random() < probability_a else 1
+            if self.rng.random() < 0.15:
+                loser_points = self.rng.randint(target - 1, target + 6)  # definición por dos
+                winner_points = loser_points + 2
+            else:
+                loser_points = self.rng.randint(target // 2, target - 2)
+                winner_points = target
+            points = [0, 0]
+            points[winner], points[1 - winner] = winner_points, loser_points
+            sets.append((points[0], points[1], True))
+            won[winner] += 1
+        if live:
+            sets = sets[:self.rng.randint(0, len(sets) - 1)]
+            target = 15 if len(sets) == 4 else 25
+            sets.append((self.rng.randint(0, target - 2), self.rng.randint(0, target - 2), False))
+        return sets
+
+    def write_sets(self, matches, results, rosters):
+        sets, performances, events = [], [], []
+        for match, match_sets in zip(matches, results):
+            recorded_at = connection.ops.adapt_datetimefield_value(match.scheduled_date)
+            for number, (a, b, completed) in enumerate(match_sets, start=1):
+                set_obj = Set(match=match, set_number=number, team_a_points=a, team_b_points=b,
+                              completed=completed)
+                for team, team_id, team_points in (('A', match.team_a_id, a),
+                                                   ('B', match.team_b_id, b)):
+                    totals = dict.fromkeys(STAT_FIELDS, 0)
+                    for player_id, stats in self.play_points(rosters[team_id], team_points).items():
+                        values = tuple(stats[stat] for stat in STAT_FIELDS)
+                        performances.append((set_obj, player_id) + values)
+                        events.append((match.pk, set_obj, player_id, team, 'seed')
+                                      + values + (0, recorded_at))
+                        for stat in STAT_FIELDS:
+                            totals[stat] += stats[stat]
+                    for stat in STAT_FIELDS:
+                        setattr(set_obj, team_total_field(team, stat), totals[stat])
+                    if team_points:
+                        events.append((match.pk, set_obj, None, team, 'seed', 0, 0, 0, 0,
+                                       team_points, recorded_at))
+                sets.append(set_obj)
+            match.current_set = set_obj  # el último set queda como actual
+
+        # Sets por ORM (hacen falta sus IDs); rendimientos y eventos, que
+        # son la gran mayoría de las filas, como tuplas sin instanciar modelos
+        Set.objects.bulk_create(sets, batch_size=self.batch_size)
+        Match.objects.bulk_update(matches, ['current_set'], batch_size=self.batch_size)
+        self.insert_rows(
+            PlayerPerformance, ('set', 'player') + STAT_FIELDS,
+            [(row[0].pk,) + row[1:] for row in performances])
+        self.insert_rows(
+            RallyEvent, ('match', 'set', 'player', 'team', 'kind') + STAT_FIELDS
+            + ('set_points', 'created_at'),
+            [row[:1] + (row[1].pk,) + row[2:] for row in events])
+        self.counts['sets'] += len(sets)
+        self.counts['performances'] += len(performances)
+        self.counts['events'] += len(events)
+
+    def insert_rows(self, model, fields, rows):
+        """
+        Inserta tuplas directamente en la tabla del modelo: ``COPY`` en
+        PostgreSQL y ``executemany`` por lotes en otros motores.
+        """
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)  # None se escribe vacío: NULL
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+                return
+            placeholders = ', '.join(['%s'] * len(fields))
+            sql = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
+            for index in range(0, len(rows), self.batch_size):
+                cursor.executemany(sql, rows[index:index + self.batch_size])
+
+    def play_points(self, roster, team_points):
+        """
+        Reparte los puntos de un equipo en un set entre los jugadores en
+        cancha, punto a punto: error del rival, ataque (con asistencia del
+        armador), ace o bloqueo.
+
+        Returns:
+            dict: Estadísticas por jugador en cancha
+        """
+        on_court = roster[:ON_COURT - 2] + self.rng.sample(roster[ON_COURT - 2:], 2)
+        setter, attackers = on_court[0], on_court[1:]
+        stats = {player_id: dict.fromkeys(STAT_FIELDS, 0) for player_id in on_court}
+        for _ in range(team_points):
+            play = self.rng.random()
+            if play < 0.3:
+                continue  # error del rival: suma al equipo, no a un jugador
+            scorer = self.rng.choice(on_court if play < 0.38 else attackers)
+            stats[scorer]['points'] += 1
+            if play < 0.38:
+                stats[scorer]['aces'] += 1
+            elif play < 0.5:
+                stats[scorer]['blocks'] += 1
+            elif self.rng.random() < 0.7:
+                stats[setter]['assists'] += 1
+        return stats
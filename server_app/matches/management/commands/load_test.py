@@ -0,0 +1,115 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from matches.loadtest import LoadTest, compare
+
+
+class Command(BaseCommand):
+    """
+    Prueba de carga contra un servidor en marcha: ``--matches`` partidos en
+    vivo con un anotador cada uno (jugadas, tiempos fuera y sustituciones)
+    y ``--spectators`` espectadores consultando detalle y marcador.
+
+    El servidor debe usar la misma base de datos que este comando, que crea
+    los usuarios, equipos y partidos de la prueba (ver ``matches.loadtest``).
+    Las consultas SQL se suman desde la cabecera ``X-Query-Count``, que el
+    servidor solo envía con ``SERVER_TIMING=true`` (por defecto igual a
+    ``DEBUG``); si no, las consultas por endpoint quedan en ``None``.
+
+    Ejemplos:
+        SERVER_TIMING=true python manage.py runserver --noreload   # en otra terminal
+        python manage.py load_test --matches 8 --spectators 200 --duration 120
+        python manage.py load_test --output carga.json --compare carga-anterior.json
+    """
+
+    help = ("Simula anotadores y espectadores contra un servidor y mide latencias por endpoint. "
+            "Las consultas SQL solo se miden si el servidor corre con SERVER_TIMING=true")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                            help="URL del servidor (por defecto http://127.0.0.1:8000)")
+        parser.add_argument('--matches', type=int, default=4,
+                            help="Partidos en vivo simultáneos (por defecto 4)")
+        parser.add_argument('--spectators', type=int, default=50,
+                            help="Espectadores (por defecto 50)")
+        parser.add_argument('--duration', type=float, default=60,
+                            help="Segundos de carga (por defecto 60)")
+        parser.add_argument('--rally-interval', type=float, default=2.0,
+                            help="Segundos promedio entre jugadas por partido (por defecto 2)")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Segundos promedio entre consultas por espectador (por defecto 1)")
+        parser.add_argument('--timeout-rate', type=float, default=0.03,
+                            help="Probabilidad de tiempo fuera tras cada jugada (por defecto 0.03)")
+        parser.add_argument('--substitution-rate', type=float, default=0.08,
+                            help="Probabilidad de sustitución tras cada jugada (por defecto 0.08)")
+        parser.add_argument('--seed', type=int, default=42,
+                            help="Semilla de los usuarios virtuales (por defecto 42)")
+        parser.add_argument('--output',
+                            help="Archivo donde guardar los resultados en JSON")
+        parser.add_argument('--compare',
+                            help="Resultados JSON anteriores con los que comparar el p95")
+
+    def handle(self, *args, **options):
+        if options['matches'] < 1 or options['spectators'] < 0:
+            raise CommandError("--matches debe ser mayor que cero y --spectators no negativo.")
+        if min(options['duration'], options['rally_interval'], options['poll_interval']) <= 0:
+            raise CommandError("--duration y los intervalos deben ser mayores que cero.")
+        if options['timeout_rate'] + options['substitution_rate'] > 1:
+            raise CommandError("--timeout-rate y --substitution-rate no pueden sumar más de 1.")
+        previous = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as handle:
+                    previous = json.load(handle)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer {options['compare']}: {e}")
+
+        self.stdout.write(
+            f"{options['matches']} partidos y {options['spectators']} espectadores "
+            f"contra {options['base_url']} durante {options['duration']:g} s...")
+        results = LoadTest(
+            options['base_url'], matches=options['matches'], spectators=options['spectators'],
+            duration=options['duration'], rally_interval=options['rally_interval'],
+            poll_interval=options['poll_interval'], timeout_rate=options['timeout_rate'],
+            substitution_rate=options['substitution_rate'], seed=options['seed'],
+        ).run()
+
+        self.report(results)
+        if previous is not None:
+            self.report_comparison(compare(previous, results))
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                json.dump(results, handle, indent=2)
+            self.stdout.write(f"Resultados guardados en {options['output']}")
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'endpoint':<34} {'solic.':>7} {'err.':>5} {'req/s':>7} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'consultas':>10}")
+        for endpoint, row in results['endpoints'].items():
+            latency = row['latency_ms']
+            queries = row['db_queries_per_request']
+            self.stdout.write(
+                f"{endpoint:<34} {row['requests']:>7} {row['errors']:>5} "
+                f"{row['throughput_rps']:>7.1f} {latency['p50']:>8.1f} {latency['p95']:>8.1f} "
+                f"{latency['p99']:>8.1f} {'-' if queries is None else queries:>10}")
+        totals = results['totals']
+        style = self.style.SUCCESS if not totals['errors'] else self.style.WARNING
+        self.stdout.write(style(
+            f"{totals['requests']} solicitudes ({totals['throughput_rps']:.1f}/s), "
+            f"{totals['errors']} errores, "
+            f"{'sin datos de' if totals['db_queries'] is None else totals['db_queries']} "
+            f"consultas SQL, {totals['matches_finished']} partidos terminados"))
+        if totals['db_queries'] is None:
+            self.stdout.write(self.style.WARNING(
+                "El servidor no envió X-Query-Count: arrancarlo con SERVER_TIMING=true "
+                "para medir las consultas SQL."))
+
+    def report_comparison(self, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING("Comparación con la ejecución anterior"))
+        self.stdout.write(
+            f"{'endpoint':<34} {'p95 antes':>10} {'p95 ahora':>10} {'cambio':>8} {'consultas':>12}")
+        for endpoint, before, now, change, old_queries, new_queries in rows:
+            self.stdout.write(
+                f"{endpoint:<34} {before:>10.1f} {now:>10.1f} "
+                f"{'-' if change is None else f'{change:+.1f}%':>8} "
+                f"{f'{old_queries} → {new_queries}':>12}")
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from matches import leaderboards, standings
+from matches.models import Match
+from matches.scoring import rebuild_projections
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye ``PlayerPerformance`` y los puntos de ``Set`` a partir del
+    registro de ``RallyEvent``.
+
+    Los partidos se procesan por lotes, cada uno en su propia transacción,
+    para poder recalcular una temporada completa sin cargarla en memoria.
+    Al final se recalculan los totales de jugadores y la tabla de posiciones
+    de los torneos tocados, porque los puntos de los sets pueden cambiar.
+
+    Ejemplos:
+        python manage.py rebuild_rally_projections --match 12
+        python manage.py rebuild_rally_projections --tournament 3
+        python manage.py rebuild_rally_projections --all
+    """
+
+    help = "Reconstruye las proyecciones de rendimiento y marcador desde los eventos de jugada"
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--match', type=int, help="ID del partido")
+        target.add_argument('--tournament', type=int, help="ID del torneo")
+        target.add_argument('--all', action='store_true', help="Todos los partidos")
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help="Partidos reconstruidos por transacción (por defecto 200)")
+
+    def handle(self, *args, **options):
+        matches = Match.objects.order_by('id')
+        if options['match']:
+            matches = matches.filter(pk=options['match'])
+        elif options['tournament']:
+            matches = matches.filter(tournament_id=options['tournament'])
+
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size debe ser mayor que cero.")
+
+        total_matches = total_performances = 0
+        batch = []
+        for match_id in matches.values_list('id', flat=True).iterator(chunk_size=batch_size):
+            batch.append(match_id)
+            if len(batch) == batch_size:
+                total_performances += rebuild_projections(batch)
+                total_matches += len(batch)
+                batch = []
+        if batch:
+            total_performances += rebuild_projections(batch)
+            total_matches += len(batch)
+
+        tournaments = matches.values_list('tournament_id', flat=True).distinct().order_by()
+        for tournament_id in tournaments:
+            leaderboards.rebuild(tournament_id)
+            standings.rebuild(tournament_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_matches} partidos reconstruidos ({total_performances} rendimientos)."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from matches.standings import rebuild
+from tournaments.models import Tournament
+
+
+class Command(BaseCommand):
+    """
+    Reconstruye la tabla de posiciones desde los partidos finalizados.
+
+    La tabla se mantiene sola al terminar, editar o borrar cada partido
+    desde la API; este comando sirve para corregirla tras editar resultados
+    directamente en la base de datos o en el admin.
+
+    Ejemplos:
+        python manage.py rebuild_standings
+        python manage.py rebuild_standings --tournament 3
+    """
+
+    help = "Reconstruye la tabla de posiciones de los torneos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournament', type=int, help="ID del torneo")
+
+    def handle(self, *args, **options):
+        tournaments = Tournament.objects.order_by('id').values_list('id', flat=True)
+        if options['tournament']:
+            tournaments = tournaments.filter(pk=options['tournament'])
+
+        count = rows = 0
+        for tournament_id in tournaments:
+            rows += rebuild(tournament_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Tabla de posiciones reconstruida: {count} torneos, {rows} filas."))
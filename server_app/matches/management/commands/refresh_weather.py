@@ -0,0 +1,56 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from matches.models import Match
+from matches.weather import forecast_cache_stats, get_client, refresh_weather
+
+
+class Command(BaseCommand):
+    """
+    Consulta el clima de los partidos que quedaron sin él.
+
+    Retoma los trabajos en ``pending`` que no avanzaron (por ejemplo, tras
+    reiniciar el servidor) y, con ``--failed``, reintenta los fallidos de
+    partidos que aún no se jugaron. Pensado para ejecutarse periódicamente.
+
+    Ejemplos:
+        python manage.py refresh_weather
+        python manage.py refresh_weather --failed
+        python manage.py refresh_weather --match 12
+    """
+
+    help = "Consulta el clima pendiente o fallido de los partidos"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--match', type=int, help="ID del partido")
+        parser.add_argument('--failed', action='store_true',
+                            help="Reintenta también las consultas fallidas")
+        parser.add_argument(
+            '--stale-minutes', type=int, default=10,
+            help="Minutos sin cambios de un 'pending' para retomarlo (por defecto 10)")
+
+    def handle(self, *args, **options):
+        if options['match']:
+            match_ids = [options['match']]
+        else:
+            stale = Q(weather_checked_at__isnull=True) | Q(
+                weather_checked_at__lt=timezone.now() - timedelta(minutes=options['stale_minutes']))
+            statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+            match_ids = Match.objects.filter(
+                stale, weather_status__in=statuses, status='upcoming'
+            ).order_by('scheduled_date').values_list('id', flat=True)
+
+        results = {}
+        for match_id in match_ids:
+            result = refresh_weather(match_id)
+            results[result] = results.get(result, 0) + 1
+
+        summary = ", ".join(f"{count} {result}" for result, count in results.items()) or "ninguno"
+        stats = forecast_cache_stats()
+        http = get_client().metrics()
+        self.stdout.write(self.style.SUCCESS(
+            f"Clima consultado: {summary}. Caché de pronósticos: "
+            f"{stats['hits']} aciertos, {stats['misses']} fallos. open-meteo: "
+            f"{http['attempts']} solicitudes, {http['failures']} consultas fallidas, "
+            f"circuito {http['circuit']}."))
@@ -0,0 +1,174 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_events(apps, schema_editor):
+    """
+    Crea eventos de carga inicial para que las proyecciones existentes
+    puedan reconstruirse desde el registro de eventos.
+    """
+    PlayerPerformance = apps.get_model("matches", "PlayerPerformance")
+    RallyEvent = apps.get_model("matches", "RallyEvent")
+    Set = apps.get_model("matches", "Set")
+
+    events = []
+    performances = PlayerPerformance.objects.values(
+        "set_id",
+        "set__match_id",
+        "set__match__team_a_id",
+        "player_id",
+        "player__team_id",
+        "points",
+        "aces",
+        "assists",
+        "blocks",
+    )
+    for row in performances.iterator(chunk_size=2000):
+        team = "A" if row["player__team_id"] == row["set__match__team_a_id"] else "B"
+        events.append(
+            RallyEvent(
+                match_id=row["set__match_id"],
+                set_id=row["set_id"],
+                player_id=row["player_id"],
+                team=team,
+                kind="seed",
+                points=row["points"],
+                aces=row["aces"],
+                assists=row["assists"],
+                blocks=row["blocks"],
+            )
+        )
+    sets = Set.objects.values("id", "match_id", "team_a_points", "team_b_points")
+    for row in sets.iterator(chunk_size=2000):
+        for team in ("A", "B"):
+            points = row[f"team_{team.lower()}_points"]
+            if points:
+                events.append(
+                    RallyEvent(
+                        match_id=row["match_id"],
+                        set_id=row["id"],
+                        team=team,
+                        kind="seed",
+                        set_points=points,
+                    )
+                )
+    RallyEvent.objects.bulk_create(events, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0002_initial"),
+        ("teams", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RallyEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "team",
+                    models.CharField(
+                        choices=[("A", "Equipo A"), ("B", "Equipo B")],
+                        help_text="Equipo al que se atribuye el evento",
+                        max_length=1,
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("rally", "Jugada"),
+                            ("undo", "Reversión"),
+                            ("seed", "Carga inicial"),
+                        ],
+                        default="rally",
+                        help_text="Tipo de evento",
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "points",
+                    models.IntegerField(
+                        default=0, help_text="Variación de puntos del jugador"
+                    ),
+                ),
+                (
+                    "aces",
+                    models.IntegerField(
+                        default=0, help_text="Variación de servicios directos"
+                    ),
+                ),
+                (
+                    "assists",
+                    models.IntegerField(
+                        default=0, help_text="Variación de asistencias"
+                    ),
+                ),
+                (
+                    "blocks",
+                    models.IntegerField(default=0, help_text="Variación de bloqueos"),
+                ),
+                (
+                    "set_points",
+                    models.IntegerField(
+                        default=0,
+                        help_text="Variación aplicada al marcador del equipo en el set",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Momento en que se registró el evento",
+                    ),
+                ),
+                (
+                    "match",
+                    models.ForeignKey(
+                        help_text="Partido al que pertenece el evento",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rally_events",
+                        to="matches.match",
+                    ),
+                ),
+                (
+                    "player",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="Jugador del evento (vacío para ajustes del marcador)",
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rally_events",
+                        to="teams.player",
+                    ),
+                ),
+                (
+                    "set",
+                    models.ForeignKey(
+                        help_text="Set al que pertenece el evento",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rally_events",
+                        to="matches.set",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Evento de Jugada",
+                "verbose_name_plural": "Eventos de Jugada",
+                "ordering": ["id"],
+            },
+        ),
+        migrations.RunPython(seed_events, migrations.RunPython.noop),
+    ]
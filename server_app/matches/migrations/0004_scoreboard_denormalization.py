@@ -0,0 +1,128 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+STATS = ("points", "aces", "assists", "blocks")
+
+
+def backfill(apps, schema_editor):
+    """
+    Rellena ``Match.current_set`` y los totales por equipo de cada set a
+    partir de los rendimientos registrados.
+    """
+    Match = apps.get_model("matches", "Match")
+    PlayerPerformance = apps.get_model("matches", "PlayerPerformance")
+    Set = apps.get_model("matches", "Set")
+
+    totals = {}
+    performances = PlayerPerformance.objects.values(
+        "set_id", "set__match__team_a_id", "player__team_id", *STATS
+    )
+    for row in performances.iterator(chunk_size=2000):
+        team = "a" if row["player__team_id"] == row["set__match__team_a_id"] else "b"
+        set_totals = totals.setdefault(row["set_id"], {})
+        for stat in STATS:
+            field = f"team_{team}_total_{stat}"
+            set_totals[field] = set_totals.get(field, 0) + row[stat]
+
+    sets = list(Set.objects.filter(pk__in=totals))
+    for set_obj in sets:
+        for field, value in totals[set_obj.pk].items():
+            setattr(set_obj, field, value)
+    Set.objects.bulk_update(
+        sets,
+        [f"team_{team}_total_{stat}" for team in "ab" for stat in STATS],
+        batch_size=500,
+    )
+
+    current = {}
+    for row in Set.objects.order_by("match_id", "set_number").values(
+        "id", "match_id", "completed"
+    ):
+        if row["match_id"] not in current or current[row["match_id"]][1]:
+            current[row["match_id"]] = (row["id"], row["completed"])
+    matches = list(Match.objects.filter(pk__in=current))
+    for match in matches:
+        match.current_set_id = current[match.pk][0]
+    Match.objects.bulk_update(matches, ["current_set"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0003_rallyevent"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="match",
+            name="current_set",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Set en juego, o el último set si el partido terminó",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="matches.set",
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_a_total_aces",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Servicios directos del equipo A"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_a_total_assists",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Asistencias del equipo A"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_a_total_blocks",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Bloqueos efectivos del equipo A"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_a_total_points",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Puntos sumados por los jugadores del equipo A"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_b_total_aces",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Servicios directos del equipo B"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_b_total_assists",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Asistencias del equipo B"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_b_total_blocks",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Bloqueos efectivos del equipo B"
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="team_b_total_points",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Puntos sumados por los jugadores del equipo B"
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
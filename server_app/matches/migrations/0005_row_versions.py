@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0004_scoreboard_denormalization"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="match",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Versión de la fila para actualizaciones condicionales",
+            ),
+        ),
+        migrations.AddField(
+            model_name="set",
+            name="version",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Versión de la fila para actualizaciones condicionales",
+            ),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:50
+
+from django.db import migrations, models
+
+
+def set_initial_status(apps, schema_editor):
+    """
+    Los partidos con clima quedan 'ready'; los que tienen coordenadas pero
+    no lo obtuvieron, 'failed', para que ``refresh_weather --failed`` los
+    retome.
+    """
+    Match = apps.get_model("matches", "Match")
+    Match.objects.filter(weather_info__isnull=False).update(weather_status="ready")
+    Match.objects.filter(
+        weather_info__isnull=True,
+        latitude__isnull=False,
+        longitude__isnull=False,
+    ).update(weather_status="failed")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0005_row_versions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="match",
+            name="weather_attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Intentos realizados en la última consulta del clima",
+            ),
+        ),
+        migrations.AddField(
+            model_name="match",
+            name="weather_checked_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Último cambio de estado de la consulta del clima",
+                null=True,
+            ),
+        ),
+        migrations.AddField(
+            model_name="match",
+            name="weather_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pendiente"),
+                    ("ready", "Disponible"),
+                    ("failed", "Fallido"),
+                    ("skipped", "Sin coordenadas"),
+                ],
+                default="skipped",
+                help_text="Estado de la consulta del clima (matches.weather)",
+                max_length=10,
+            ),
+        ),
+        migrations.RunPython(set_initial_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0006_weather_status"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="match",
+            name="weather_attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0, help_text="Consultas del clima realizadas para este partido"
+            ),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill(apps, schema_editor):
+    """Arma la tabla de posiciones con los partidos ya finalizados."""
+    Match = apps.get_model("matches", "Match")
+    Standing = apps.get_model("matches", "Standing")
+
+    standings = {}
+    results = Match.objects.filter(status="finished").values(
+        "id", "tournament_id", "team_a_id", "team_b_id", "team_a_sets_won", "team_b_sets_won"
+    ).annotate(
+        team_a_points=Sum("sets__team_a_points"),
+        team_b_points=Sum("sets__team_b_points"),
+    ).order_by()
+    for row in results.iterator(chunk_size=2000):
+        for own, rival in (("a", "b"), ("b", "a")):
+            won, lost = row[f"team_{own}_sets_won"], row[f"team_{rival}_sets_won"]
+            key = (row["tournament_id"], row[f"team_{own}_id"])
+            standing = standings.setdefault(
+                key, Standing(tournament_id=key[0], team_id=key[1]))
+            standing.played += 1
+            standing.wins += won > lost
+            standing.losses += won < lost
+            standing.sets_won += won
+            standing.sets_lost += lost
+            standing.points_won += row[f"team_{own}_points"] or 0
+            standing.points_lost += row[f"team_{rival}_points"] or 0
+            if won > lost:
+                standing.league_points += 3 if lost < 2 else 2
+            elif won == 2:
+                standing.league_points += 1
+    Standing.objects.bulk_create(standings.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0007_weather_attempts_help"),
+        ("teams", "0002_initial"),
+        ("tournaments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Standing",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "played",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Partidos jugados"
+                    ),
+                ),
+                (
+                    "wins",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Partidos ganados"
+                    ),
+                ),
+                (
+                    "losses",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Partidos perdidos"
+                    ),
+                ),
+                (
+                    "sets_won",
+                    models.PositiveIntegerField(default=0, help_text="Sets ganados"),
+                ),
+                (
+                    "sets_lost",
+                    models.PositiveIntegerField(default=0, help_text="Sets perdidos"),
+                ),
+                (
+                    "points_won",
+                    models.PositiveIntegerField(default=0, help_text="Puntos a favor"),
+                ),
+                (
+                    "points_lost",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Puntos en contra"
+                    ),
+                ),
+                (
+                    "league_points",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Puntos de la tabla"
+                    ),
+                ),
+                (
+                    "team",
+                    models.ForeignKey(
+                        help_text="Equipo de la fila",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="standings",
+                        to="teams.team",
+                    ),
+                ),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        help_text="Torneo de la tabla de posiciones",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="standings",
+                        to="tournaments.tournament",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Posición",
+                "verbose_name_plural": "Tabla de Posiciones",
+                "unique_together": {("tournament", "team")},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,119 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+STATS = ("points", "aces", "assists", "blocks")
+
+
+def backfill(apps, schema_editor):
+    """Suma los rendimientos ya registrados por jugador y torneo."""
+    PlayerPerformance = apps.get_model("matches", "PlayerPerformance")
+    TournamentPlayerStats = apps.get_model("matches", "TournamentPlayerStats")
+
+    rows = PlayerPerformance.objects.values(
+        "set__match__tournament_id", "player_id"
+    ).annotate(**{stat: Sum(stat) for stat in STATS}).order_by()
+    TournamentPlayerStats.objects.bulk_create(
+        (
+            TournamentPlayerStats(
+                tournament_id=row["set__match__tournament_id"],
+                player_id=row["player_id"],
+                **{stat: row[stat] for stat in STATS},
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0008_standings"),
+        ("teams", "0002_initial"),
+        ("tournaments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TournamentPlayerStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "points",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Puntos anotados en el torneo"
+                    ),
+                ),
+                (
+                    "aces",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Servicios directos en el torneo"
+                    ),
+                ),
+                (
+                    "assists",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Asistencias en el torneo"
+                    ),
+                ),
+                (
+                    "blocks",
+                    models.PositiveIntegerField(
+                        default=0, help_text="Bloqueos en el torneo"
+                    ),
+                ),
+                (
+                    "player",
+                    models.ForeignKey(
+                        help_text="Jugador de los totales",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="tournament_stats",
+                        to="teams.player",
+                    ),
+                ),
+                (
+                    "tournament",
+                    models.ForeignKey(
+                        help_text="Torneo de los totales",
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="player_stats",
+                        to="tournaments.tournament",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Totales de Jugador en Torneo",
+                "verbose_name_plural": "Totales de Jugadores en Torneos",
+                "indexes": [
+                    models.Index(
+                        fields=["tournament", "-points", "player"],
+                        name="leader_points_idx",
+                    ),
+                    models.Index(
+                        fields=["tournament", "-aces", "player"], name="leader_aces_idx"
+                    ),
+                    models.Index(
+                        fields=["tournament", "-assists", "player"],
+                        name="leader_assists_idx",
+                    ),
+                    models.Index(
+                        fields=["tournament", "-blocks", "player"],
+                        name="leader_blocks_idx",
+                    ),
+                ],
+                "unique_together": {("tournament", "player")},
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0009_tournament_player_stats"),
+        ("teams", "0002_initial"),
+        ("tournaments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["-scheduled_date", "id"], name="match_schedule_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:15
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+STATS = ("points", "aces", "assists", "blocks")
+SET_TOTALS = ["team_a_points", "team_b_points"] + [
+    f"team_{team}_total_{stat}" for team in ("a", "b") for stat in STATS
+]
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Fusiona los sets y rendimientos duplicados antes de crear las
+    restricciones únicas.
+
+    Se conserva la fila de menor id y se le suman los totales de las demás;
+    los eventos, rendimientos y el set actual del partido pasan a apuntar a
+    ella. Los totales de eventos son aditivos, así que el resultado coincide
+    con lo que reconstruye ``rebuild_rally_projections``.
+    """
+    Match = apps.get_model("matches", "Match")
+    Set = apps.get_model("matches", "Set")
+    PlayerPerformance = apps.get_model("matches", "PlayerPerformance")
+    RallyEvent = apps.get_model("matches", "RallyEvent")
+
+    duplicated_sets = (
+        Set.objects.values("match_id", "set_number")
+        .annotate(rows=Count("id"), keep=Min("id"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in duplicated_sets:
+        keep = Set.objects.get(pk=group["keep"])
+        extras = list(
+            Set.objects.filter(
+                match_id=group["match_id"], set_number=group["set_number"]
+            ).exclude(pk=keep.pk)
+        )
+        for extra in extras:
+            for field in SET_TOTALS:
+                setattr(keep, field, getattr(keep, field) + getattr(extra, field))
+            keep.completed = keep.completed or extra.completed
+        keep.save()
+        extra_ids = [extra.pk for extra in extras]
+        PlayerPerformance.objects.filter(set_id__in=extra_ids).update(set_id=keep.pk)
+        RallyEvent.objects.filter(set_id__in=extra_ids).update(set_id=keep.pk)
+        Match.objects.filter(current_set_id__in=extra_ids).update(current_set_id=keep.pk)
+        Set.objects.filter(pk__in=extra_ids).delete()
+
+    duplicated_performances = (
+        PlayerPerformance.objects.values("set_id", "player_id")
+        .annotate(rows=Count("id"), keep=Min("id"))
+        .filter(rows__gt=1)
+        .order_by()
+    )
+    for group in duplicated_performances:
+        rows = list(
+            PlayerPerformance.objects.filter(
+                set_id=group["set_id"], player_id=group["player_id"]
+            ).order_by("id")
+        )
+        keep = rows[0]
+        for stat in STATS:
+            setattr(keep, stat, sum(getattr(row, stat) for row in rows))
+        keep.save()
+        PlayerPerformance.objects.filter(pk__in=[row.pk for row in rows[1:]]).delete()
+
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0010_match_schedule_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("matches", "0011_merge_duplicate_rows"),
+        ("teams", "0003_player_name_index"),
+        ("tournaments", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="playerperformance",
+            unique_together={("set", "player")},
+        ),
+        migrations.AlterUniqueTogether(
+            name="set",
+            unique_together={("match", "set_number")},
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["tournament", "scheduled_date"],
+                name="match_tournament_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="match",
+            index=models.Index(
+                fields=["tournament", "status"], name="match_tournament_status_idx"
+            ),
+        ),
+    ]
@@ -1,11 +1,108 @@
 # matches/models.py
 
 from django.db import models
+from django.db.models import F
 from teams.models import Team, Player
 from tournaments.models import Tournament
 from django.utils import timezone
 
-class Match(models.Model):
+SETS_TO_WIN = 3
+
+# Intentos de una escritura condicional antes de rendirse ante otros anotadores
+MAX_CAS_RETRIES = 5
+
+
+def set_winner(set_number, team_a_points, team_b_points):
+    """
+    Determina el ganador de un set según las reglas del voleibol.
+
+    Los sets 1 a 4 se juegan a 25 puntos y el quinto (decisivo) a 15,
+    siempre con una diferencia mínima de 2 puntos.
+
+    Args:
+        set_number (int): Número del set
+        team_a_points (int): Puntos del equipo A
+        team_b_points (int): Puntos del equipo B
+
+    Returns:
+        str | None: 'A' o 'B' si el set terminó, None en caso contrario
+    """
+    if set_number < 5:
+        target = 25
+    elif set_number == 5:
+        target = 15
+    else:
+        return None
+    if ((team_a_points >= target or team_b_points >= target) and
+            abs(team_a_points - team_b_points) >= 2):
+        return 'A' if team_a_points > team_b_points else 'B'
+    return None
+
+
+class ConcurrentUpdateError(Exception):
+    """La fila cambió entre la lectura y la escritura condicional."""
+
+
+class VersionedModel(models.Model):
+    """
+    Base para filas que se actualizan con control de concurrencia optimista.
+
+    Cada escritura condicional compara ``version`` con la leída y la
+    incrementa; si otra escritura ganó la carrera no se modifica nada y el
+    llamador debe releer la fila y reintentar.
+
+    Attributes:
+        version (int): Número de versión de la fila
+    """
+
+    version = models.PositiveIntegerField(
+        default=0,
+        help_text="Versión de la fila para actualizaciones condicionales"
+    )
+
+    def compare_and_swap(self, **updates):
+        """
+        Aplica ``updates`` solo si la fila sigue en la versión leída.
+
+        Args:
+            **updates: Valores o expresiones para ``QuerySet.update``
+
+        Returns:
+            bool: True si se aplicó la escritura (y ``version`` avanzó)
+        """
+        updated = type(self)._default_manager.filter(
+            pk=self.pk, version=self.version
+        ).update(version=F('version') + 1, **updates)
+        if updated:
+            self.version += 1
+        return bool(updated)
+
+    def save(self, *args, **kwargs):
+        """
+        Guarda la fila avanzando ``version`` en la misma sentencia, para que
+        cualquier escritura invalide las lecturas previas de otros.
+        """
+        if self._state.adding:
+            return super().save(*args, **kwargs)
+        version = self.version
+        self.version = F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.version = version
+            raise
+        # Se asume que no hubo escrituras ajenas; si las hubo, el próximo
+        # compare_and_swap fallará y releerá la fila.
+        self.version = version + 1
+
+    class Meta:
+        abstract = True
+
+
+class Match(VersionedModel):
     """
     Modelo que representa un partido de voleibol.
     
@@ -21,6 +118,9 @@ class Match(models.Model):
         latitude (float): Latitud para información del clima
         longitude (float): Longitud para información del clima
         weather_info (json): Información del clima en formato JSON
+        weather_status (str): Estado de la consulta del clima en segundo plano
+        weather_attempts (int): Consultas del clima realizadas
+        weather_checked_at (datetime): Último cambio de estado del clima
         status (str): Estado actual del partido
         start_time (datetime): Hora de inicio real
         end_time (datetime): Hora de finalización
@@ -28,6 +128,7 @@ class Match(models.Model):
         team_b_sets_won (int): Sets ganados por equipo B
         team_a_timeouts (int): Tiempos fuera usados por equipo A
         team_b_timeouts (int): Tiempos fuera usados por equipo B
+        current_set (Set): Set en juego (o el último, si el partido terminó)
     """
 
     STATUS_CHOICES = [
@@ -38,6 +139,13 @@ class Match(models.Model):
         ('rescheduled', 'Reprogramado'),
     ]
 
+    WEATHER_STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('ready', 'Disponible'),
+        ('failed', 'Fallido'),
+        ('skipped', 'Sin coordenadas'),
+    ]
+
     tournament = models.ForeignKey(
         Tournament, 
         on_delete=models.CASCADE, 
@@ -78,6 +186,21 @@ class Match(models.Model):
         blank=True,
         help_text="Información del clima en formato JSON"
     )
+    weather_status = models.CharField(
+        max_length=10,
+        choices=WEATHER_STATUS_CHOICES,
+        default='skipped',
+        help_text="Estado de la consulta del clima (matches.weather)"
+    )
+    weather_attempts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Consultas del clima realizadas para este partido"
+    )
+    weather_checked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Último cambio de estado de la consulta del clima"
+    )
     status = models.CharField(
         max_length=20, 
         choices=STATUS_CHOICES, 
@@ -110,6 +233,14 @@ class Match(models.Model):
         default=0,
         help_text="Tiempos fuera utilizados por el equipo B"
     )
+    current_set = models.ForeignKey(
+        'Set',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="Set en juego, o el último set si el partido terminó"
+    )
     max_timeouts_per_set = 2
     max_substitutions_per_set = 6
 
@@ -123,8 +254,8 @@ class Match(models.Model):
         if self.status == 'upcoming':
             self.status = 'live'
             self.start_time = timezone.now()
+            self.current_set = Set.objects.create(match=self, set_number=1)
             self.save()
-            Set.objects.create(match=self, set_number=1)
         else:
             raise ValueError("El partido debe estar en 'upcoming' para iniciar.")
 
@@ -135,42 +266,59 @@ class Match(models.Model):
         Args:
             set_instance (Set): Instancia del set a verificar
         """
-        if set_instance.set_number < 5:  # Sets normales
-            if ((set_instance.team_a_points >= 25 or set_instance.team_b_points >= 25) and 
-                    abs(set_instance.team_a_points - set_instance.team_b_points) >= 2):
-                self.update_set_winner(set_instance)
-        elif set_instance.set_number == 5:  # Set decisivo
-            if ((set_instance.team_a_points >= 15 or set_instance.team_b_points >= 15) and 
-                    abs(set_instance.team_a_points - set_instance.team_b_points) >= 2):
-                self.update_set_winner(set_instance)
-
-        if set_instance.completed:
-            if self.team_a_sets_won < 3 and self.team_b_sets_won < 3:
-                self.start_next_set()
-            else:
-                self.status = 'finished'
-                self.save()
+        if not set_winner(set_instance.set_number,
+                          set_instance.team_a_points, set_instance.team_b_points):
+            return
+        if not self.update_set_winner(set_instance):
+            return
+
+        if self.team_a_sets_won < SETS_TO_WIN and self.team_b_sets_won < SETS_TO_WIN:
+            self.start_next_set()
+        else:
+            self.status = 'finished'
+            self.end_time = timezone.now()
+            Match.objects.filter(pk=self.pk).update(
+                status=self.status, end_time=self.end_time, version=F('version') + 1)
+
+            from .standings import record_result
+            record_result(self.pk)
 
     def start_next_set(self):
         """Inicia el siguiente set si el partido aún no ha terminado."""
-        if self.status == 'live' and self.team_a_sets_won < 3 and self.team_b_sets_won < 3:
-            next_set_number = self.sets.count() + 1
-            Set.objects.create(match=self, set_number=next_set_number)
+        if (self.status == 'live' and self.team_a_sets_won < SETS_TO_WIN
+                and self.team_b_sets_won < SETS_TO_WIN):
+            if self.current_set_id:
+                next_set_number = self.current_set.set_number + 1
+            else:
+                next_set_number = self.sets.count() + 1
+            self.current_set = Set.objects.create(match=self, set_number=next_set_number)
+            Match.objects.filter(pk=self.pk).update(
+                current_set=self.current_set, version=F('version') + 1)
 
     def update_set_winner(self, set_instance):
         """
         Actualiza el ganador del set y el conteo de sets ganados.
+
+        El cierre es condicional (``completed=False``): si dos anotadores
+        llegan a la vez al punto de set, solo uno suma el set ganado.
         
         Args:
             set_instance (Set): Set que ha terminado
+
+        Returns:
+            bool: True si esta llamada cerró el set
         """
-        if set_instance.team_a_points > set_instance.team_b_points:
-            self.team_a_sets_won += 1
-        else:
-            self.team_b_sets_won += 1
+        closed = Set.objects.filter(pk=set_instance.pk, completed=False).update(
+            completed=True, version=F('version') + 1)
         set_instance.completed = True
-        set_instance.save()
-        self.save()
+        if not closed:
+            return False
+
+        won_field = 'team_a_sets_won' if set_instance.team_a_points > set_instance.team_b_points else 'team_b_sets_won'
+        Match.objects.filter(pk=self.pk).update(
+            **{won_field: F(won_field) + 1}, version=F('version') + 1)
+        self.refresh_from_db(fields=['team_a_sets_won', 'team_b_sets_won', 'status', 'version'])
+        return True
 
     def __str__(self):
         return f"{self.team_a.name} vs {self.team_b.name} - {self.status}"
@@ -179,9 +327,16 @@ class Match(models.Model):
         verbose_name = "Partido"
         verbose_name_plural = "Partidos"
         ordering = ['-scheduled_date']
+        indexes = [
+            # Respaldan la paginación por cursor del listado
+            models.Index(fields=['-scheduled_date', 'id'], name='match_schedule_idx'),
+            # Calendario y partidos por estado dentro de un torneo
+            models.Index(fields=['tournament', 'scheduled_date'], name='match_tournament_date_idx'),
+            models.Index(fields=['tournament', 'status'], name='match_tournament_status_idx'),
+        ]
 
 
-class Set(models.Model):
+class Set(VersionedModel):
     """
     Modelo que representa un set dentro de un partido.
     
@@ -193,6 +348,14 @@ class Set(models.Model):
         completed (bool): Indica si el set ha terminado
         team_a_substitutions (int): Sustituciones usadas por equipo A
         team_b_substitutions (int): Sustituciones usadas por equipo B
+        team_a_total_points, team_a_total_aces, team_a_total_blocks,
+        team_a_total_assists (int): Totales de los jugadores del equipo A
+        team_b_total_points, team_b_total_aces, team_b_total_blocks,
+        team_b_total_assists (int): Totales de los jugadores del equipo B
+
+    Los totales por equipo son una copia desnormalizada de la suma de
+    ``PlayerPerformance`` del set; los mantiene ``matches.scoring`` y se
+    pueden verificar con ``manage.py check_scoreboard``.
     """
     
     match = models.ForeignKey(
@@ -224,22 +387,38 @@ class Set(models.Model):
         default=0,
         help_text="Número de sustituciones realizadas por el equipo B"
     )
-
-    def add_points(self, team, points):
-        """
-        Añade puntos al equipo especificado.
-        
-        Args:
-            team (str): 'A' o 'B' indicando el equipo
-            points (int): Cantidad de puntos a añadir
-        """
-        if not self.completed:
-            if team == 'A':
-                self.team_a_points += points
-            elif team == 'B':
-                self.team_b_points += points
-            self.save()
-            self.match.check_set_completion(self)
+    team_a_total_points = models.PositiveIntegerField(
+        default=0,
+        help_text="Puntos sumados por los jugadores del equipo A"
+    )
+    team_a_total_aces = models.PositiveIntegerField(
+        default=0,
+        help_text="Servicios directos del equipo A"
+    )
+    team_a_total_blocks = models.PositiveIntegerField(
+        default=0,
+        help_text="Bloqueos efectivos del equipo A"
+    )
+    team_a_total_assists = models.PositiveIntegerField(
+        default=0,
+        help_text="Asistencias del equipo A"
+    )
+    team_b_total_points = models.PositiveIntegerField(
+        default=0,
+        help_text="Puntos sumados por los jugadores del equipo B"
+    )
+    team_b_total_aces = models.PositiveIntegerField(
+        default=0,
+        help_text="Servicios directos del equipo B"
+    )
+    team_b_total_blocks = models.PositiveIntegerField(
+        default=0,
+        help_text="Bloqueos efectivos del equipo B"
+    )
+    team_b_total_assists = models.PositiveIntegerField(
+        default=0,
+        help_text="Asistencias del equipo B"
+    )
 
     def use_timeout(self, team):
         """
@@ -276,6 +455,7 @@ class Set(models.Model):
         verbose_name = "Set"
         verbose_name_plural = "Sets"
         ordering = ['match', 'set_number']
+        unique_together = [['match', 'set_number']]
 
 
 class PlayerPerformance(models.Model):
@@ -326,4 +506,228 @@ class PlayerPerformance(models.Model):
     class Meta:
         verbose_name = "Rendimiento de Jugador"
         verbose_name_plural = "Rendimientos de Jugadores"
-        ordering = ['set', 'player']
\ No newline at end of file
+        ordering = ['set', 'player']
+        unique_together = [['set', 'player']]
+
+class RallyEvent(models.Model):
+    """
+    Registro inmutable de cada cambio de marcador o de estadísticas.
+
+    La tabla solo admite inserciones: ``PlayerPerformance`` y los puntos de
+    ``Set`` son proyecciones que se mantienen incrementalmente a partir de
+    estos eventos y que pueden reconstruirse en cualquier momento con
+    ``manage.py rebuild_rally_projections``. Una reversión no modifica
+    eventos anteriores, sino que agrega un evento compensatorio con valores
+    negativos.
+
+    Attributes:
+        match (Match): Partido del evento
+        set (Set): Set del evento
+        player (Player): Jugador, o None para ajustes del marcador del set
+        team (str): Equipo al que se atribuye el evento ('A' o 'B')
+        kind (str): Tipo de evento (jugada, reversión o carga inicial)
+        points (int): Variación de puntos del jugador
+        aces (int): Variación de servicios directos
+        assists (int): Variación de asistencias
+        blocks (int): Variación de bloqueos
+        set_points (int): Variación aplicada al marcador del equipo en el set
+        created_at (datetime): Momento en que se registró
+    """
+
+    KIND_CHOICES = [
+        ('rally', 'Jugada'),
+        ('undo', 'Reversión'),
+        ('seed', 'Carga inicial'),
+    ]
+    TEAM_CHOICES = [
+        ('A', 'Equipo A'),
+        ('B', 'Equipo B'),
+    ]
+
+    match = models.ForeignKey(
+        Match,
+        on_delete=models.CASCADE,
+        related_name="rally_events",
+        help_text="Partido al que pertenece el evento"
+    )
+    set = models.ForeignKey(
+        Set,
+        on_delete=models.CASCADE,
+        related_name="rally_events",
+        help_text="Set al que pertenece el evento"
+    )
+    player = models.ForeignKey(
+        Player,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="rally_events",
+        help_text="Jugador del evento (vacío para ajustes del marcador)"
+    )
+    team = models.CharField(
+        max_length=1,
+        choices=TEAM_CHOICES,
+        help_text="Equipo al que se atribuye el evento"
+    )
+    kind = models.CharField(
+        max_length=10,
+        choices=KIND_CHOICES,
+        default='rally',
+        help_text="Tipo de evento"
+    )
+    points = models.IntegerField(
+        default=0,
+        help_text="Variación de puntos del jugador"
+    )
+    aces = models.IntegerField(
+        default=0,
+        help_text="Variación de servicios directos"
+    )
+    assists = models.IntegerField(
+        default=0,
+        help_text="Variación de asistencias"
+    )
+    blocks = models.IntegerField(
+        default=0,
+        help_text="Variación de bloqueos"
+    )
+    set_points = models.IntegerField(
+        default=0,
+        help_text="Variación aplicada al marcador del equipo en el set"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Momento en que se registró el evento"
+    )
+
+    def save(self, *args, **kwargs):
+        """Impide modificar eventos ya registrados."""
+        if not self._state.adding:
+            raise ValueError("Los eventos de jugada no pueden modificarse.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} - Set {self.set_id} - Equipo {self.team}"
+
+    class Meta:
+        verbose_name = "Evento de Jugada"
+        verbose_name_plural = "Eventos de Jugada"
+        ordering = ['id']
+
+
+class Standing(models.Model):
+    """
+    Fila de la tabla de posiciones de un equipo en un torneo.
+
+    Se actualiza de forma incremental cada vez que un partido del torneo
+    finaliza (ver ``matches.standings``), de modo que leer la tabla cuesta
+    una fila por equipo en lugar de recorrer partidos y sets. Se puede
+    reconstruir con ``manage.py rebuild_standings``.
+
+    Attributes:
+        tournament (Tournament): Torneo de la tabla
+        team (Team): Equipo de la fila
+        played (int): Partidos jugados
+        wins (int): Partidos ganados
+        losses (int): Partidos perdidos
+        sets_won (int): Sets ganados
+        sets_lost (int): Sets perdidos
+        points_won (int): Puntos (tantos) a favor
+        points_lost (int): Puntos (tantos) en contra
+        league_points (int): Puntos de la tabla (3-0 o 3-1: 3 y 0; 3-2: 2 y 1)
+    """
+
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name="standings",
+        help_text="Torneo de la tabla de posiciones"
+    )
+    team = models.ForeignKey(
+        Team,
+        on_delete=models.CASCADE,
+        related_name="standings",
+        help_text="Equipo de la fila"
+    )
+    played = models.PositiveIntegerField(default=0, help_text="Partidos jugados")
+    wins = models.PositiveIntegerField(default=0, help_text="Partidos ganados")
+    losses = models.PositiveIntegerField(default=0, help_text="Partidos perdidos")
+    sets_won = models.PositiveIntegerField(default=0, help_text="Sets ganados")
+    sets_lost = models.PositiveIntegerField(default=0, help_text="Sets perdidos")
+    points_won = models.PositiveIntegerField(default=0, help_text="Puntos a favor")
+    points_lost = models.PositiveIntegerField(default=0, help_text="Puntos en contra")
+    league_points = models.PositiveIntegerField(default=0, help_text="Puntos de la tabla")
+
+    @property
+    def set_ratio(self):
+        """Sets ganados sobre perdidos; infinito si no perdió ninguno."""
+        return _ratio(self.sets_won, self.sets_lost)
+
+    @property
+    def points_ratio(self):
+        """Puntos a favor sobre en contra; infinito si no recibió ninguno."""
+        return _ratio(self.points_won, self.points_lost)
+
+    def __str__(self):
+        return f"{self.team_id} - {self.league_points} pts"
+
+    class Meta:
+        verbose_name = "Posición"
+        verbose_name_plural = "Tabla de Posiciones"
+        unique_together = [['tournament', 'team']]
+
+
+def _ratio(won, lost):
+    if lost:
+        return won / lost
+    return float('inf') if won else 0.0
+
+
+class TournamentPlayerStats(models.Model):
+    """
+    Totales de un jugador en un torneo, para las tablas de líderes.
+
+    Se actualiza con incrementos atómicos cada vez que se registra o
+    revierte una jugada (ver ``matches.leaderboards``). Así un ranking lee
+    una fila por jugador, con índice por estadística, en lugar de sumar
+    ``PlayerPerformance`` a través de sets y partidos.
+
+    Attributes:
+        tournament (Tournament): Torneo
+        player (Player): Jugador
+        points (int): Puntos anotados en el torneo
+        aces (int): Servicios directos
+        assists (int): Asistencias
+        blocks (int): Bloqueos
+    """
+
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        related_name="player_stats",
+        help_text="Torneo de los totales"
+    )
+    player = models.ForeignKey(
+        Player,
+        on_delete=models.CASCADE,
+        related_name="tournament_stats",
+        help_text="Jugador de los totales"
+    )
+    points = models.PositiveIntegerField(default=0, help_text="Puntos anotados en el torneo")
+    aces = models.PositiveIntegerField(default=0, help_text="Servicios directos en el torneo")
+    assists = models.PositiveIntegerField(default=0, help_text="Asistencias en el torneo")
+    blocks = models.PositiveIntegerField(default=0, help_text="Bloqueos en el torneo")
+
+    def __str__(self):
+        return f"{self.player_id} - Torneo {self.tournament_id}"
+
+    class Meta:
+        verbose_name = "Totales de Jugador en Torneo"
+        verbose_name_plural = "Totales de Jugadores en Torneos"
+        unique_together = [['tournament', 'player']]
+        indexes = [
+            models.Index(fields=['tournament', '-points', 'player'], name='leader_points_idx'),
+            models.Index(fields=['tournament', '-aces', 'player'], name='leader_aces_idx'),
+            models.Index(fields=['tournament', '-assists', 'player'], name='leader_assists_idx'),
+            models.Index(fields=['tournament', '-blocks', 'player'], name='leader_blocks_idx'),
+        ]
@@ -0,0 +1,210 @@
+# matches/outbound.py
+
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from server_app.metrics import histogram_samples, samples
+
+# Límites superiores (segundos) del histograma de latencia
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+
+
+class UpstreamError(Exception):
+    """La llamada externa falló tras agotar sus reintentos."""
+
+
+class CircuitOpenError(UpstreamError):
+    """El circuito está abierto: la llamada se rechazó sin ir a la red."""
+
+
+class CircuitBreaker:
+    """
+    Corta las llamadas a un servicio externo que está fallando.
+
+    Tras ``failure_threshold`` fallos seguidos el circuito se abre y rechaza
+    las llamadas durante ``reset_timeout`` segundos. Luego deja pasar una
+    llamada de prueba (semiabierto): si funciona se cierra, si no vuelve a
+    abrirse.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """'closed', 'open' o 'half_open'."""
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Indica si se puede intentar una llamada ahora."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self.probing = False
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartido para un servicio externo.
+
+    Reutiliza conexiones (keep-alive) con un pool por host, aplica tiempos
+    de espera estrictos, reintenta errores de red y respuestas 429/5xx con
+    espera exponencial y jitter completo, y se protege con un
+    ``CircuitBreaker``. Lleva métricas de latencia y errores por proceso,
+    que se publican en ``/metrics`` con ``metric_lines``.
+
+    Args:
+        name (str): Nombre del servicio, para métricas y errores
+        timeout (float | tuple): Tiempo de espera (conexión, lectura)
+        max_attempts (int): Intentos por llamada, incluido el primero
+        backoff (float): Espera base entre reintentos, en segundos
+        breaker (CircuitBreaker): Interruptor del servicio
+        pool_size (int): Conexiones reutilizables por host
+    """
+
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, name, timeout, max_attempts=3, backoff=0.5,
+                 breaker=None, pool_size=10):
+        self.name = name
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._metrics = {
+            'calls': 0,
+            'attempts': 0,
+            'retries': 0,
+            'failures': 0,
+            'short_circuited': 0,
+            'latency_sum': 0.0,
+            'latency_buckets': [0] * len(LATENCY_BUCKETS),
+        }
+
+    def get(self, url, **kwargs):
+        """
+        GET con reintentos.
+
+        Returns:
+            requests.Response: La primera respuesta que no deba reintentarse
+            (incluye errores 4xx, que quedan a cargo del llamador)
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto
+            UpstreamError: Si todos los intentos fallaron
+        """
+        self._count('calls')
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                self._count('short_circuited')
+                raise CircuitOpenError(f"{self.name}: circuito abierto")
+            if attempt:
+                self._count('retries')
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+
+            self._count('attempts')
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as e:
+                last_error = f"{type(e).__name__}: {e}"
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    self._observe(time.perf_counter() - started)
+                    self.breaker.record_success()
+                    return response
+                last_error = f"HTTP {response.status_code}"
+            self._observe(time.perf_counter() - started)
+            self.breaker.record_failure()
+
+        self._count('failures')
+        raise UpstreamError(f"{self.name}: {last_error}")
+
+    def metrics(self):
+        """
+        Copia de las métricas acumuladas en este proceso.
+
+        Returns:
+            dict: Contadores de llamadas, intentos, reintentos, fallos y
+            rechazos por circuito abierto; latencia total y por bucket
+            (acumulada, con los límites de ``LATENCY_BUCKETS``) y estado
+            del circuito
+        """
+        with self._lock:
+            data = dict(self._metrics, latency_buckets=list(self._metrics['latency_buckets']))
+        data['circuit'] = self.breaker.state
+        return data
+
+    def metric_lines(self):
+        """Métricas del cliente en formato de texto de Prometheus, para ``/metrics``."""
+        data = self.metrics()
+        service = {'service': self.name}
+        for key, name, documentation in (
+            ('calls', 'outbound_requests_total', "Llamadas al servicio externo"),
+            ('attempts', 'outbound_attempts_total', "Intentos de red, incluidos los reintentos"),
+            ('retries', 'outbound_retries_total', "Reintentos tras un error de red o 429/5xx"),
+            ('failures', 'outbound_failures_total', "Llamadas fallidas tras agotar los intentos"),
+            ('short_circuited', 'outbound_short_circuited_total',
+             "Llamadas rechazadas con el circuito abierto"),
+        ):
+            yield from samples(name, documentation, 'counter', [(service, data[key])])
+        yield from histogram_samples(
+            'outbound_request_duration_seconds', "Latencia de cada intento", service,
+            LATENCY_BUCKETS, data['latency_buckets'], data['latency_sum'])
+        yield from samples(
+            'outbound_circuit_state', "Estado del circuito (1 en el estado actual)", 'gauge',
+            [({**service, 'state': state}, int(state == data['circuit']))
+             for state in ('closed', 'open', 'half_open')])
+
+    def close(self):
+        self.session.close()
+
+    def _count(self, name):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def _observe(self, seconds):
+        with self._lock:
+            self._metrics['latency_sum'] += seconds
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self._metrics['latency_buckets'][index] += 1
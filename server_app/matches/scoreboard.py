@@ -0,0 +1,94 @@
+# matches/scoreboard.py
+
+from django.db.models import Case, F, Sum, Value, When
+from .models import PlayerPerformance
+
+TOTAL_FIELDS = {
+    'total_points': 'points',
+    'total_blocks': 'blocks',
+    'total_aces': 'aces',
+    'total_assists': 'assists',
+}
+
+
+def _team_stats(set_obj, team):
+    return {
+        total: getattr(set_obj, f'team_{team}_total_{stat}')
+        for total, stat in TOTAL_FIELDS.items()
+    }
+
+
+def build_scoreboard(match):
+    """
+    Construye el marcador de un partido: sets, puntos, sets ganados,
+    set actual y estadísticas por equipo en cada set.
+
+    Lee únicamente las filas de ``Set`` del partido: el set actual sale de
+    ``Match.current_set`` y los totales por equipo de las columnas
+    desnormalizadas de cada set.
+
+    Args:
+        match (Match): Partido a representar
+
+    Returns:
+        dict: Marcador con el formato de ``GET /matches/<id>/performance/``
+    """
+    sets = list(match.sets.all().order_by('set_number'))
+
+    current_set = next((set_obj for set_obj in sets if set_obj.pk == match.current_set_id), None)
+    if current_set is None:
+        # Partidos anteriores al puntero: el primer set sin terminar o el último
+        current_set = next((set_obj for set_obj in sets if not set_obj.completed), None)
+        if current_set is None and sets:
+            current_set = sets[-1]
+
+    sets_data = []
+    for set_obj in sets:
+        sets_data.append({
+            'id': set_obj.id,
+            'set_number': set_obj.set_number,
+            'team_a_points': set_obj.team_a_points,
+            'team_b_points': set_obj.team_b_points,
+            'completed': set_obj.completed,
+            'team_a_stats': _team_stats(set_obj, 'a'),
+            'team_b_stats': _team_stats(set_obj, 'b'),
+        })
+
+    return {
+        'match_id': match.id,
+        'status': match.status,
+        'team_a_sets_won': match.team_a_sets_won,
+        'team_b_sets_won': match.team_b_sets_won,
+        'current_set': current_set.set_number if current_set else 1,
+        'sets': sets_data
+    }
+
+
+def raw_team_stats(match_ids):
+    """
+    Suma las estadísticas de cada equipo en cada set directamente desde
+    ``PlayerPerformance``, con una sola consulta agrupada por set y equipo.
+
+    Sirve para verificar las columnas desnormalizadas de ``Set``.
+
+    Args:
+        match_ids (list[int]): IDs de los partidos a agregar
+
+    Returns:
+        dict: ``{(set_id, 'A' | 'B'): {'total_points': ..., ...}}``. Los
+        pares sin rendimientos registrados no aparecen.
+    """
+    rows = PlayerPerformance.objects.filter(
+        set__match_id__in=match_ids
+    ).annotate(
+        team=Case(
+            When(player__team_id=F('set__match__team_a_id'), then=Value('A')),
+            default=Value('B'),
+        )
+    ).values('set_id', 'team').annotate(
+        **{total: Sum(field) for total, field in TOTAL_FIELDS.items()}
+    ).order_by()
+    return {
+        (row['set_id'], row['team']): {total: row[total] for total in TOTAL_FIELDS}
+        for row in rows
+    }
@@ -0,0 +1,435 @@
+# matches/scoring.py
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from teams.models import Player
+from .models import (
+    MAX_CAS_RETRIES, SETS_TO_WIN, ConcurrentUpdateError, Match, PlayerPerformance,
+    RallyEvent, Set, set_winner,
+)
+from .leaderboards import add_stats
+from .standings import record_result
+
+STAT_FIELDS = ('points', 'aces', 'assists', 'blocks')
+
+
+SET_PROJECTION_FIELDS = ['team_a_points', 'team_b_points'] + [
+    f'team_{team}_total_{stat}' for team in ('a', 'b') for stat in STAT_FIELDS
+]
+
+
+def team_total_field(team, stat):
+    """Nombre de la columna desnormalizada de ``Set`` para un equipo y estadística."""
+    return f'team_{team.lower()}_total_{stat}'
+
+
+def _set_updates(team, deltas, set_points, sign=1):
+    """
+    Incrementos atómicos del set para una jugada: marcador del equipo y
+    totales desnormalizados de sus jugadores.
+    """
+    updates = {
+        team_total_field(team, stat): F(team_total_field(team, stat)) + sign * value
+        for stat, value in deltas.items() if value
+    }
+    if set_points:
+        field = f'team_{team.lower()}_points'
+        updates[field] = F(field) + sign * set_points
+    return updates
+
+
+class ScoringError(Exception):
+    """
+    Error de negocio al registrar o revertir una jugada.
+
+    Attributes:
+        status_code (int): Código HTTP sugerido para la respuesta
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _load_set(match_id, set_number):
+    """
+    Obtiene el set junto con los campos del partido necesarios para puntuar,
+    en una sola consulta.
+    """
+    set_instance = Set.objects.select_related('match').only(
+        'id', 'set_number', 'team_a_points', 'team_b_points', 'completed', 'version',
+        'match__id', 'match__status', 'match__team_a', 'match__tournament', 'match__version',
+        'match__team_a_sets_won', 'match__team_b_sets_won',
+    ).filter(match_id=match_id, set_number=set_number).first()
+    if set_instance is None:
+        raise ScoringError("Set not found for this match.", 404)
+    return set_instance
+
+
+def _with_retries(operation, *args, **kwargs):
+    """
+    Ejecuta una operación de puntuación reintentándola si pierde una
+    escritura condicional frente a otro anotador.
+
+    Cada intento corre en su propia transacción, de modo que un conflicto
+    descarta también el evento y los rendimientos ya escritos.
+
+    Raises:
+        ScoringError: 409 si se agotaron los ``MAX_CAS_RETRIES`` intentos
+    """
+    for _ in range(MAX_CAS_RETRIES):
+        try:
+            with transaction.atomic():
+                return operation(*args, **kwargs)
+        except ConcurrentUpdateError:
+            continue
+    raise ScoringError("Concurrent update conflict, please retry.", 409)
+
+
+def _swap_set(set_instance, updates):
+    """Escritura condicional del set; sin cambios no toca la fila."""
+    if updates and not set_instance.compare_and_swap(**updates):
+        raise ConcurrentUpdateError(f"Set {set_instance.pk} changed concurrently")
+
+
+def _player_team(player_id):
+    team_id = Player.objects.filter(pk=player_id).values_list('team_id', flat=True).first()
+    if team_id is None:
+        raise ScoringError("Player not found.")
+    return team_id
+
+
+def _close_set_if_won(set_instance):
+    """
+    Aplica las reglas de fin de set sobre el marcador ya actualizado.
+
+    Marca el set como completado, suma el set ganado al partido y, según
+    corresponda, finaliza el partido o crea el siguiente set.
+
+    Returns:
+        str | None: 'A' o 'B' si el set terminó con esta jugada
+    """
+    winner = set_winner(set_instance.set_number,
+                        set_instance.team_a_points, set_instance.team_b_points)
+    if winner is None:
+        return None
+
+    match = set_instance.match
+    Set.objects.filter(pk=set_instance.pk).update(completed=True, version=F('version') + 1)
+    set_instance.completed = True
+    set_instance.version += 1
+
+    won_field = f'team_{winner.lower()}_sets_won'
+    sets_won = getattr(match, won_field) + 1
+    setattr(match, won_field, sets_won)
+    updates = {won_field: F(won_field) + 1}
+    if sets_won >= SETS_TO_WIN:
+        match.status = 'finished'
+        updates.update(status='finished', end_time=timezone.now())
+    elif match.status == 'live':
+        next_set = Set.objects.create(match_id=match.pk, set_number=set_instance.set_number + 1)
+        match.current_set_id = next_set.pk
+        updates['current_set'] = next_set
+    if not match.compare_and_swap(**updates):
+        raise ConcurrentUpdateError(f"Match {match.pk} changed concurrently")
+    if match.status == 'finished':
+        record_result(match.pk)
+    return winner
+
+
+def apply_rally(match_id, set_number, player_id, points=0, aces=0, assists=0, blocks=0):
+    """
+    Registra una jugada: estadísticas del jugador y puntos del equipo.
+
+    Todo ocurre en una transacción con un número fijo de sentencias:
+    una lectura del set con su partido, una del equipo del jugador, la
+    escritura condicional del set, la inserción del ``RallyEvent``, el
+    incremento atómico (``F()``) del rendimiento y de los totales del
+    jugador en el torneo y, solo cuando el set termina, las escrituras de
+    cierre.
+
+    El set y el partido se actualizan con compare-and-swap sobre
+    ``version``, sin bloquear filas: si otro anotador escribió entre la
+    lectura y la escritura, la transacción se descarta y la jugada se
+    reintenta sobre el marcador nuevo. Así el cierre del set se decide
+    siempre con el marcador real y ningún punto se pierde.
+
+    Args:
+        match_id (int): ID del partido
+        set_number (int): Número del set
+        player_id (int): ID del jugador
+        points, aces, assists, blocks (int): Estadísticas a sumar
+
+    Returns:
+        Set: Set con el marcador resultante
+
+    Raises:
+        ScoringError: Si el set o el jugador no existen, o 409 si la
+            jugada perdió todos sus reintentos
+    """
+    return _with_retries(_apply_rally, match_id, set_number, player_id,
+                         points=points, aces=aces, assists=assists, blocks=blocks)
+
+
+def _apply_rally(match_id, set_number, player_id, **deltas):
+    set_instance = _load_set(match_id, set_number)
+    team = 'A' if _player_team(player_id) == set_instance.match.team_a_id else 'B'
+    set_points = deltas['points'] if not set_instance.completed else 0
+
+    _swap_set(set_instance, _set_updates(team, deltas, set_points))
+
+    RallyEvent.objects.create(
+        match_id=match_id, set_id=set_instance.pk, player_id=player_id,
+        team=team, kind='rally', set_points=set_points, **deltas)
+
+    updated = PlayerPerformance.objects.filter(
+        set_id=set_instance.pk, player_id=player_id
+    ).update(**{field: F(field) + value for field, value in deltas.items()})
+    if not updated:
+        try:
+            PlayerPerformance.objects.create(
+                set_id=set_instance.pk, player_id=player_id, **deltas)
+        except IntegrityError:
+            # Otro anotador creó el rendimiento entre el UPDATE y el INSERT:
+            # se reintenta la jugada completa, que ahora lo encontrará
+            raise ConcurrentUpdateError(
+                f"Performance for player {player_id} in set {set_instance.pk} created concurrently")
+    add_stats(set_instance.match.tournament_id, {player_id: deltas})
+
+    if set_points:
+        field = f'team_{team.lower()}_points'
+        setattr(set_instance, field, getattr(set_instance, field) + set_points)
+        _close_set_if_won(set_instance)
+
+    return set_instance
+
+
+def rollback_rally(match_id, set_number, player_id, points=0, aces=0, assists=0, blocks=0):
+    """
+    Revierte estadísticas y puntos previamente registrados para un jugador.
+
+    La reversión se guarda como un ``RallyEvent`` compensatorio con valores
+    negativos. Si se intenta revertir más de lo registrado la operación se
+    rechaza en lugar de truncar los totales en cero. Como ``apply_rally``,
+    escribe el set de forma condicional y reintenta ante conflictos, y en
+    un set ya cerrado solo revierte las estadísticas, no el marcador.
+
+    Raises:
+        ScoringError: Si el set, el jugador o su rendimiento no existen, si
+            la reversión supera las estadísticas registradas o 409 si se
+            agotaron los reintentos
+    """
+    return _with_retries(_rollback_rally, match_id, set_number, player_id,
+                         points=points, aces=aces, assists=assists, blocks=blocks)
+
+
+def _rollback_rally(match_id, set_number, player_id, **deltas):
+    set_instance = _load_set(match_id, set_number)
+    team = 'A' if _player_team(player_id) == set_instance.match.team_a_id else 'B'
+
+    performances = PlayerPerformance.objects.filter(
+        set_id=set_instance.pk, player_id=player_id)
+    updated = performances.filter(
+        **{f'{name}__gte': value for name, value in deltas.items()}
+    ).update(**{name: F(name) - value for name, value in deltas.items()})
+    if not updated:
+        if performances.exists():
+            raise ScoringError("Rollback exceeds the recorded stats for this player.")
+        raise ScoringError("Player performance not found for this set.", 404)
+    add_stats(set_instance.match.tournament_id,
+              {player_id: {name: -value for name, value in deltas.items()}})
+
+    # Como en apply_rally, el marcador de un set cerrado no cambia: solo se
+    # revierten las estadísticas y el set, los sets ganados y la tabla
+    # quedan como están
+    field = f'team_{team.lower()}_points'
+    set_points = (0 if set_instance.completed
+                  else min(deltas['points'], getattr(set_instance, field)))
+    _swap_set(set_instance, _set_updates(team, deltas, set_points, sign=-1))
+
+    RallyEvent.objects.create(
+        match_id=match_id, set_id=set_instance.pk, player_id=player_id,
+        team=team, kind='undo', set_points=-set_points,
+        **{name: -value for name, value in deltas.items()})
+    setattr(set_instance, field, getattr(set_instance, field) - set_points)
+
+    return set_instance
+
+
+def apply_rallies(match_id, rallies):
+    """
+    Aplica en orden una lista de jugadas de un mismo partido.
+
+    Pensado para las tablets de anotación que acumulan jugadas sin conexión
+    y las reenvían juntas. Las jugadas se reproducen en memoria respetando
+    las mismas reglas que ``apply_rally`` (los puntos sobre un set cerrado no
+    cuentan y al cerrarse un set se abre el siguiente) y luego se persisten
+    con escrituras masivas: un ``bulk_update``/``bulk_create`` para los
+    rendimientos, uno para los sets y, si cambió, una actualización del
+    partido, además de un ``bulk_create`` de los ``RallyEvent``. El costo en
+    consultas no depende de la cantidad de jugadas.
+
+    Args:
+        match_id (int): ID del partido
+        rallies (list[dict]): Jugadas con ``player_id``, ``set_number`` y
+            estadísticas (``points``, ``aces``, ``assists``, ``blocks``)
+
+    Returns:
+        Match: Partido con el marcador resultante
+
+    Raises:
+        ScoringError: Si el partido, algún set o algún jugador no existen.
+            En ese caso no se aplica ninguna jugada.
+    """
+    with transaction.atomic():
+        match = Match.objects.select_for_update().filter(pk=match_id).first()
+        if match is None:
+            raise ScoringError("Match not found.", 404)
+        sets = {
+            set_obj.set_number: set_obj
+            for set_obj in Set.objects.select_for_update().filter(match_id=match_id)
+        }
+        player_ids = {rally['player_id'] for rally in rallies}
+        player_teams = dict(
+            Player.objects.filter(pk__in=player_ids).values_list('id', 'team_id'))
+        if len(player_teams) != len(player_ids):
+            raise ScoringError("Player not found.")
+
+        match_fields = set()
+        dirty_sets = set()
+        performance_deltas = {}
+        events = []
+        for rally in rallies:
+            set_obj = sets.get(rally['set_number'])
+            if set_obj is None:
+                raise ScoringError("Set not found for this match.", 404)
+            stats = {field: rally.get(field, 0) for field in STAT_FIELDS}
+            key = (set_obj.set_number, rally['player_id'])
+            deltas = performance_deltas.setdefault(key, dict.fromkeys(STAT_FIELDS, 0))
+            for field, value in stats.items():
+                deltas[field] += value
+
+            team = 'A' if player_teams[rally['player_id']] == match.team_a_id else 'B'
+            points = stats['points'] if not set_obj.completed else 0
+            events.append((set_obj, RallyEvent(
+                match_id=match.pk, player_id=rally['player_id'], team=team,
+                kind='rally', set_points=points, **stats)))
+            for stat, value in stats.items():
+                field = team_total_field(team, stat)
+                setattr(set_obj, field, getattr(set_obj, field) + value)
+            dirty_sets.add(set_obj.set_number)
+            if not points:
+                continue
+            field = f'team_{team.lower()}_points'
+            setattr(set_obj, field, getattr(set_obj, field) + points)
+
+            winner = set_winner(set_obj.set_number, set_obj.team_a_points, set_obj.team_b_points)
+            if winner is None:
+                continue
+            set_obj.completed = True
+            won_field = f'team_{winner.lower()}_sets_won'
+            setattr(match, won_field, getattr(match, won_field) + 1)
+            match_fields.add(won_field)
+            if getattr(match, won_field) >= SETS_TO_WIN:
+                match.status = 'finished'
+                match.end_time = timezone.now()
+                match_fields.update({'status', 'end_time'})
+            elif match.status == 'live':
+                next_number = set_obj.set_number + 1
+                sets[next_number] = Set(match_id=match.pk, set_number=next_number)
+
+        # Las filas están bloqueadas: basta con avanzar la versión para que
+        # las escrituras condicionales de otros anotadores la vean cambiar.
+        changed_sets = [sets[number] for number in dirty_sets if sets[number].pk is not None]
+        for set_obj in changed_sets:
+            set_obj.version += 1
+        Set.objects.bulk_update(changed_sets, SET_PROJECTION_FIELDS + ['completed', 'version'])
+        new_sets = [set_obj for set_obj in sets.values() if set_obj.pk is None]
+        if new_sets:
+            Set.objects.bulk_create(new_sets)
+            match.current_set = max(new_sets, key=lambda set_obj: set_obj.set_number)
+            match_fields.add('current_set')
+        if match_fields:
+            match.save(update_fields=match_fields)
+        if 'status' in match_fields:
+            record_result(match.pk)
+
+        for set_obj, event in events:
+            event.set_id = set_obj.pk
+        RallyEvent.objects.bulk_create([event for _, event in events])
+
+        set_ids = {number: sets[number].pk for number, _ in performance_deltas}
+        existing = {
+            (performance.set_id, performance.player_id): performance
+            for performance in PlayerPerformance.objects.select_for_update().filter(
+                set_id__in=set_ids.values(), player_id__in=player_ids)
+        }
+        to_create, to_update = [], []
+        for (set_number, player_id), deltas in performance_deltas.items():
+            performance = existing.get((set_ids[set_number], player_id))
+            if performance is None:
+                to_create.append(PlayerPerformance(
+                    set_id=set_ids[set_number], player_id=player_id, **deltas))
+                continue
+            for field, value in deltas.items():
+                setattr(performance, field, getattr(performance, field) + value)
+            to_update.append(performance)
+        PlayerPerformance.objects.bulk_create(to_create)
+        PlayerPerformance.objects.bulk_update(to_update, STAT_FIELDS)
+
+        player_deltas = {}
+        for (_, player_id), deltas in performance_deltas.items():
+            totals = player_deltas.setdefault(player_id, dict.fromkeys(STAT_FIELDS, 0))
+            for field, value in deltas.items():
+                totals[field] += value
+        add_stats(match.tournament_id, player_deltas)
+
+    return match
+
+
+def rebuild_projections(match_ids):
+    """
+    Reconstruye las proyecciones de un grupo de partidos desde sus eventos.
+
+    Recalcula en bloque los ``PlayerPerformance``, los puntos de cada
+    ``Set`` y sus totales por equipo sumando los ``RallyEvent``. El estado de cierre de los sets y los
+    sets ganados no se derivan de los eventos y se conservan.
+
+    Args:
+        match_ids (list[int]): IDs de los partidos a reconstruir
+
+    Returns:
+        int: Cantidad de rendimientos reconstruidos
+    """
+    events = RallyEvent.objects.filter(match_id__in=match_ids)
+    with transaction.atomic():
+        performances = [
+            PlayerPerformance(set_id=row['set_id'], player_id=row['player_id'],
+                              **{field: row[field] for field in STAT_FIELDS})
+            for row in events.filter(player__isnull=False)
+            .values('set_id', 'player_id')
+            .annotate(**{field: Sum(field) for field in STAT_FIELDS})
+            .order_by()
+        ]
+        PlayerPerformance.objects.filter(set__match_id__in=match_ids).delete()
+        PlayerPerformance.objects.bulk_create(performances, batch_size=1000)
+
+        team_totals = {
+            (row['set_id'], row['team']): row
+            for row in events.values('set_id', 'team')
+            .annotate(set_points=Sum('set_points'),
+                      **{stat: Sum(stat) for stat in STAT_FIELDS})
+            .order_by()
+        }
+        sets = list(Set.objects.filter(match_id__in=match_ids).only('id'))
+        for set_obj in sets:
+            for team in ('A', 'B'):
+                totals = team_totals.get((set_obj.pk, team), {})
+                setattr(set_obj, f'team_{team.lower()}_points', totals.get('set_points', 0))
+                for stat in STAT_FIELDS:
+                    setattr(set_obj, team_total_field(team, stat), totals.get(stat, 0))
+            set_obj.version = F('version') + 1
+        Set.objects.bulk_update(sets, SET_PROJECTION_FIELDS + ['version'], batch_size=1000)
+
+    return len(performances)
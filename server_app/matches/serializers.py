@@ -1,7 +1,7 @@
 # matches/serializers.py
 
 from rest_framework import serializers
-from .models import Match, PlayerPerformance, Set
+from .models import Match, PlayerPerformance, Set, Standing, TournamentPlayerStats
 from teams.models import Player, Team
 from tournaments.models import Tournament
 
@@ -116,10 +116,11 @@ class MatchDetailSerializer(serializers.ModelSerializer):
         model = Match
         fields = [
             'id', 'tournament', 'team_a', 'team_b', 'scheduled_date',
-            'location', 'latitude', 'longitude', 'weather_info',
+            'location', 'latitude', 'longitude', 'weather_info', 'weather_status',
             'status', 'start_time', 'end_time',
             'team_a_sets_won', 'team_b_sets_won', 'sets'
         ]
+        read_only_fields = ['weather_info', 'weather_status']
 
 class MatchSerializer(serializers.ModelSerializer):
     """
@@ -167,9 +168,10 @@ class MatchSerializer(serializers.ModelSerializer):
             'id', 'tournament_id', 'tournament', 
             'team_a_id', 'team_b_id', 'team_a', 'team_b',
             'scheduled_date', 'location', 'latitude', 'longitude', 
-            'status', 'start_time', 'end_time',
+            'weather_status', 'status', 'start_time', 'end_time',
             'team_a_sets_won', 'team_b_sets_won'
         ]
+        read_only_fields = ['weather_status']
 
     def validate(self, data):
         """
@@ -186,6 +188,118 @@ class MatchSerializer(serializers.ModelSerializer):
             )
         return data
 
+# Columnas que usa el listado de partidos; ver ``match_list_rows``
+MATCH_LIST_COLUMNS = (
+    'id', 'tournament_id', 'tournament__name',
+    'team_a_id', 'team_a__name', 'team_b_id', 'team_b__name',
+    'scheduled_date', 'location', 'latitude', 'longitude',
+    'weather_status', 'status', 'start_time', 'end_time',
+    'team_a_sets_won', 'team_b_sets_won',
+)
+
+_datetime_field = serializers.DateTimeField()
+
+
+def match_list_rows(rows):
+    """
+    Representación de lectura del listado de partidos, igual a la de
+    ``MatchSerializer`` pero armada directamente desde ``values()``.
+
+    Evita instanciar modelos y los serializers anidados por fila, y no trae
+    columnas que el listado no muestra (como ``weather_info``).
+
+    Args:
+        rows (iterable[dict]): Filas de ``queryset.values(*MATCH_LIST_COLUMNS)``
+
+    Returns:
+        list[dict]: Partidos con el formato de ``MatchSerializer``
+    """
+    datetime = _datetime_field.to_representation
+    return [
+        {
+            'id': row['id'],
+            'tournament': {'id': row['tournament_id'], 'name': row['tournament__name']},
+            'team_a': {'id': row['team_a_id'], 'name': row['team_a__name']},
+            'team_b': {'id': row['team_b_id'], 'name': row['team_b__name']},
+            'scheduled_date': datetime(row['scheduled_date']),
+            'location': row['location'],
+            'latitude': row['latitude'],
+            'longitude': row['longitude'],
+            'weather_status': row['weather_status'],
+            'status': row['status'],
+            'start_time': datetime(row['start_time']),
+            'end_time': datetime(row['end_time']),
+            'team_a_sets_won': row['team_a_sets_won'],
+            'team_b_sets_won': row['team_b_sets_won'],
+        }
+        for row in rows
+    ]
+
+class BulkMatchItemSerializer(serializers.Serializer):
+    """
+    Serializer para un partido dentro de una programación en bloque.
+
+    Los IDs se reciben como enteros: su existencia la valida
+    ``BulkMatchSerializer`` con una sola consulta por modelo.
+    """
+    tournament_id = serializers.IntegerField(help_text="ID del torneo")
+    team_a_id = serializers.IntegerField(help_text="ID del primer equipo")
+    team_b_id = serializers.IntegerField(help_text="ID del segundo equipo")
+    scheduled_date = serializers.DateTimeField()
+    location = serializers.CharField(max_length=255)
+    latitude = serializers.FloatField(required=False, allow_null=True)
+    longitude = serializers.FloatField(required=False, allow_null=True)
+
+    def validate(self, data):
+        if data['team_a_id'] == data['team_b_id']:
+            raise serializers.ValidationError(
+                "Los equipos del partido deben ser diferentes"
+            )
+        return data
+
+class BulkMatchSerializer(serializers.Serializer):
+    """
+    Serializer para programar varios partidos en una sola solicitud.
+
+    Valida todos los equipos y torneos referenciados con una consulta por
+    modelo y devuelve en ``validated_data['matches']`` las filas listas
+    para ``scheduling.create_matches``, con las instancias ya cargadas.
+    Los errores se informan por posición, como en un serializer ``many``.
+    """
+    matches = BulkMatchItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=500,
+        help_text="Partidos a programar"
+    )
+
+    def validate_matches(self, items):
+        teams = Team.objects.in_bulk(
+            {item[field] for item in items for field in ('team_a_id', 'team_b_id')})
+        tournaments = Tournament.objects.in_bulk({item['tournament_id'] for item in items})
+
+        rows, errors = [], []
+        for item in items:
+            item_errors = {}
+            for field, found in (('tournament_id', tournaments),
+                                 ('team_a_id', teams), ('team_b_id', teams)):
+                if item[field] not in found:
+                    item_errors[field] = [f'Clave primaria "{item[field]}" inválida - objeto no existe.']
+            errors.append(item_errors)
+            if not item_errors:
+                rows.append({
+                    'tournament': tournaments[item['tournament_id']],
+                    'team_a': teams[item['team_a_id']],
+                    'team_b': teams[item['team_b_id']],
+                    'scheduled_date': item['scheduled_date'],
+                    'location': item['location'],
+                    'latitude': item.get('latitude'),
+                    'longitude': item.get('longitude'),
+                })
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return rows
+
 class PlayerPerformanceSerializer(serializers.Serializer):
     """
     Serializer para registrar el rendimiento de jugadores.
@@ -194,21 +308,28 @@ class PlayerPerformanceSerializer(serializers.Serializer):
     durante un partido, incluyendo puntos, aces, asistencias y bloqueos.
     """
     player_id = serializers.IntegerField()
-    points = serializers.IntegerField(default=0)
-    aces = serializers.IntegerField(default=0)
-    assists = serializers.IntegerField(default=0)
-    blocks = serializers.IntegerField(default=0)
-    set_number = serializers.IntegerField()
+    points = serializers.IntegerField(default=0, min_value=0)
+    aces = serializers.IntegerField(default=0, min_value=0)
+    assists = serializers.IntegerField(default=0, min_value=0)
+    blocks = serializers.IntegerField(default=0, min_value=0)
+    set_number = serializers.IntegerField(min_value=1)
 
-    def validate(self, data):
-        """
-        Valida que el jugador exista y los valores sean válidos.
-        """
-        try:
-            Player.objects.get(id=data['player_id'])
-        except Player.DoesNotExist:
-            raise serializers.ValidationError("Player not found.")
-        return data
+    # La existencia del jugador se valida en matches.scoring, dentro de la
+    # misma transacción que registra la jugada, para no repetir la consulta.
+
+class RallyBatchSerializer(serializers.Serializer):
+    """
+    Serializer para registrar varias jugadas de un partido en una sola solicitud.
+
+    Las jugadas se aplican en el orden recibido, cada una con el mismo
+    formato que ``PlayerPerformanceSerializer``.
+    """
+    rallies = PlayerPerformanceSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=500,
+        help_text="Jugadas en orden cronológico"
+    )
 
 class SubstitutePlayerSerializer(serializers.Serializer):
     """
@@ -260,4 +381,60 @@ class TimeoutSerializer(serializers.Serializer):
         """
         if value not in ['A', 'B']:
             raise serializers.ValidationError("Invalid team identifier.")
-        return value
\ No newline at end of file
+        return value
+
+class StandingSerializer(serializers.ModelSerializer):
+    """
+    Serializer para una fila de la tabla de posiciones.
+
+    Los cocientes se informan con tres decimales, o null si el equipo no
+    perdió sets (o no recibió puntos).
+    """
+    position = serializers.SerializerMethodField()
+    team = TeamSerializer(read_only=True)
+    set_ratio = serializers.SerializerMethodField()
+    points_ratio = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Standing
+        fields = [
+            'position', 'team', 'played', 'wins', 'losses',
+            'sets_won', 'sets_lost', 'set_ratio',
+            'points_won', 'points_lost', 'points_ratio', 'league_points'
+        ]
+
+    def get_position(self, obj):
+        return self.context['positions'][obj.team_id]
+
+    def get_set_ratio(self, obj):
+        return _finite_ratio(obj.set_ratio)
+
+    def get_points_ratio(self, obj):
+        return _finite_ratio(obj.points_ratio)
+
+
+def _finite_ratio(value):
+    return None if value == float('inf') else round(value, 3)
+
+
+class LeaderboardEntrySerializer(serializers.ModelSerializer):
+    """
+    Serializer para una fila de la tabla de líderes de un torneo.
+
+    ``rank`` lo asigna ``matches.leaderboards.rank``; los jugadores
+    empatados comparten la posición.
+    """
+    rank = serializers.IntegerField(read_only=True)
+    player = serializers.SerializerMethodField()
+    team = serializers.SerializerMethodField()
+
+    class Meta:
+        model = TournamentPlayerStats
+        fields = ['rank', 'player', 'team', 'points', 'aces', 'assists', 'blocks']
+
+    def get_player(self, obj):
+        return {'id': obj.player_id, 'name': obj.player.name,
+                'jersey_number': obj.player.jersey_number}
+
+    def get_team(self, obj):
+        return {'id': obj.player.team_id, 'name': obj.player.team.name}
@@ -0,0 +1,35 @@
+# matches/signals.py
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from teams.models import Player, Team
+from tournaments.models import Tournament
+from . import live
+
+
+@receiver(post_save, sender=Team)
+def team_saved(sender, instance, created, raw=False, **kwargs):
+    # Un equipo nuevo todavía no tiene partidos. Las escrituras masivas del
+    # plantel (TeamSerializer) guardan también el equipo y pasan por aquí.
+    if not created and not raw:
+        live.teams_changed([instance.pk])
+
+
+@receiver(post_save, sender=Player)
+def player_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        live.teams_changed([instance.team_id])
+
+
+@receiver(post_delete, sender=Player)
+def player_deleted(sender, instance, origin=None, **kwargs):
+    # Solo bajas individuales: al borrar el equipo sus partidos se borran
+    # con él, y las bajas desde TeamSerializer ya guardan el equipo
+    if origin is instance:
+        live.teams_changed([instance.team_id])
+
+
+@receiver(post_save, sender=Tournament)
+def tournament_saved(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        live.tournament_changed(instance.pk)
@@ -0,0 +1,124 @@
+# matches/standings.py
+
+from django.db import transaction
+from django.db.models import F, Sum
+from .models import Match, Standing
+from teams.models import Team
+
+def league_points(sets_won, sets_lost):
+    """
+    Puntos de la tabla que recibe un equipo por un partido terminado:
+    3 por ganar 3-0 o 3-1, 2 por ganar 3-2, 1 por perder 2-3 y 0 en los
+    demás casos.
+    """
+    if sets_won > sets_lost:
+        return 3 if sets_lost < 2 else 2
+    return 1 if sets_won == 2 else 0
+
+
+def result_rows(result):
+    """
+    Aportes de un partido terminado a la fila de cada equipo.
+
+    Args:
+        result (dict): ``team_a_id``, ``team_b_id``, ``team_a_sets_won``,
+            ``team_b_sets_won``, ``team_a_points`` y ``team_b_points``
+
+    Returns:
+        list[tuple[int, dict]]: ``(team_id, incrementos)`` de cada equipo
+    """
+    rows = []
+    for own, rival in (('a', 'b'), ('b', 'a')):
+        sets_won = result[f'team_{own}_sets_won']
+        sets_lost = result[f'team_{rival}_sets_won']
+        rows.append((result[f'team_{own}_id'], {
+            'played': 1,
+            'wins': int(sets_won > sets_lost),
+            'losses': int(sets_won < sets_lost),
+            'sets_won': sets_won,
+            'sets_lost': sets_lost,
+            'points_won': result[f'team_{own}_points'] or 0,
+            'points_lost': result[f'team_{rival}_points'] or 0,
+            'league_points': league_points(sets_won, sets_lost),
+        }))
+    return rows
+
+
+def _results(matches):
+    return matches.filter(status='finished').values(
+        'id', 'tournament_id', 'team_a_id', 'team_b_id', 'team_a_sets_won', 'team_b_sets_won',
+    ).annotate(
+        team_a_points=Sum('sets__team_a_points'),
+        team_b_points=Sum('sets__team_b_points'),
+    ).order_by()
+
+
+def record_result(match_id):
+    """
+    Suma a la tabla de su torneo un partido que acaba de finalizar.
+
+    Se llama una sola vez por partido, desde el mismo punto (y la misma
+    transacción) que lo marca como ``finished``. Los incrementos se hacen
+    con ``F()`` para no perder resultados de partidos que terminan a la vez.
+
+    No se revierte: editar o borrar un partido terminado reconstruye la
+    tabla del torneo con ``rebuild`` (lo mismo que hace
+    ``rebuild_rally_projections``). Revertir una jugada no la cambia,
+    porque no modifica el marcador de un set cerrado.
+    """
+    result = _results(Match.objects.filter(pk=match_id)).first()
+    if result is None:
+        return
+    tournament_id = result['tournament_id']
+    rows = result_rows(result)
+    Standing.objects.bulk_create(
+        [Standing(tournament_id=tournament_id, team_id=team_id) for team_id, _ in rows],
+        ignore_conflicts=True)
+    for team_id, deltas in rows:
+        Standing.objects.filter(tournament_id=tournament_id, team_id=team_id).update(
+            **{field: F(field) + value for field, value in deltas.items()})
+
+
+def rebuild(tournament_id):
+    """
+    Reconstruye desde cero la tabla de un torneo a partir de sus partidos
+    finalizados, con una sola consulta agregada.
+
+    Returns:
+        int: Filas de la tabla
+    """
+    standings = {}
+    for result in _results(Match.objects.filter(tournament_id=tournament_id)):
+        for team_id, deltas in result_rows(result):
+            standing = standings.setdefault(
+                team_id, Standing(tournament_id=tournament_id, team_id=team_id))
+            for field, value in deltas.items():
+                setattr(standing, field, getattr(standing, field) + value)
+
+    with transaction.atomic():
+        Standing.objects.filter(tournament_id=tournament_id).delete()
+        Standing.objects.bulk_create(standings.values())
+    return len(standings)
+
+
+def table(tournament):
+    """
+    Tabla de posiciones ordenada: puntos de la tabla, partidos ganados,
+    cociente de sets y cociente de puntos.
+
+    Lee solo las filas de ``Standing`` (más los equipos inscritos que aún
+    no jugaron, con la fila en cero): el costo depende de la cantidad de
+    equipos, no de partidos ni sets.
+
+    Returns:
+        list[Standing]: Filas con ``team`` cargado, de la primera a la última
+    """
+    rows = list(Standing.objects.filter(tournament=tournament).select_related('team'))
+    seen = {row.team_id for row in rows}
+    rows += [
+        Standing(tournament=tournament, team=team)
+        for team in Team.objects.filter(tournaments=tournament).exclude(pk__in=seen)
+    ]
+    rows.sort(key=lambda row: (-row.league_points, -row.wins, -row.set_ratio,
+                               -row.points_ratio, row.team.name))
+    return rows
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+from unittest import mock, skipUnless
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from matches.broadcast import LocalBroker, RedisBroker, encode_event, get_broker
+from matches.tests.test_scoring import ScoringTestMixin
+
+
+def parse_frame(frame):
+    event, data = frame.decode().strip().split('\n')
+    return event.removeprefix('event: '), json.loads(data.removeprefix('data: '))
+
+
+class LocalBrokerTest(TestCase):
+    async def test_publish_serializes_once_for_all_subscribers(self):
+        """Todos los suscriptores reciben los mismos bytes, serializados una vez"""
+        broker = LocalBroker()
+        first = broker.subscribe(1)
+        second = broker.subscribe(1)
+        other_match = broker.subscribe(2)
+
+        delivered = await sync_to_async(broker.publish)(1, 'score', {'team_a_points': 3})
+        await asyncio.sleep(0)
+
+        self.assertEqual(delivered, 2)
+        frame_1 = await asyncio.wait_for(first.get(), 1)
+        frame_2 = await asyncio.wait_for(second.get(), 1)
+        self.assertIs(frame_1, frame_2)
+        self.assertEqual(parse_frame(frame_1), ('score', {'team_a_points': 3}))
+        self.assertTrue(other_match.queue.empty())
+
+    async def test_slow_subscriber_keeps_latest_events(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe(1)
+        subscription.queue = asyncio.Queue(maxsize=2)
+
+        for points in range(5):
+            broker.publish(1, 'score', {'team_a_points': points})
+        await asyncio.sleep(0)
+
+        frames = [parse_frame(subscription.queue.get_nowait())[1] for _ in range(2)]
+        self.assertEqual(frames, [{'team_a_points': 3}, {'team_a_points': 4}])
+
+    async def test_unsubscribe(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe(1)
+        broker.unsubscribe(subscription)
+        self.assertEqual(broker.subscriber_count(1), 0)
+        self.assertEqual(broker.publish(1, 'score', {}), 0)
+
+
+class RedisBrokerTest(TestCase):
+    async def test_messages_from_other_workers_reach_local_subscribers(self):
+        broker = RedisBroker('redis://127.0.0.1:1')
+        with mock.patch.object(broker, '_listen'):
+            subscription = broker.subscribe(7)
+
+        broker._receive({'channel': b'volley:scoreboard:7',
+                         'data': encode_event('score', {'team_a_points': 9})})
+        await asyncio.sleep(0)
+
+        frame = await asyncio.wait_for(subscription.get(), 1)
+        self.assertEqual(parse_frame(frame), ('score', {'team_a_points': 9}))
+
+    def test_unreachable_redis_does_not_fail_the_write(self):
+        broker = RedisBroker('redis://127.0.0.1:1')
+        with self.assertLogs('matches.broadcast', 'WARNING'):
+            self.assertEqual(broker.publish(7, 'score', {}), 0)
+
+    @skipUnless(os.environ.get('REDIS_URL'), "Requiere un servidor Redis (REDIS_URL)")
+    async def test_events_cross_processes(self):
+        listener = RedisBroker(os.environ['REDIS_URL'])
+        publisher = RedisBroker(os.environ['REDIS_URL'])
+        subscription = listener.subscribe(8)
+        try:
+            await asyncio.sleep(0.2)  # el hilo de escucha se suscribe
+            await sync_to_async(publisher.publish)(8, 'status', {'status': 'finished'})
+
+            frame = await asyncio.wait_for(subscription.get(), 5)
+            self.assertEqual(parse_frame(frame), ('status', {'status': 'finished'}))
+        finally:
+            listener.unsubscribe(subscription)
+            listener._listener.stop()
+
+
+class MatchStreamTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches['live'].clear()
+        self.token = Token.objects.create(user=self.user)
+
+    async def test_scoring_publishes_compact_delta(self):
+        """Una jugada registrada publica el delta de marcador del set"""
+        subscription = get_broker().subscribe(self.match.id)
+        try:
+            await sync_to_async(self.patch_rally)()
+            frame = await asyncio.wait_for(subscription.get(), 1)
+        finally:
+            get_broker().unsubscribe(subscription)
+
+        event, payload = parse_frame(frame)
+        self.assertEqual(event, 'score')
+        self.assertEqual(payload['set_number'], 1)
+        self.assertEqual((payload['team_a_points'], payload['team_b_points']), (1, 0))
+        self.assertEqual(payload['status'], 'live')
+
+    def patch_rally(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse('player_performance', kwargs={'match_id': self.match.id}),
+                {'player_id': self.player_a.id, 'set_number': 1, 'points': 1},
+                format='json')
+
+    async def test_stream_requires_token(self):
+        response = await self.async_client.get(
+            reverse('match_stream', kwargs={'match_id': self.match.id}))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        """El stream envía el marcador actual y luego cada delta publicado"""
+        response = await self.async_client.get(
+            reverse('match_stream', kwargs={'match_id': self.match.id}),
+            {'token': self.token.key})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        await anext(stream)  # retry
+        frames = [parse_frame(await anext(stream))]
+        await sync_to_async(get_broker().publish)(
+            self.match.id, 'timeout', {'team': 'A', 'team_a_timeouts': 1})
+        frames.append(parse_frame(await asyncio.wait_for(anext(stream), 1)))
+        # Al desconectarse el cliente, el servidor ASGI cancela la lectura pendiente
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        pending.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await pending
+
+        self.assertEqual(frames[0][0], 'scoreboard')
+        self.assertEqual(frames[0][1]['match_id'], self.match.id)
+        self.assertEqual(frames[1], ('timeout', {'team': 'A', 'team_a_timeouts': 1}))
+        self.assertEqual(get_broker().subscriber_count(self.match.id), 0)
@@ -0,0 +1,103 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from matches.models import Match
+from matches.tests.test_weather import StubOpenMeteo, StubWeatherServerMixin
+from teams.models import Team
+from tournaments.models import Tournament
+
+VENUES = [(-33.45, -70.66), (-33.02, -71.55), (-36.82, -73.05), (-29.90, -71.25)]
+
+
+class BulkMatchCreateTest(StubWeatherServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username="admin", email="admin@example.com", password="secret-pass-123"))
+        self.teams = Team.objects.bulk_create(
+            Team(name=f"Team {i}", gender="M", coach=f"Coach {i}") for i in range(20))
+        self.tournament = Tournament.objects.create(
+            name="Torneo", start_date=timezone.now().date(), end_date=timezone.now().date())
+        self.first_day = (timezone.now() + timedelta(days=2)).replace(
+            hour=9, minute=0, second=0, microsecond=0)
+        self.url = reverse('match_bulk_create')
+
+    def fixture(self, count):
+        """``count`` partidos repartidos en 4 sedes y 2 días"""
+        items = []
+        for i in range(count):
+            latitude, longitude = VENUES[i % len(VENUES)]
+            items.append({
+                'tournament_id': self.tournament.id,
+                'team_a_id': self.teams[i % 10].id,
+                'team_b_id': self.teams[10 + i % 10].id,
+                'scheduled_date': (self.first_day + timedelta(
+                    days=(i // 4) % 2, hours=(i // 8) % 10)).isoformat(),
+                'location': f"Sede {i % len(VENUES)}",
+                'latitude': latitude,
+                'longitude': longitude,
+            })
+        return items
+
+    def post(self, items, execute=True):
+        with self.captureOnCommitCallbacks(execute=execute):
+            return self.client.post(self.url, {'matches': items}, format='json')
+
+    def test_200_matches_with_constant_queries(self):
+        """La validación y la inserción no dependen de la cantidad de partidos"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(self.fixture(200), execute=False)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 200)
+        self.assertEqual(Match.objects.count(), 200)
+        self.assertTrue(all(item['weather_status'] == 'pending' for item in response.data))
+        # Equipos, torneo y los INSERT (sqlite los parte por límite de variables)
+        self.assertLess(len(queries), 15)
+
+    def test_one_upstream_request_per_venue_and_day(self):
+        self.post(self.fixture(200))
+
+        self.assertEqual(len(StubOpenMeteo.requests), len(VENUES) * 2)
+        self.assertEqual(Match.objects.filter(weather_status='ready').count(), 200)
+        match = Match.objects.order_by('pk').first()
+        self.assertEqual(match.weather_info['temperature'], 10.0 + match.scheduled_date.hour)
+        self.assertEqual(match.weather_attempts, 1)
+
+    def test_failed_group_does_not_affect_others(self):
+        StubOpenMeteo.script = [503, 503, 503]
+
+        self.post(self.fixture(8))
+
+        self.assertEqual(Match.objects.filter(weather_status='failed').count(), 1)
+        self.assertEqual(Match.objects.filter(weather_status='ready').count(), 7)
+
+    def test_unknown_ids_reject_the_whole_batch(self):
+        items = self.fixture(3)
+        items[1]['team_b_id'] = 999999
+        items[2]['tournament_id'] = 999999
+
+        response = self.post(items)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['matches']
+        self.assertEqual(errors[0], {})
+        self.assertIn('team_b_id', errors[1])
+        self.assertIn('tournament_id', errors[2])
+        self.assertFalse(Match.objects.exists())
+
+    def test_same_team_on_both_sides_is_rejected(self):
+        items = self.fixture(1)
+        items[0]['team_b_id'] = items[0]['team_a_id']
+
+        response = self.post(items)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Match.objects.exists())
@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+from unittest import mock, skipIf
+from django.db import connection
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase
+from matches import scoring
+from matches.models import MAX_CAS_RETRIES, Set, PlayerPerformance, RallyEvent
+from matches.scoring import apply_rally, ScoringError
+from matches.tests.test_scoring import ScoringTestMixin
+
+logger = logging.getLogger(__name__)
+# Jugadas por segundo que debe sostener la prueba de estrés. Depende de la
+# máquina, así que solo se exige si se define (p. ej. 20 en la de referencia)
+MIN_RALLIES_PER_SECOND = float(os.environ.get('STRESS_MIN_RALLIES_PER_SECOND', '0'))
+
+
+def concurrent_point(set_id, team='B'):
+    """Simula a otro anotador que suma un punto y avanza la versión del set."""
+    field = f'team_{team.lower()}_points'
+    Set.objects.filter(pk=set_id).update(**{field: F(field) + 1}, version=F('version') + 1)
+
+
+class CompareAndSwapTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.set_1 = Set.objects.get(match=self.match, set_number=1)
+
+    def stale_load(self, team='B', times=1):
+        """
+        Devuelve un ``_load_set`` cuyas primeras ``times`` lecturas son
+        anteriores al punto de otro anotador.
+        """
+        stale = [scoring._load_set(self.match.id, 1) for _ in range(times)]
+        concurrent_point(self.set_1.pk, team)
+        load_set = scoring._load_set
+        return mock.patch.object(
+            scoring, '_load_set',
+            side_effect=lambda *args: stale.pop() if stale else load_set(*args))
+
+    def test_conflicting_rally_is_retried_without_losing_points(self):
+        """Si otro anotador escribe entre la lectura y la escritura, la jugada se reintenta"""
+        with self.stale_load() as patched:
+            apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        self.set_1.refresh_from_db()
+        self.assertEqual((self.set_1.team_a_points, self.set_1.team_b_points), (1, 1))
+        self.assertEqual(patched.call_count, 2)
+        self.assertEqual(RallyEvent.objects.filter(match=self.match, kind='rally').count(), 1)
+        self.assertEqual(PlayerPerformance.objects.get(player=self.player_a).points, 1)
+
+    def test_set_closes_once_with_the_real_score(self):
+        """El cierre del set se decide con el marcador releído tras el conflicto"""
+        Set.objects.filter(pk=self.set_1.pk).update(team_a_points=23, team_b_points=10)
+
+        with self.stale_load(team='A'):
+            apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        self.set_1.refresh_from_db()
+        self.match.refresh_from_db()
+        self.assertEqual(self.set_1.team_a_points, 25)
+        self.assertTrue(self.set_1.completed)
+        self.assertEqual(self.match.team_a_sets_won, 1)
+        self.assertEqual(self.match.current_set.set_number, 2)
+
+    def test_retries_are_bounded(self):
+        """Tras MAX_CAS_RETRIES conflictos la jugada se rechaza con 409 sin escribir nada"""
+        with self.stale_load(times=MAX_CAS_RETRIES) as patched:
+            with self.assertRaises(ScoringError) as error:
+                apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        self.assertEqual(error.exception.status_code, 409)
+        self.assertEqual(patched.call_count, MAX_CAS_RETRIES)
+        self.assertFalse(RallyEvent.objects.filter(match=self.match, kind='rally').exists())
+        self.set_1.refresh_from_db()
+        self.assertEqual(self.set_1.team_a_points, 0)
+
+    def test_timeout_does_not_overwrite_score(self):
+        """Registrar un tiempo fuera con un partido leído antes no pisa los sets ganados"""
+        stale = type(self.match).objects.get(pk=self.match.pk)
+        self.score(self.player_a, 25)
+
+        stale.team_a_timeouts += 1
+        stale.save(update_fields=['team_a_timeouts', 'team_b_timeouts'])
+
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.team_a_sets_won, 1)
+
+
+@skipIf(connection.vendor == 'sqlite', "SQLite serializa todas las escrituras de la base")
+class ConcurrentScoringStressTest(ScoringTestMixin, TransactionTestCase):
+    """Dispara jugadas en paralelo contra un mismo set, como varias tablets."""
+
+    workers = 8
+
+    def fire(self, rallies):
+        """
+        Reparte las jugadas entre hilos. Como una tablet, cada hilo reenvía
+        la jugada si el servidor responde 409.
+        """
+        conflicts = []
+        errors = []
+
+        def worker(chunk):
+            try:
+                for player_id in chunk:
+                    while True:
+                        try:
+                            apply_rally(self.match.id, 1, player_id, points=1)
+                            break
+                        except ScoringError as error:
+                            if error.status_code != 409:
+                                raise
+                            conflicts.append(player_id)
+            except Exception as error:  # pragma: no cover - se reporta abajo
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(rallies[index::self.workers],))
+            for index in range(self.workers)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        self.assertEqual(errors, [])
+        return elapsed, conflicts
+
+    def test_parallel_rallies_keep_exact_score(self):
+        """48 jugadas paralelas (24 y 24) dejan el marcador exacto, sin jugadas perdidas"""
+        rallies = [self.player_a.id, self.player_b.id] * 24
+
+        elapsed, conflicts = self.fire(rallies)
+
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual((set_1.team_a_points, set_1.team_b_points), (24, 24))
+        self.assertEqual((set_1.team_a_total_points, set_1.team_b_total_points), (24, 24))
+        self.assertFalse(set_1.completed)
+        self.assertEqual(
+            PlayerPerformance.objects.filter(set=set_1).aggregate(total=Sum('points'))['total'], 48)
+        self.assertEqual(RallyEvent.objects.filter(set=set_1, kind='rally').count(), 48)
+        throughput = len(rallies) / elapsed
+        summary = (f"{throughput:.1f} jugadas/s, "
+                   f"{len(conflicts)} conflictos reintentados en {elapsed:.2f}s")
+        logger.info(summary)
+        if MIN_RALLIES_PER_SECOND:
+            self.assertGreater(throughput, MIN_RALLIES_PER_SECOND, summary)
+
+    def test_parallel_set_point_closes_the_set_once(self):
+        """Con jugadas en paralelo sobre el punto de set, el set se cierra una sola vez"""
+        Set.objects.filter(match=self.match, set_number=1).update(team_a_points=20)
+
+        self.fire([self.player_a.id] * 16)
+
+        self.match.refresh_from_db()
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual(set_1.team_a_points, 25)
+        self.assertTrue(set_1.completed)
+        self.assertEqual(self.match.team_a_sets_won, 1)
+        self.assertEqual(self.match.sets.count(), 2)
+        self.assertEqual(self.match.current_set.set_number, 2)
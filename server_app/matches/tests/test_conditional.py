@@ -0,0 +1,130 @@
+from django.core.cache import caches
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from matches.models import Set
+from matches.tests.test_scoring import ScoringTestMixin
+
+
+class ConditionalGetTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches['live'].clear()
+        self.performance_url = reverse('player_performance', kwargs={'match_id': self.match.id})
+        self.detail_url = reverse('match_detail', kwargs={'pk': self.match.id})
+
+    def patch_rally(self, player):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                self.performance_url,
+                {'player_id': player.id, 'set_number': 1, 'points': 1},
+                format='json')
+
+    def conditional_get(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_scoreboard_answers_304(self):
+        """Con el mismo ETag el marcador responde 304 sin cuerpo"""
+        first = self.client.get(self.performance_url)
+        self.assertTrue(first['ETag'].startswith('"scoreboard-'))
+
+        response = self.conditional_get(self.performance_url, first['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.content, b'')
+
+    def test_rally_changes_the_etag(self):
+        """Una jugada genera una versión nueva del marcador y del detalle"""
+        scoreboard = self.client.get(self.performance_url)
+        detail = self.client.get(self.detail_url)
+
+        self.patch_rally(self.player_a)
+
+        response = self.conditional_get(self.performance_url, scoreboard['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], scoreboard['ETag'])
+        self.assertEqual(response.data['sets'][0]['team_a_points'], 1)
+        response = self.conditional_get(self.detail_url, detail['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['sets'][0]['team_a_points'], 1)
+
+    def test_304_skips_prefetch_and_serialization(self):
+        """Sin caché, el 304 del detalle cuesta solo la consulta de versión"""
+        etag = self.client.get(self.detail_url)['ETag']
+        caches['live'].clear()
+
+        with self.assertNumQueries(1):
+            response = self.conditional_get(self.detail_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            response = self.conditional_get(self.detail_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_timeout_and_substitution_change_the_detail_etag(self):
+        bench = self.player_a.team.players.create(
+            name="Bench A", jersey_number=2, position="CE", is_starter=False)
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('timeout_request', kwargs={'match_id': self.match.id}),
+                {'team': 'A'}, format='json')
+        response = self.conditional_get(self.detail_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('substitute_player', kwargs={'match_id': self.match.id}),
+                {'team': 'A', 'player_in': bench.id, 'player_out': self.player_a.id},
+                format='json')
+        response = self.conditional_get(self.detail_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_matches_outside_the_cache_are_versioned(self):
+        """Un partido terminado no está en caché pero igual responde 304"""
+        Set.objects.filter(match=self.match).update(completed=True)
+        self.match.status = 'finished'
+        self.match.save(update_fields=['status'])
+
+        etag = self.client.get(self.performance_url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.conditional_get(self.performance_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_related_edits_change_the_detail_etag(self):
+        """Editar un jugador, un equipo o el torneo cambia el detalle"""
+        edits = [
+            (reverse('players-detail', kwargs={'pk': self.player_a.id}), {'name': "Nuevo nombre"},
+             lambda data: data['team_a']['players'][0]['name']),
+            (reverse('teams-detail', kwargs={'pk': self.team_b.id}), {'name': "Team B2"},
+             lambda data: data['team_b']['name']),
+            (reverse('tournaments-detail', kwargs={'pk': self.tournament.id}), {'name': "Copa"},
+             lambda data: data['tournament']['name']),
+        ]
+        for url, payload, read in edits:
+            with self.subTest(url=url):
+                etag = self.client.get(self.detail_url)['ETag']
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    edited = self.client.patch(url, payload, format='json')
+                self.assertEqual(edited.status_code, status.HTTP_200_OK)
+
+                response = self.conditional_get(self.detail_url, etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(read(response.data), payload['name'])
+
+    def test_deleting_a_player_changes_the_detail_etag(self):
+        bench = self.player_a.team.players.create(
+            name="Bench A", jersey_number=2, position="CE", is_starter=False)
+        etag = self.client.get(self.detail_url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('players-detail', kwargs={'pk': bench.id}))
+
+        response = self.conditional_get(self.detail_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['team_a']['players']), 1)
@@ -0,0 +1,177 @@
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, time as day_time, timedelta, timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from matches.models import Match
+from matches.scheduling import FixtureError, generate_fixture, round_robin
+from teams.models import Team
+from tournaments.models import Tournament
+
+START = datetime(2025, 3, 1, 9, 0, tzinfo=dt_timezone.utc)
+
+
+class RoundRobinTest(SimpleTestCase):
+    def assert_round_robin(self, teams, rounds, legs=1):
+        pairs = Counter(frozenset(pair) for matches in rounds for pair in matches)
+        self.assertEqual(len(pairs), len(teams) * (len(teams) - 1) // 2)
+        self.assertEqual(set(pairs.values()), {legs})
+        for matches in rounds:
+            playing = [team for pair in matches for team in pair]
+            self.assertEqual(len(playing), len(set(playing)))
+
+    def test_even_and_odd_team_counts(self):
+        rounds = round_robin(range(6))
+        self.assertEqual(len(rounds), 5)
+        self.assert_round_robin(range(6), rounds)
+
+        rounds = round_robin(range(5))
+        self.assertEqual(len(rounds), 5)
+        self.assert_round_robin(range(5), rounds)
+
+    def test_home_games_are_balanced(self):
+        home = Counter(pair[0] for matches in round_robin(range(10)) for pair in matches)
+        self.assertLessEqual(max(home.values()) - min(home.values()), 1)
+
+    def test_double_round_robin_swaps_home(self):
+        rounds = round_robin(range(4), double=True)
+        self.assertEqual(len(rounds), 6)
+        self.assert_round_robin(range(4), rounds, legs=2)
+        self.assertEqual(len({pair for matches in rounds for pair in matches}), 12)
+
+
+class GenerateFixtureTest(SimpleTestCase):
+    def assert_constraints(self, fixture, courts, slot_minutes, rest_minutes):
+        per_slot = Counter(item['scheduled_date'] for item in fixture)
+        self.assertLessEqual(max(per_slot.values()), courts)
+        self.assertEqual(len({(item['scheduled_date'], item['court']) for item in fixture}),
+                         len(fixture))
+
+        by_team = defaultdict(list)
+        for item in fixture:
+            self.assertGreaterEqual(item['scheduled_date'].time(), day_time(9))
+            end = item['scheduled_date'] + timedelta(minutes=slot_minutes)
+            self.assertLessEqual(end.time(), day_time(21))
+            by_team[item['team_a']].append(item['scheduled_date'])
+            by_team[item['team_b']].append(item['scheduled_date'])
+        gap = timedelta(minutes=slot_minutes + rest_minutes)
+        for dates in by_team.values():
+            dates.sort()
+            for previous, following in zip(dates, dates[1:]):
+                self.assertGreaterEqual(following - previous, gap)
+
+    def test_respects_courts_hours_and_rest(self):
+        fixture = generate_fixture(range(12), START, courts=3, min_rest_minutes=120)
+
+        self.assertEqual(len(fixture), 66)
+        self.assert_constraints(fixture, courts=3, slot_minutes=90, rest_minutes=120)
+
+    def test_pools_only_play_within_the_pool(self):
+        fixture = generate_fixture(range(16), START, courts=4, pools=4, double=True)
+
+        self.assertEqual(len(fixture), 4 * 12)
+        pools = defaultdict(set)
+        for item in fixture:
+            pools[item['pool']].update((item['team_a'], item['team_b']))
+        self.assertEqual(sorted(len(teams) for teams in pools.values()), [4, 4, 4, 4])
+        self.assertEqual(len(set().union(*pools.values())), 16)
+
+    def test_100_teams_within_seconds(self):
+        started = time.perf_counter()
+        fixture = generate_fixture(range(100), START, courts=10, min_rest_minutes=30)
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(fixture), 4950)
+        self.assertLess(elapsed, 5)
+        self.assert_constraints(fixture, courts=10, slot_minutes=90, rest_minutes=30)
+
+    def test_fixture_is_sorted_by_date(self):
+        """Con descanso, fechas posteriores pueden ocupar franjas anteriores"""
+        fixture = generate_fixture(range(9), START, courts=2, slot_minutes=120,
+                                   min_rest_minutes=30)
+
+        dates = [item['scheduled_date'] for item in fixture]
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(dates[-1], datetime(2025, 3, 4, 9, 0, tzinfo=dt_timezone.utc))
+        self.assert_constraints(fixture, courts=2, slot_minutes=120, rest_minutes=30)
+
+    def test_invalid_parameters(self):
+        with self.assertRaises(FixtureError):
+            generate_fixture(range(3), START, pools=2)
+        with self.assertRaises(FixtureError):
+            generate_fixture(range(4), START, courts=0)
+        with self.assertRaises(FixtureError):
+            generate_fixture(range(4), START, slot_minutes=90,
+                             day_start=day_time(9), day_end=day_time(10))
+
+
+class TournamentFixtureViewTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username="admin", email="admin@example.com", password="secret-pass-123"))
+        self.tournament = Tournament.objects.create(
+            name="Liga", start_date=START.date(), end_date=START.date() + timedelta(days=30))
+        self.tournament.teams.set(Team.objects.bulk_create(
+            Team(name=f"Team {i}", gender="F", coach=f"Coach {i}") for i in range(10)))
+        self.url = reverse('tournaments-fixture', kwargs={'pk': self.tournament.pk})
+        self.payload = {
+            'start': START.isoformat(),
+            'courts': [{'location': "Cancha 1"}, {'location': "Cancha 2"}],
+            'min_rest_minutes': 60,
+        }
+
+    def test_generates_and_persists_matches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['matches'], 45)
+        matches = Match.objects.filter(tournament=self.tournament)
+        self.assertEqual(matches.count(), 45)
+        self.assertEqual(set(matches.values_list('location', flat=True)), {"Cancha 1", "Cancha 2"})
+        self.assertFalse(matches.exclude(weather_status='skipped').exists())
+
+    def test_rejects_a_second_fixture(self):
+        self.client.post(self.url, self.payload, format='json')
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Match.objects.count(), 45)
+
+    def test_reports_the_real_first_and_last_match(self):
+        self.tournament.teams.set(list(self.tournament.teams.all())[:9])
+        self.payload.update(slot_minutes=120, min_rest_minutes=30)
+
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        dates = Match.objects.filter(tournament=self.tournament).values_list(
+            'scheduled_date', flat=True)
+        self.assertEqual(response.data['first_match'], min(dates))
+        self.assertEqual(response.data['last_match'], max(dates))
+
+    def test_rejects_a_last_match_scheduled_out_of_order(self):
+        # La última fecha del torneo termina el 3, pero un partido de la
+        # anterior queda para la mañana del 4
+        self.tournament.teams.set(list(self.tournament.teams.all())[:9])
+        self.tournament.end_date = date(2025, 3, 3)
+        self.tournament.save()
+        self.payload.update(slot_minutes=120, min_rest_minutes=30)
+
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("2025-03-04", response.data['error'])
+        self.assertFalse(Match.objects.exists())
+
+    def test_rejects_a_fixture_past_the_end_date(self):
+        self.payload['courts'] = [{'location': "Cancha 1"}]
+        self.payload['day_end'] = "11:00"
+        response = self.client.post(self.url, self.payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Match.objects.exists())
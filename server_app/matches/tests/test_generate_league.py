@@ -0,0 +1,74 @@
+from io import StringIO
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from matches.models import Match, PlayerPerformance, Set, Standing, TournamentPlayerStats
+from teams.models import Player, Team
+from tournaments.models import Tournament
+
+SMALL = ('--teams', '8', '--roster', '8', '--seasons', '1', '--division-size', '4',
+         '--live', '1')
+
+
+def generate(*args):
+    call_command('generate_league', *SMALL, *args, stdout=StringIO())
+
+
+def scores(prefix):
+    return list(Set.objects.filter(match__tournament__name__startswith=prefix)
+                .order_by('match_id', 'set_number')
+                .values_list('set_number', 'team_a_points', 'team_b_points', 'completed'))
+
+
+class GenerateLeagueTest(TestCase):
+    def test_generates_round_robin_divisions(self):
+        generate()
+
+        self.assertEqual(Team.objects.count(), 8)
+        self.assertEqual(Player.objects.count(), 64)
+        self.assertEqual(Tournament.objects.count(), 2)
+        # Cuatro equipos por división: seis partidos cada una
+        self.assertEqual(Match.objects.count(), 12)
+        self.assertEqual(Match.objects.filter(status='live').count(), 1)
+        self.assertEqual(Standing.objects.count(), 8)
+        self.assertTrue(TournamentPlayerStats.objects.exists())
+
+        for match in Match.objects.filter(status='finished'):
+            self.assertEqual(max(match.team_a_sets_won, match.team_b_sets_won), 3)
+            self.assertEqual(match.current_set.set_number,
+                             match.team_a_sets_won + match.team_b_sets_won)
+
+    def test_team_totals_match_player_performances(self):
+        generate()
+
+        set_obj = Set.objects.filter(completed=True).first()
+        points = sum(PlayerPerformance.objects.filter(set=set_obj, player__team=set_obj.match.team_a)
+                     .values_list('points', flat=True))
+        self.assertEqual(set_obj.team_a_total_points, points)
+        self.assertLessEqual(points, set_obj.team_a_points)
+
+    def test_same_seed_gives_same_league(self):
+        generate('--prefix', 'Uno')
+        generate('--prefix', 'Dos')
+        generate('--prefix', 'Tres', '--seed', '7')
+
+        self.assertEqual(scores('Uno'), scores('Dos'))
+        self.assertNotEqual(scores('Uno'), scores('Tres'))
+
+    def test_event_log_rebuilds_the_same_projections(self):
+        generate()
+        performances = list(PlayerPerformance.objects.order_by('set_id', 'player_id')
+                             .values_list('set_id', 'player_id', 'points', 'aces', 'assists', 'blocks'))
+        before = scores('Sim')
+
+        call_command('rebuild_rally_projections', '--all', stdout=StringIO())
+
+        self.assertEqual(scores('Sim'), before)
+        self.assertEqual(list(PlayerPerformance.objects.order_by('set_id', 'player_id')
+                              .values_list('set_id', 'player_id', 'points', 'aces', 'assists',
+                                           'blocks')),
+                         performances)
+
+    def test_existing_prefix_is_rejected(self):
+        generate()
+        with self.assertRaises(CommandError):
+            generate()
@@ -0,0 +1,30 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from matches.models import Match, PlayerPerformance, Set
+from matches.scoring import apply_rally
+from matches.tests.test_scoring import ScoringTestMixin
+
+
+class LookupConstraintTest(ScoringTestMixin, TestCase):
+    def test_set_number_is_unique_per_match(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Set.objects.create(match=self.match, set_number=1)
+
+    def test_one_performance_per_player_and_set(self):
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PlayerPerformance.objects.create(set=set_1, player=self.player_a)
+
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+        self.assertEqual(PlayerPerformance.objects.get(set=set_1, player=self.player_a).points, 2)
+
+    def test_explain_command_rolls_back(self):
+        out = StringIO()
+        call_command('explain_hot_queries', '--matches', '30', '--tournaments', '3', stdout=out)
+
+        self.assertIn('Rendimiento por set y jugador', out.getvalue())
+        self.assertEqual(Match.objects.count(), 1)
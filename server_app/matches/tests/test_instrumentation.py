@@ -0,0 +1,102 @@
+import re
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from server_app.metrics import registry
+from server_app.middleware import install
+from matches.tests.test_scoring import ScoringTestMixin
+
+DETAIL_ROUTE = '/api/matches/<int:pk>/'
+
+
+def sample(text, name, **labels):
+    """Valor de una muestra de la exposición de Prometheus."""
+    pairs = ','.join(f'{key}="{value}"' for key, value in labels.items())
+    found = re.search(rf'^{re.escape(name)}\{{{re.escape(pairs)}\}} (\S+)$', text, re.MULTILINE)
+    return float(found.group(1)) if found else None
+
+
+@override_settings(SERVER_TIMING=True)
+class InstrumentationMiddlewareTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches['live'].clear()
+        registry.reset()
+        self.token = Token.objects.create(user=self.user)
+        self.detail_url = reverse('match_detail', kwargs={'pk': self.match.id})
+
+    def test_server_timing_reports_the_request_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.detail_url)
+
+        self.assertGreater(len(queries.captured_queries), 0)
+        self.assertEqual(int(response['X-Query-Count']), len(queries.captured_queries))
+        timing = response['Server-Timing']
+        self.assertIn(f'desc="{len(queries.captured_queries)} queries"', timing)
+        for metric in ('db', 'render', 'app', 'total'):
+            self.assertRegex(timing, rf'\b{metric};dur=\d+\.\d')
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_metrics_expose_histograms_by_route(self):
+        self.client.get(self.detail_url)
+        self.client.get(self.detail_url)
+        self.client.get('/api/no-existe/')
+
+        text = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+
+        labels = {'route': DETAIL_ROUTE, 'method': 'GET', 'status': '200'}
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count', **labels), 2)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_bucket',
+                                **labels, le='+Inf'), 2)
+        self.assertGreater(sample(text, 'http_request_render_duration_seconds_sum', **labels), 0)
+        self.assertGreater(sample(text, 'http_request_db_queries_sum', **labels), 0)
+        self.assertEqual(sample(text, 'http_request_duration_seconds_count',
+                                route='unmatched', method='GET', status='404'), 1)
+        self.assertIn('# TYPE http_request_db_queries histogram', text)
+
+    def test_buckets_are_cumulative(self):
+        registry.observe_request('/r', 'GET', 200, 0.003, 0.001, 0, 4)
+        registry.observe_request('/r', 'GET', 200, 0.3, 0.1, 0, 40)
+
+        text = registry.expose()
+
+        labels = {'route': '/r', 'method': 'GET', 'status': '200'}
+        self.assertEqual(sample(text, 'http_request_db_queries_bucket', **labels, le='3'), 0)
+        self.assertEqual(sample(text, 'http_request_db_queries_bucket', **labels, le='5'), 1)
+        self.assertEqual(sample(text, 'http_request_db_queries_bucket', **labels, le='50'), 2)
+        self.assertEqual(sample(text, 'http_request_db_queries_sum', **labels), 44)
+
+    @override_settings(SERVER_TIMING=False)
+    def test_headers_can_be_disabled(self):
+        response = self.client.get(self.detail_url)
+
+        self.assertNotIn('Server-Timing', response)
+        self.assertNotIn('X-Query-Count', response)
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_metrics_require_a_token_without_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=True)
+    def test_metrics_are_open_with_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    async def test_asgi_requests_are_measured(self):
+        # La conexión de los tests se abrió antes de cargar el middleware;
+        # en producción la instrumenta la señal connection_created
+        install(connection)
+        response = await self.async_client.get(
+            self.detail_url, headers={'Authorization': f'Bearer {self.token.key}'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(int(response['X-Query-Count']), 0)
@@ -0,0 +1,118 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from matches.models import Match, PlayerPerformance, TournamentPlayerStats
+from matches.scoring import apply_rallies, apply_rally, rollback_rally
+from matches.tests.test_scoring import ScoringTestMixin
+from teams.models import Player
+from tournaments.models import Tournament
+
+STATS = ('points', 'aces', 'assists', 'blocks')
+
+
+class TournamentTotalsTest(ScoringTestMixin, TestCase):
+    def raw_totals(self, tournament):
+        return {
+            row['player_id']: {stat: row[stat] for stat in STATS}
+            for row in PlayerPerformance.objects.filter(set__match__tournament=tournament)
+            .values('player_id').annotate(**{stat: Sum(stat) for stat in STATS})
+        }
+
+    def totals(self, tournament):
+        return {
+            row['player_id']: {stat: row[stat] for stat in STATS}
+            for row in TournamentPlayerStats.objects.filter(tournament=tournament)
+            .values('player_id', *STATS)
+        }
+
+    def test_totals_follow_every_scoring_path(self):
+        other = Match.objects.create(
+            tournament=self.tournament, team_a=self.team_a, team_b=self.team_b,
+            scheduled_date=timezone.now(), location="Gimnasio")
+        other.start_match()
+
+        apply_rally(self.match.id, 1, self.player_a.id, points=2, aces=1)
+        apply_rally(self.match.id, 1, self.player_b.id, points=1, blocks=1)
+        rollback_rally(self.match.id, 1, self.player_a.id, points=1)
+        apply_rallies(other.id, [
+            {'player_id': self.player_a.id, 'set_number': 1, 'points': 1, 'assists': 2},
+            {'player_id': self.player_b.id, 'set_number': 1, 'points': 1, 'aces': 1},
+            {'player_id': self.player_a.id, 'set_number': 1, 'points': 1},
+        ])
+
+        self.assertEqual(self.totals(self.tournament), self.raw_totals(self.tournament))
+        self.assertEqual(self.totals(self.tournament)[self.player_a.id],
+                         {'points': 3, 'aces': 1, 'assists': 2, 'blocks': 0})
+
+    def test_other_tournaments_are_separate(self):
+        cup = Tournament.objects.create(
+            name="Copa", start_date=timezone.now().date(), end_date=timezone.now().date())
+        match = Match.objects.create(
+            tournament=cup, team_a=self.team_a, team_b=self.team_b,
+            scheduled_date=timezone.now(), location="Gimnasio")
+        match.start_match()
+
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+        apply_rally(match.id, 1, self.player_a.id, points=4)
+
+        self.assertEqual(self.totals(self.tournament)[self.player_a.id]['points'], 1)
+        self.assertEqual(self.totals(cup)[self.player_a.id]['points'], 4)
+
+    def test_rebuild_projections_restores_totals(self):
+        apply_rally(self.match.id, 1, self.player_a.id, points=3, blocks=2)
+        TournamentPlayerStats.objects.update(points=50, blocks=0)
+
+        call_command('rebuild_rally_projections', '--tournament', str(self.tournament.pk),
+                     stdout=StringIO())
+
+        self.assertEqual(self.totals(self.tournament), self.raw_totals(self.tournament))
+
+
+class LeaderboardEndpointTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        players = Player.objects.bulk_create(
+            Player(team=self.team_a, name=f"Jugador {i}", jersey_number=10 + i,
+                   position="OP", is_starter=False)
+            for i in range(6))
+        # Aces: 10, 8, 8, 8, 5, 0
+        TournamentPlayerStats.objects.bulk_create(
+            TournamentPlayerStats(tournament=self.tournament, player=player, aces=aces, points=1)
+            for player, aces in zip(players, (10, 8, 8, 8, 5, 0)))
+        self.players = players
+
+    def url(self, stat='aces'):
+        return reverse('tournaments-leaderboards',
+                       kwargs={'pk': self.tournament.pk, 'stat': stat})
+
+    def test_ties_share_the_rank_across_pages(self):
+        first = self.client.get(self.url(), {'page_size': 2})
+        second = self.client.get(self.url(), {'page_size': 2, 'page': 2})
+        third = self.client.get(self.url(), {'page_size': 2, 'page': 3})
+
+        self.assertEqual(first.data['count'], 5)
+        ranks = [(row['rank'], row['aces'])
+                 for page in (first, second, third) for row in page.data['results']]
+        self.assertEqual(ranks, [(1, 10), (2, 8), (2, 8), (2, 8), (5, 5)])
+        self.assertEqual(first.data['results'][0]['player']['id'], self.players[0].id)
+        self.assertEqual(first.data['results'][0]['team']['name'], "Team A")
+
+    def test_queries_do_not_depend_on_recorded_rallies(self):
+        with self.assertNumQueries(4):
+            self.client.get(self.url(), {'page_size': 2, 'page': 2})
+
+        apply_rallies(self.match.id, [
+            {'player_id': self.player_a.id, 'set_number': 1, 'points': 1, 'aces': 1}
+        ] * 20)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url(), {'page_size': 2, 'page': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unknown_stat_is_404(self):
+        response = self.client.get(
+            f"/api/tournaments/{self.tournament.pk}/leaderboards/digs/")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
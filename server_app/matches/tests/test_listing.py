@@ -0,0 +1,46 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from matches.models import Match
+from matches.serializers import MatchSerializer
+from matches.tests.test_scoring import ScoringTestMixin
+
+
+class MatchListFastPathTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Match.objects.create(
+            tournament=self.tournament, team_a=self.team_b, team_b=self.team_a,
+            scheduled_date=now + timedelta(days=1), location="Coliseo",
+            latitude=-33.45, longitude=-70.66, weather_status='ready',
+            weather_info={'temperature': 21.5, 'weather_code': 2})
+        Match.objects.create(
+            tournament=self.tournament, team_a=self.team_a, team_b=self.team_b,
+            scheduled_date=now - timedelta(days=3), location="Gimnasio",
+            status='finished', start_time=now - timedelta(days=3),
+            end_time=now - timedelta(days=3, hours=-2), team_a_sets_won=3, team_b_sets_won=1)
+        self.url = reverse('match_list_create')
+
+    def test_output_matches_the_serializer(self):
+        response = self.client.get(self.url, {'page_size': 10})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = MatchSerializer(
+            Match.objects.select_related('team_a', 'team_b', 'tournament'), many=True).data
+        self.assertEqual(response.json()['results'], [dict(row) for row in expected])
+        self.assertNotIn('weather_info', response.json()['results'][0])
+
+    def test_list_costs_count_and_page_queries(self):
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_benchmark_command_runs(self):
+        out = StringIO()
+        call_command('benchmark_match_list', '--page-sizes', '5', '--repeat', '1', stdout=out)
+        self.assertIn('filas/s', out.getvalue())
+        self.assertEqual(Match.objects.count(), 3)
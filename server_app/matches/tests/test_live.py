@@ -0,0 +1,113 @@
+import time
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from matches import live
+from matches.models import Set
+from matches.scoring import apply_rally
+from matches.tests.test_scoring import ScoringTestMixin
+
+
+class LiveScoreboardCacheTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches['live'].clear()
+        self.performance_url = reverse('player_performance', kwargs={'match_id': self.match.id})
+        self.detail_url = reverse('match_detail', kwargs={'pk': self.match.id})
+
+    def patch_rally(self, player, set_number=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                self.performance_url,
+                {'player_id': player.id, 'set_number': set_number, 'points': 1},
+                format='json')
+
+    def test_live_reads_are_served_without_queries(self):
+        """Después de la primera lectura el marcador sale de la caché"""
+        first = self.client.get(self.performance_url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.performance_url)
+        self.assertEqual(first.data, second.data)
+
+    def test_scoring_writes_through(self):
+        """Una jugada actualiza la caché sin esperar a la próxima lectura"""
+        self.patch_rally(self.player_a)
+
+        cached = live.get_scoreboard(self.match.id)
+        self.assertEqual(cached['sets'][0]['team_a_points'], 1)
+        self.assertEqual(cached['sets'][0]['team_a_stats']['total_points'], 1)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.performance_url)
+        self.assertEqual(response.data['sets'][0]['team_a_points'], 1)
+
+    def test_detail_is_invalidated_by_changes(self):
+        self.client.get(self.detail_url)
+        with self.assertNumQueries(0):
+            self.client.get(self.detail_url)
+
+        self.patch_rally(self.player_b)
+
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.data['sets'][0]['team_b_points'], 1)
+
+    def test_substitution_and_timeout_refresh_state(self):
+        bench = self.player_a.team.players.create(
+            name="Bench A", jersey_number=2, position="CE", is_starter=False)
+        self.client.get(self.detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('substitute_player', kwargs={'match_id': self.match.id}),
+                {'team': 'A', 'player_in': bench.id, 'player_out': self.player_a.id},
+                format='json')
+        self.assertIsNone(live.get_detail(self.match.id))
+        self.assertIsNotNone(live.get_scoreboard(self.match.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('timeout_request', kwargs={'match_id': self.match.id}),
+                {'team': 'B'}, format='json')
+        self.assertIsNotNone(live.get_scoreboard(self.match.id))
+
+    def test_finished_match_is_evicted(self):
+        """Al terminar el partido su estado sale de la caché"""
+        for set_number in (1, 2):
+            for _ in range(25):
+                apply_rally(self.match.id, set_number, self.player_a.id, points=1)
+        for _ in range(24):
+            apply_rally(self.match.id, 3, self.player_a.id, points=1)
+        self.client.get(self.performance_url)
+        self.assertIsNotNone(live.get_scoreboard(self.match.id))
+
+        response = self.patch_rally(self.player_a, set_number=3)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(live.get_scoreboard(self.match.id))
+        response = self.client.get(self.performance_url)
+        self.assertEqual(response.data['status'], 'finished')
+        self.assertIsNone(live.get_scoreboard(self.match.id))
+
+    def test_upcoming_matches_are_not_cached(self):
+        Set.objects.filter(match=self.match).delete()
+        self.match.current_set = None
+        self.match.status = 'upcoming'
+        self.match.save()
+
+        self.client.get(self.performance_url)
+
+        self.assertIsNone(live.get_scoreboard(self.match.id))
+
+    @skipUnless(isinstance(caches['live'], LocMemCache), "Solo aplica a la caché en memoria")
+    def test_local_cache_entries_are_short_lived(self):
+        """Sin caché compartida, otro worker sirve un marcador viejo solo unos segundos"""
+        self.client.get(self.performance_url)
+        self.assertIsNotNone(live.get_scoreboard(self.match.id))
+
+        later = time.time() + settings.LIVE_LOCAL_CACHE_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertIsNone(live.get_scoreboard(self.match.id))
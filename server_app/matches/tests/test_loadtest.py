@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+from matches.loadtest import (
+    DETAIL, RALLY, SCOREBOARD, LiveMatch, LoadTest, Recorder, compare, percentile,
+)
+from matches.models import Match, RallyEvent
+
+
+class RecorderTest(SimpleTestCase):
+    def test_percentiles_use_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.50), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_summary_counts_errors_and_queries(self):
+        recorder = Recorder()
+        recorder.record(DETAIL, 200, 0.010, queries=2)
+        recorder.record(DETAIL, 304, 0.020, queries=1)
+        recorder.record(DETAIL, 500, 0.030, queries=4)
+        recorder.record(RALLY, 0, 0.5)
+
+        endpoints, totals = recorder.summary(duration=2)
+
+        self.assertEqual(endpoints[DETAIL]['errors'], 1)
+        self.assertEqual(endpoints[DETAIL]['statuses'], {'200': 1, '304': 1, '500': 1})
+        self.assertEqual(endpoints[DETAIL]['latency_ms']['p50'], 20.0)
+        self.assertEqual(endpoints[DETAIL]['db_queries_per_request'], 2.33)
+        self.assertIsNone(endpoints[RALLY]['db_queries'])
+        self.assertEqual(totals, {'requests': 4, 'errors': 2, 'db_queries': 7,
+                                  'throughput_rps': 2.0})
+
+    def test_compare_reports_p95_change(self):
+        def result(p95, queries):
+            return {'endpoints': {DETAIL: {'latency_ms': {'p95': p95},
+                                           'db_queries_per_request': queries}}}
+
+        self.assertEqual(compare(result(10.0, 3), result(12.5, 2)),
+                         [(DETAIL, 10.0, 12.5, 25.0, 3, 2)])
+
+
+class LiveMatchTest(SimpleTestCase):
+    def test_scoresheet_follows_set_rules(self):
+        match = LiveMatch(Match(pk=1, team_a_id=1, team_b_id=2),
+                          {1: list(range(1, 13)), 2: list(range(13, 25))})
+        self.assertEqual((len(match.court['A']), len(match.bench['A'])), (7, 5))
+
+        for _ in range(25):
+            match.score('A')
+        self.assertEqual((match.set_number, match.points), (2, {'A': 0, 'B': 0}))
+
+        for _ in range(50):
+            match.score('A')
+        self.assertTrue(match.finished)
+        self.assertEqual(match.sets_won, {'A': 3, 'B': 0})
+
+
+# El harness suma las consultas desde X-Query-Count
+@override_settings(SERVER_TIMING=True)
+class LoadTestRunTest(LiveServerTestCase):
+    def test_short_run_drives_real_endpoints(self):
+        results = LoadTest(self.live_server_url, matches=1, spectators=2, duration=1.5,
+                           rally_interval=0.05, poll_interval=0.2).run()
+
+        self.assertEqual(results['totals']['errors'], 0)
+        self.assertGreater(results['totals']['db_queries'], 0)
+        for endpoint in (RALLY, DETAIL, SCOREBOARD):
+            self.assertIn(endpoint, results['endpoints'])
+        rallies = results['endpoints'][RALLY]['requests']
+        self.assertEqual(RallyEvent.objects.filter(kind='rally').count(), rallies)
+        self.assertEqual(Match.objects.get(tournament_id=results['meta']['tournament_id']).status,
+                         'live')
+
+    def test_command_writes_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'carga.json')
+            call_command('load_test', '--base-url', self.live_server_url, '--matches', '1',
+                         '--spectators', '1', '--duration', '0.5', '--rally-interval', '0.05',
+                         '--output', path, stdout=StringIO())
+            with open(path) as handle:
+                results = json.load(handle)
+
+        self.assertEqual(results['meta']['matches'], 1)
+        self.assertIn(RALLY, results['endpoints'])
+        self.assertEqual(set(results['endpoints'][RALLY]['latency_ms']),
+                         {'p50', 'p95', 'p99', 'mean', 'max'})
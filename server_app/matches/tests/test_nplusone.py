@@ -0,0 +1,83 @@
+from django.core.cache import caches
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from server_app import nplusone
+from server_app.nplusone import NPlusOneError, QueryTracker, fingerprint
+from matches.tests.test_scoring import ScoringTestMixin
+from teams.models import Player
+
+
+class FingerprintTest(SimpleTestCase):
+    def test_literals_and_in_lists_are_normalized(self):
+        self.assertEqual(
+            fingerprint('SELECT "a"."id" FROM "a"  WHERE "a"."id" IN (%s, %s, %s) AND x = 10'),
+            fingerprint('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s) AND x = 7'))
+        self.assertEqual(fingerprint("SELECT 1 FROM t WHERE name = 'O''Brien'"),
+                         "SELECT ? FROM t WHERE name = ?")
+
+    def test_identifiers_with_digits_are_kept(self):
+        self.assertIn('"teams_player2"', fingerprint('SELECT * FROM "teams_player2" LIMIT 21'))
+
+    def test_savepoints_are_ignored(self):
+        tracker = QueryTracker(threshold=1)
+        for index in range(3):
+            tracker.add(f'SAVEPOINT "s1_x{index}"')
+        self.assertIsNone(tracker.report('bloque'))
+
+
+@override_settings(NPLUSONE_RAISE=True)
+class DetectTest(ScoringTestMixin, TestCase):
+    def test_loop_over_relation_is_reported_with_its_call_site(self):
+        with self.assertRaises(NPlusOneError) as raised:
+            with nplusone.detect('jugadores', threshold=1):
+                for player in Player.objects.all():
+                    player.team.name
+
+        report = str(raised.exception)
+        self.assertIn('matches/tests/test_nplusone.py', report)
+        self.assertIn('FROM "teams_team"', report)
+
+    def test_select_related_is_not_reported(self):
+        with nplusone.detect('jugadores', threshold=1) as tracker:
+            for player in Player.objects.select_related('team'):
+                player.team.name
+            with transaction.atomic():
+                pass
+        self.assertEqual(tracker.offenders, [])
+
+
+class MiddlewareDetectionTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        caches['live'].clear()
+        self.url = reverse('match_detail', kwargs={'pk': self.match.id})
+
+    @override_settings(NPLUSONE_THRESHOLD=0)
+    def test_requests_fail_in_tests(self):
+        with self.assertRaisesMessage(NPlusOneError, 'GET /api/matches/<int:pk>/'):
+            self.client.get(self.url)
+
+    @override_settings(NPLUSONE_THRESHOLD=0, NPLUSONE_RAISE=False)
+    def test_development_only_logs(self):
+        with self.assertLogs('server_app.nplusone', 'WARNING') as logs:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ejecuciones en', logs.output[0])
+
+    @override_settings(NPLUSONE_ENABLED=False, NPLUSONE_THRESHOLD=0)
+    def test_can_be_disabled(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(NPLUSONE_THRESHOLD=0)
+    def test_single_tests_can_opt_out(self):
+        with nplusone.allow():
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        with nplusone.allow(threshold=100):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @nplusone.allow(threshold=0)
+    def test_raised_threshold_still_fails_above_it(self):
+        with self.assertRaises(NPlusOneError):
+            self.client.get(self.url)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from matches.models import Match
+from matches.tests.test_scoring import ScoringTestMixin
+from teams.models import Player
+
+
+class CursorPaginationTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        # Varios partidos a la misma hora: el cursor debe desempatar por id
+        Match.objects.bulk_create(
+            Match(tournament=self.tournament, team_a=self.team_a, team_b=self.team_b,
+                  scheduled_date=now + timedelta(days=index // 3), location="Gimnasio")
+            for index in range(12))
+        self.url = reverse('match_list_create')
+
+    def walk(self, url, params):
+        pages = [self.client.get(url, params)]
+        while pages[-1].data['next']:
+            pages.append(self.client.get(pages[-1].data['next']))
+        return pages
+
+    def test_cursor_pages_cover_every_match_in_order(self):
+        pages = self.walk(self.url, {'cursor': '', 'page_size': 5})
+
+        ids = [row['id'] for page in pages for row in page.data['results']]
+        expected = list(Match.objects.order_by('-scheduled_date', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertNotIn('count', pages[0].data)
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 4})
+        second = self.client.get(first.data['next'])
+        back = self.client.get(second.data['previous'])
+
+        self.assertEqual(back.data['results'], first.data['results'])
+
+    def test_cursor_page_costs_one_query(self):
+        first = self.client.get(self.url, {'cursor': '', 'page_size': 4})
+        with self.assertNumQueries(1):
+            response = self.client.get(first.data['next'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_count_is_optional(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'cursor': '', 'count': 'true'})
+        self.assertEqual(response.data['count'], 13)
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get(self.url, {'page': 2})
+
+        self.assertEqual(response.data['count'], 13)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertIn('page=3', response.data['next'])
+
+    def test_players_follow_the_requested_ordering(self):
+        Player.objects.bulk_create(
+            Player(team=self.team_a, name=f"Jugador {index:02}", jersey_number=10 + index,
+                   position="OP", is_starter=False)
+            for index in range(12))
+        url = reverse('players-list')
+
+        pages = self.walk(url, {'cursor': '', 'ordering': '-name'})
+
+        names = [row['name'] for page in pages for row in page.data['results']]
+        self.assertEqual(names, list(Player.objects.order_by('-name').values_list('name', flat=True)))
+        self.assertEqual(len(pages[0].data['results']), 10)
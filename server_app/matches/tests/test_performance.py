@@ -0,0 +1,414 @@
+"""
+Suite de regresión de rendimiento: recorre todas las rutas de la API sobre
+datos de tamaño realista (planteles completos, partidos a cinco sets,
+torneos grandes) y falla si una ruta supera su presupuesto de consultas o
+se vuelve mucho más lenta que su línea base.
+
+Los presupuestos de consultas son cotas fijas: no dependen del tamaño de
+los datos, así que un N+1 los rompe de inmediato. Los tiempos se comparan
+con ``performance_baseline.json`` multiplicados por ``PERF_TOLERANCE``
+(por defecto 5) más un margen fijo. Para regenerar la línea base en una
+máquina de referencia:
+
+    PERF_RECORD=1 python manage.py test matches.tests.test_performance
+"""
+
+import json
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from matches import leaderboards, standings
+from matches.models import Match, PlayerPerformance, Set
+from matches.scoring import apply_rally
+from teams.models import Player, Team
+from tournaments.models import Tournament
+from users.authentication import token_cache
+
+BASELINE_PATH = Path(__file__).with_name('performance_baseline.json')
+RECORD = os.environ.get('PERF_RECORD') == '1'
+TOLERANCE = float(os.environ.get('PERF_TOLERANCE', '5'))
+SLACK_MS = 50
+REPEAT = 3
+
+TEAMS = 16
+ROSTER = 14
+POSITIONS = ('CE', 'PR', 'AR', 'OP', 'LI')
+FIVE_SETS = [(25, 20), (22, 25), (25, 18), (23, 25), (15, 12)]
+PASSWORD = 'secret-pass-123'
+
+_recorded = {}
+
+
+def _load_baseline():
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text())
+    return {}
+
+
+class PerformanceFixtureMixin:
+    """
+    Liga de 16 equipos con 14 jugadores cada uno, 40 partidos programados,
+    un partido terminado a cinco sets con estadísticas de todos los
+    jugadores, un partido en vivo y una copa sin calendario.
+    """
+
+    baseline = _load_baseline()
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.user = get_user_model().objects.create_user(
+            username='perf', email='perf@example.com', password=PASSWORD)
+        cls.token = Token.objects.create(user=cls.user)
+
+        cls.teams = Team.objects.bulk_create(
+            Team(name=f"Equipo {index:02}", gender='M', coach=f"Coach {index}",
+                 created_by=cls.user)
+            for index in range(TEAMS + 1))
+        cls.spare_team = cls.teams.pop()
+        players = Player.objects.bulk_create(
+            Player(team=team, name=f"{team.name} #{number}", jersey_number=number,
+                   position=POSITIONS[number % len(POSITIONS)], is_starter=number <= 6)
+            for team in cls.teams + [cls.spare_team] for number in range(1, ROSTER + 1))
+        cls.rosters = {}
+        for player in players:
+            cls.rosters.setdefault(player.team_id, []).append(player)
+
+        cls.tournament = Tournament.objects.create(
+            name="Liga", start_date=now.date(), end_date=(now + timedelta(days=90)).date())
+        cls.tournament.teams.set(cls.teams)
+        Match.objects.bulk_create(
+            Match(tournament=cls.tournament, team_a=cls.teams[index % TEAMS],
+                  team_b=cls.teams[(index + 1) % TEAMS],
+                  scheduled_date=now + timedelta(days=1 + index), location="Gimnasio",
+                  weather_status='skipped')
+            for index in range(40))
+
+        team_a, team_b = cls.teams[0], cls.teams[1]
+        cls.finished = Match.objects.create(
+            tournament=cls.tournament, team_a=team_a, team_b=team_b,
+            scheduled_date=now - timedelta(days=1), location="Gimnasio", status='finished',
+            start_time=now - timedelta(days=1), end_time=now - timedelta(hours=22),
+            team_a_sets_won=3, team_b_sets_won=2, weather_status='skipped')
+        sets = Set.objects.bulk_create(
+            Set(match=cls.finished, set_number=number, team_a_points=a, team_b_points=b,
+                completed=True)
+            for number, (a, b) in enumerate(FIVE_SETS, start=1))
+        Match.objects.filter(pk=cls.finished.pk).update(current_set=sets[-1])
+        PlayerPerformance.objects.bulk_create(
+            PlayerPerformance(set=set_obj, player=player, points=player.jersey_number % 5,
+                              aces=player.jersey_number % 2, assists=1, blocks=number % 3)
+            for number, set_obj in enumerate(sets)
+            for player in cls.rosters[team_a.pk] + cls.rosters[team_b.pk])
+        standings.rebuild(cls.tournament.pk)
+        leaderboards.rebuild(cls.tournament.pk)
+
+        cls.live_match = Match.objects.create(
+            tournament=cls.tournament, team_a=cls.teams[2], team_b=cls.teams[3],
+            scheduled_date=now, location="Gimnasio", weather_status='skipped')
+        cls.live_match.start_match()
+
+        cls.cup = Tournament.objects.create(
+            name="Copa", start_date=now.date(), end_date=(now + timedelta(days=30)).date())
+        cls.cup.teams.set(cls.teams[:8])
+
+    def setUp(self):
+        # En frío: la consulta del token cuenta en cada presupuesto
+        caches['live'].clear()
+        token_cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token.key}')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if RECORD and _recorded:
+            baseline = _load_baseline()
+            baseline.update(_recorded)
+            BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+    def measure(self, name, call, max_queries, repeat=1):
+        """
+        Ejecuta la solicitud, comprueba su presupuesto de consultas y
+        compara su mejor tiempo con la línea base.
+
+        Las solicitudes de lectura se repiten ``repeat`` veces y cuenta la
+        más rápida; las consultas se cuentan en la primera (en frío).
+        """
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = call()
+            timings = [time.perf_counter() - started]
+        # Copia antes de repetir: las solicitudes siguientes vacían el
+        # registro de consultas de la conexión
+        captured = queries.captured_queries
+        for _ in range(repeat - 1):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+
+        self.check_budget(name, response, captured, max_queries, min(timings))
+        return response
+
+    def check_budget(self, name, response, queries, max_queries, elapsed):
+        self.assertLess(response.status_code, 400, f"{name}: {response.status_code}")
+        if max_queries is not None:
+            self.assertLessEqual(
+                len(queries), max_queries,
+                f"{name}: {len(queries)} consultas (máximo {max_queries}):\n"
+                + '\n'.join(query['sql'] for query in queries))
+
+        elapsed_ms = round(elapsed * 1000, 2)
+        if RECORD:
+            _recorded[name] = {'queries': None if queries is None else len(queries),
+                               'ms': elapsed_ms}
+        elif name in self.baseline:
+            limit = self.baseline[name]['ms'] * TOLERANCE + SLACK_MS
+            self.assertLessEqual(
+                elapsed_ms, limit,
+                f"{name}: {elapsed_ms} ms (línea base {self.baseline[name]['ms']} ms)")
+
+    def roster_payload(self, prefix):
+        return [{'name': f"{prefix} {number}", 'jersey_number': number,
+                 'position': POSITIONS[number % len(POSITIONS)], 'is_starter': number <= 6}
+                for number in range(1, ROSTER + 1)]
+
+
+class UserEndpointPerformanceTest(PerformanceFixtureMixin, TestCase):
+    def test_login(self):
+        client = APIClient()
+        self.measure('users.login', lambda: client.post(
+            reverse('api_login'), {'username': 'perf', 'password': PASSWORD}), 2)
+
+    def test_register(self):
+        client = APIClient()
+        self.measure('users.register', lambda: client.post(
+            reverse('api_register'),
+            {'username': 'nuevo', 'password': PASSWORD, 'email': 'nuevo@example.com'}), 7)
+
+    def test_logout(self):
+        self.measure('users.logout', lambda: self.client.post(reverse('api_logout')), 2)
+
+
+class TeamEndpointPerformanceTest(PerformanceFixtureMixin, TestCase):
+    def test_team_list(self):
+        self.measure('teams.list', lambda: self.client.get(
+            reverse('teams-list'), {'page_size': TEAMS}), 4, repeat=REPEAT)
+
+    def test_team_list_cursor(self):
+        self.measure('teams.list_cursor', lambda: self.client.get(
+            reverse('teams-list'), {'page_size': TEAMS, 'cursor': ''}), 3, repeat=REPEAT)
+
+    def test_team_retrieve(self):
+        self.measure('teams.retrieve', lambda: self.client.get(
+            reverse('teams-detail', args=[self.teams[0].pk])), 3, repeat=REPEAT)
+
+    def test_team_create(self):
+        self.measure('teams.create', lambda: self.client.post(
+            reverse('teams-list'),
+            {'name': "Nuevo", 'gender': 'F', 'coach': "Coach",
+             'players': self.roster_payload("Jugadora")}, format='json'), 5)
+
+    def test_team_update(self):
+        team = self.teams[0]
+        players = [{'id': player.pk, 'name': player.name, 'jersey_number': player.jersey_number,
+                    'position': player.position, 'is_starter': player.is_starter}
+                   for player in self.rosters[team.pk]]
+        self.measure('teams.update', lambda: self.client.put(
+            reverse('teams-detail', args=[team.pk]),
+            {'name': team.name, 'gender': 'M', 'coach': "Otro", 'players': players},
+            format='json'), 12)
+
+    def test_team_partial_update(self):
+        self.measure('teams.partial_update', lambda: self.client.patch(
+            reverse('teams-detail', args=[self.teams[0].pk]), {'coach': "Otro"},
+            format='json'), 9)
+
+    def test_team_destroy(self):
+        self.measure('teams.destroy', lambda: self.client.delete(
+            reverse('teams-detail', args=[self.spare_team.pk])), 13)
+
+
+class PlayerEndpointPerformanceTest(PerformanceFixtureMixin, TestCase):
+    def test_player_list(self):
+        self.measure('players.list', lambda: self.client.get(reverse('players-list')),
+                     3, repeat=REPEAT)
+
+    def test_player_list_cursor(self):
+        self.measure('players.list_cursor', lambda: self.client.get(
+            reverse('players-list'), {'cursor': ''}), 2, repeat=REPEAT)
+
+    def test_player_retrieve(self):
+        player = self.rosters[self.teams[0].pk][0]
+        self.measure('players.retrieve', lambda: self.client.get(
+            reverse('players-detail', args=[player.pk])), 2, repeat=REPEAT)
+
+    def test_player_partial_update(self):
+        player = self.rosters[self.teams[0].pk][0]
+        self.measure('players.partial_update', lambda: self.client.patch(
+            reverse('players-detail', args=[player.pk]), {'status': 'Injured'},
+            format='json'), 6)
+
+    def test_player_destroy(self):
+        player = self.rosters[self.spare_team.pk][0]
+        self.measure('players.destroy', lambda: self.client.delete(
+            reverse('players-detail', args=[player.pk])), 8)
+
+
+class TournamentEndpointPerformanceTest(PerformanceFixtureMixin, TestCase):
+    def test_tournament_list(self):
+        self.measure('tournaments.list', lambda: self.client.get(reverse('tournaments-list')),
+                     5, repeat=REPEAT)
+
+    def test_tournament_retrieve(self):
+        self.measure('tournaments.retrieve', lambda: self.client.get(
+            reverse('tournaments-detail', args=[self.tournament.pk])), 4, repeat=REPEAT)
+
+    def test_tournament_teams_list(self):
+        self.measure('tournaments.teams_list', lambda: self.client.get(
+            reverse('tournaments-teams-list', args=[self.tournament.pk])), 4, repeat=REPEAT)
+
+    def test_tournament_create(self):
+        self.measure('tournaments.create', lambda: self.client.post(
+            reverse('tournaments-list'),
+            {'name': "Nacional", 'start_date': '2026-01-01', 'end_date': '2026-03-01',
+             'teams': [team.pk for team in self.teams]}, format='json'), 7)
+
+    def test_tournament_partial_update(self):
+        self.measure('tournaments.partial_update', lambda: self.client.patch(
+            reverse('tournaments-detail', args=[self.tournament.pk]),
+            {'teams': [team.pk for team in self.teams[:12]]}, format='json'), 10)
+
+    def test_tournament_destroy(self):
+        self.measure('tournaments.destroy', lambda: self.client.delete(
+            reverse('tournaments-detail', args=[self.cup.pk])), 7)
+
+    def test_tournament_fixture(self):
+        start = (timezone.now() + timedelta(days=1)).replace(hour=9, minute=0)
+        self.measure('tournaments.fixture', lambda: self.client.post(
+            reverse('tournaments-fixture', args=[self.cup.pk]),
+            {'start': start.isoformat(), 'courts': [{'location': "Gimnasio"},
+                                                    {'location': "Coliseo"}]},
+            format='json'), 7)
+
+    def test_tournament_standings(self):
+        self.measure('tournaments.standings', lambda: self.client.get(
+            reverse('tournaments-standings', args=[self.tournament.pk])), 4, repeat=REPEAT)
+
+    def test_tournament_leaderboards(self):
+        self.measure('tournaments.leaderboards', lambda: self.client.get(
+            reverse('tournaments-leaderboards', kwargs={'pk': self.tournament.pk,
+                                                        'stat': 'points'})),
+            4, repeat=REPEAT)
+
+
+class MatchEndpointPerformanceTest(PerformanceFixtureMixin, TestCase):
+    def match_url(self, name, match):
+        return reverse(name, kwargs={'match_id': match.pk})
+
+    def rally(self, match, team_index=0, set_number=1):
+        team = match.team_a if team_index == 0 else match.team_b
+        return {'player_id': self.rosters[team.pk][0].pk, 'set_number': set_number,
+                'points': 1}
+
+    def test_match_list(self):
+        self.measure('matches.list', lambda: self.client.get(
+            reverse('match_list_create'), {'page_size': 50}), 3, repeat=REPEAT)
+
+    def test_match_list_cursor(self):
+        self.measure('matches.list_cursor', lambda: self.client.get(
+            reverse('match_list_create'), {'page_size': 50, 'cursor': ''}), 2, repeat=REPEAT)
+
+    def test_match_create(self):
+        self.measure('matches.create', lambda: self.client.post(
+            reverse('match_list_create'),
+            {'tournament_id': self.tournament.pk, 'team_a_id': self.teams[4].pk,
+             'team_b_id': self.teams[5].pk, 'scheduled_date': timezone.now().isoformat(),
+             'location': "Gimnasio"}, format='json'), 5)
+
+    def test_match_bulk_create(self):
+        start = timezone.now() + timedelta(days=100)
+        rows = [{'tournament_id': self.tournament.pk,
+                 'team_a_id': self.teams[index % TEAMS].pk,
+                 'team_b_id': self.teams[(index + 3) % TEAMS].pk,
+                 'scheduled_date': (start + timedelta(hours=index)).isoformat(),
+                 'location': "Gimnasio"}
+                for index in range(100)]
+        self.measure('matches.bulk_create', lambda: self.client.post(
+            reverse('match_bulk_create'), {'matches': rows}, format='json'), 8)
+
+    def test_match_detail(self):
+        self.measure('matches.detail', lambda: self.client.get(
+            reverse('match_detail', args=[self.finished.pk])), 8, repeat=REPEAT)
+
+    def test_match_partial_update(self):
+        self.measure('matches.partial_update', lambda: self.client.patch(
+            reverse('match_detail', args=[self.finished.pk]), {'location': "Coliseo"},
+            format='json'), 14)
+
+    def test_match_destroy(self):
+        self.measure('matches.destroy', lambda: self.client.delete(
+            reverse('match_detail', args=[self.finished.pk])), 18)
+
+    def test_match_start(self):
+        upcoming = Match.objects.filter(status='upcoming').first()
+        self.measure('matches.start', lambda: self.client.post(
+            self.match_url('start_match', upcoming)), 4)
+
+    def test_scoreboard(self):
+        self.measure('matches.scoreboard', lambda: self.client.get(
+            self.match_url('player_performance', self.finished)), 4, repeat=REPEAT)
+
+    def test_rally(self):
+        url = self.match_url('player_performance', self.live_match)
+        self.client.patch(url, self.rally(self.live_match), format='json')
+        self.measure('matches.rally', lambda: self.client.patch(
+            url, self.rally(self.live_match), format='json'), 9)
+
+    def test_rally_rollback(self):
+        apply_rally(self.live_match.pk, 1, self.rosters[self.teams[2].pk][0].pk, points=2)
+        self.measure('matches.rally_rollback', lambda: self.client.delete(
+            self.match_url('player_performance', self.live_match),
+            self.rally(self.live_match), format='json'), 9)
+
+    def test_rally_batch(self):
+        rallies = [self.rally(self.live_match, index % 2) for index in range(40)]
+        self.measure('matches.rally_batch', lambda: self.client.post(
+            self.match_url('player_performance_batch', self.live_match),
+            {'rallies': rallies}, format='json'), 16)
+
+    def test_substitution(self):
+        roster = self.rosters[self.teams[2].pk]
+        self.measure('matches.substitute', lambda: self.client.post(
+            self.match_url('substitute_player', self.live_match),
+            {'player_in': roster[10].pk, 'player_out': roster[0].pk, 'team': 'A'},
+            format='json'), 20)
+
+    def test_timeout(self):
+        self.measure('matches.timeout', lambda: self.client.post(
+            self.match_url('timeout_request', self.live_match), {'team': 'B'},
+            format='json'), 4)
+
+    async def test_stream_snapshot(self):
+        # Las consultas del stream corren en otra conexión (sync_to_async):
+        # solo se mide el tiempo hasta el primer marcador, cuyo costo en
+        # consultas ya cubre matches.scoreboard
+        started = time.perf_counter()
+        response = await self.async_client.get(
+            self.match_url('match_stream', self.finished), {'token': self.token.key})
+        stream = aiter(response.streaming_content)
+        await anext(stream)  # retry
+        await anext(stream)  # marcador
+        elapsed = time.perf_counter() - started
+        await stream.aclose()
+        self.check_budget('matches.stream', response, None, None, elapsed)
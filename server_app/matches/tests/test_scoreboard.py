@@ -0,0 +1,110 @@
+from io import StringIO
+from django.db import connection
+from django.core.management import CommandError, call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from matches.models import Match, PlayerPerformance, Set
+from matches.scoreboard import build_scoreboard
+from matches.scoring import apply_rally, rollback_rally
+from matches.tests.test_scoring import ScoringTestMixin
+
+
+class ScoreboardAggregationTest(ScoringTestMixin, TestCase):
+    def play_set(self, set_number, winner, loser, loser_points=10):
+        for _ in range(loser_points):
+            apply_rally(self.match.id, set_number, loser.id, points=1, blocks=1)
+        for _ in range(25):
+            apply_rally(self.match.id, set_number, winner.id, points=1, aces=1)
+
+    def scoreboard_queries(self):
+        match = Match.objects.get(pk=self.match.pk)
+        with CaptureQueriesContext(connection) as queries:
+            scoreboard = build_scoreboard(match)
+        return scoreboard, len(queries)
+
+    def test_totals_match_per_set_aggregates(self):
+        """Las columnas desnormalizadas coinciden con agregar set por set"""
+        self.play_set(1, self.player_a, self.player_b)
+        apply_rally(self.match.id, 2, self.player_b.id, points=1, assists=2)
+
+        scoreboard, _ = self.scoreboard_queries()
+
+        for set_data in scoreboard['sets']:
+            for team, key in ((self.team_a, 'team_a_stats'), (self.team_b, 'team_b_stats')):
+                performances = PlayerPerformance.objects.filter(
+                    set_id=set_data['id'], player__team=team)
+                if not performances.exists():
+                    continue
+                expected = performances.aggregate(
+                    total_points=Sum('points'),
+                    total_blocks=Sum('blocks'),
+                    total_aces=Sum('aces'),
+                    total_assists=Sum('assists')
+                )
+                self.assertEqual(set_data[key], expected)
+        self.assertEqual(scoreboard['current_set'], 2)
+
+    def test_team_without_performances_has_zero_totals(self):
+        """Un equipo sin rendimientos en el set tiene totales 0, no null"""
+        apply_rally(self.match.id, 1, self.player_b.id, points=1, assists=2)
+
+        scoreboard, _ = self.scoreboard_queries()
+
+        set_data = scoreboard['sets'][0]
+        self.assertEqual(set_data['team_a_stats'], {
+            'total_points': 0, 'total_blocks': 0, 'total_aces': 0, 'total_assists': 0})
+        self.assertEqual(set_data['team_b_stats'], {
+            'total_points': 1, 'total_blocks': 0, 'total_aces': 0, 'total_assists': 2})
+
+    def test_query_count_is_constant_in_number_of_sets(self):
+        """Un partido a cinco sets cuesta las mismas consultas que uno recién iniciado"""
+        _, one_set = self.scoreboard_queries()
+
+        self.play_set(1, self.player_a, self.player_b)
+        self.play_set(2, self.player_b, self.player_a)
+        self.play_set(3, self.player_a, self.player_b)
+        self.play_set(4, self.player_b, self.player_a)
+        apply_rally(self.match.id, 5, self.player_a.id, points=1)
+        scoreboard, five_sets = self.scoreboard_queries()
+
+        self.assertEqual(len(scoreboard['sets']), 5)
+        self.assertEqual(one_set, five_sets)
+        self.assertEqual(five_sets, 1)
+
+
+class DenormalizedScoreboardTest(ScoringTestMixin, TestCase):
+    def test_rollback_decrements_team_totals(self):
+        """Revertir una jugada descuenta también los totales del equipo"""
+        apply_rally(self.match.id, 1, self.player_a.id, points=2, aces=1)
+        rollback_rally(self.match.id, 1, self.player_a.id, points=1, aces=1)
+
+        set_obj = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual(set_obj.team_a_total_points, 1)
+        self.assertEqual(set_obj.team_a_total_aces, 0)
+        self.assertEqual(set_obj.team_b_total_points, 0)
+
+    def test_current_set_follows_completed_sets(self):
+        """El puntero al set actual avanza al cerrarse un set"""
+        for _ in range(25):
+            apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.current_set.set_number, 2)
+
+    def test_check_command_detects_and_fixes_drift(self):
+        """check_scoreboard falla ante diferencias y las corrige con --fix"""
+        apply_rally(self.match.id, 1, self.player_b.id, points=1, blocks=1)
+        call_command('check_scoreboard', match=self.match.id, stdout=StringIO())
+
+        Set.objects.filter(match=self.match).update(team_b_total_blocks=5)
+        Match.objects.filter(pk=self.match.pk).update(current_set=None)
+        with self.assertRaises(CommandError):
+            call_command('check_scoreboard', match=self.match.id, stdout=StringIO())
+
+        call_command('check_scoreboard', match=self.match.id, fix=True, stdout=StringIO())
+        set_obj = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual(set_obj.team_b_total_blocks, 1)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.current_set_id, set_obj.pk)
+        call_command('check_scoreboard', match=self.match.id, stdout=StringIO())
@@ -0,0 +1,270 @@
+from io import StringIO
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from teams.models import Team, Player
+from tournaments.models import Tournament
+from django.core.management import call_command
+from matches.models import Match, Set, PlayerPerformance, RallyEvent
+from matches.scoring import apply_rally, apply_rallies, rollback_rally, ScoringError
+
+
+class ScoringTestMixin:
+    def setUp(self):
+        self.client = APIClient()
+        self.user = self._create_user()
+        self.client.force_authenticate(user=self.user)
+
+        self.team_a = Team.objects.create(name="Team A", gender="M", coach="Coach A")
+        self.team_b = Team.objects.create(name="Team B", gender="M", coach="Coach B")
+        self.player_a = Player.objects.create(
+            team=self.team_a, name="Player A", jersey_number=1, position="OP", is_starter=True)
+        self.player_b = Player.objects.create(
+            team=self.team_b, name="Player B", jersey_number=1, position="OP", is_starter=True)
+        self.tournament = Tournament.objects.create(
+            name="Torneo", start_date=timezone.now().date(), end_date=timezone.now().date())
+        self.match = Match.objects.create(
+            tournament=self.tournament,
+            team_a=self.team_a,
+            team_b=self.team_b,
+            scheduled_date=timezone.now(),
+            location="Gimnasio",
+        )
+        self.match.start_match()
+
+    def _create_user(self):
+        from django.contrib.auth import get_user_model
+        return get_user_model().objects.create_user(
+            username="scorer", email="scorer@example.com", password="secret-pass-123")
+
+    def score(self, player, times, set_number=1):
+        for _ in range(times):
+            apply_rally(self.match.id, set_number, player.id, points=1)
+
+
+class ApplyRallyTest(ScoringTestMixin, TestCase):
+    def test_rally_updates_performance_and_set(self):
+        """Una jugada suma estadísticas al jugador y puntos a su equipo"""
+        apply_rally(self.match.id, 1, self.player_b.id, points=1, aces=1)
+        apply_rally(self.match.id, 1, self.player_b.id, points=1, blocks=1)
+
+        performance = PlayerPerformance.objects.get(set__match=self.match, player=self.player_b)
+        self.assertEqual((performance.points, performance.aces, performance.blocks), (2, 1, 1))
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual((set_1.team_a_points, set_1.team_b_points), (0, 2))
+
+    def test_set_completion_creates_next_set(self):
+        """Al llegar a 25 con dos de diferencia se cierra el set y se crea el siguiente"""
+        self.score(self.player_a, 25)
+
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.team_a_sets_won, 1)
+        self.assertTrue(Set.objects.get(match=self.match, set_number=1).completed)
+        self.assertTrue(Set.objects.filter(match=self.match, set_number=2).exists())
+
+    def test_match_finishes_after_three_sets(self):
+        """El partido termina cuando un equipo gana tres sets"""
+        for set_number in (1, 2, 3):
+            self.score(self.player_b, 25, set_number=set_number)
+
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.status, 'finished')
+        self.assertEqual(self.match.team_b_sets_won, 3)
+        self.assertIsNotNone(self.match.end_time)
+        self.assertEqual(self.match.sets.count(), 3)
+
+    def test_points_on_completed_set_are_not_added(self):
+        """Los puntos sobre un set cerrado no cambian el marcador"""
+        self.score(self.player_a, 25)
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual(set_1.team_a_points, 25)
+
+    def test_unknown_set_and_player(self):
+        with self.assertRaises(ScoringError) as ctx:
+            apply_rally(self.match.id, 4, self.player_a.id, points=1)
+        self.assertEqual(ctx.exception.status_code, 404)
+        with self.assertRaises(ScoringError):
+            apply_rally(self.match.id, 1, 99999, points=1)
+
+    def test_rollback_is_a_compensating_event(self):
+        """Revertir agrega un evento negativo y ajusta las proyecciones"""
+        apply_rally(self.match.id, 1, self.player_a.id, points=2, aces=1)
+        rollback_rally(self.match.id, 1, self.player_a.id, points=1, aces=1)
+
+        performance = PlayerPerformance.objects.get(set__match=self.match, player=self.player_a)
+        self.assertEqual((performance.points, performance.aces), (1, 0))
+        self.assertEqual(Set.objects.get(match=self.match, set_number=1).team_a_points, 1)
+        kinds = list(RallyEvent.objects.filter(match=self.match).values_list('kind', 'points'))
+        self.assertEqual(kinds, [('rally', 2), ('undo', -1)])
+
+    def test_rollback_beyond_recorded_stats_is_rejected(self):
+        """Una reversión mayor a lo registrado no trunca los totales: se rechaza"""
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        with self.assertRaises(ScoringError) as ctx:
+            rollback_rally(self.match.id, 1, self.player_a.id, points=3)
+
+        self.assertEqual(ctx.exception.status_code, 400)
+        performance = PlayerPerformance.objects.get(set__match=self.match, player=self.player_a)
+        self.assertEqual(performance.points, 1)
+        self.assertEqual(RallyEvent.objects.filter(kind='undo').count(), 0)
+
+    def test_rollback_on_a_completed_set_keeps_its_score(self):
+        """En un set cerrado la reversión solo corrige estadísticas, como la jugada"""
+        self.score(self.player_a, 25)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.team_a_sets_won, 1)
+
+        rollback_rally(self.match.id, 1, self.player_a.id, points=1)
+
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+        self.assertTrue(set_1.completed)
+        self.assertEqual(set_1.team_a_points, 25)
+        self.assertEqual(set_1.team_a_total_points, 24)
+        self.match.refresh_from_db()
+        self.assertEqual(self.match.team_a_sets_won, 1)
+        performance = PlayerPerformance.objects.get(set=set_1, player=self.player_a)
+        self.assertEqual(performance.points, 24)
+        self.assertEqual(RallyEvent.objects.filter(kind='undo').get().set_points, 0)
+
+    def test_rally_query_count_is_bounded(self):
+        """Una jugada normal usa un número fijo de sentencias"""
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+        # lectura set+partido, equipo del jugador, evento, incremento de
+        # rendimiento, de los totales del torneo y del set, más
+        # SAVEPOINT/RELEASE
+        with self.assertNumQueries(8):
+            apply_rally(self.match.id, 1, self.player_a.id, points=1)
+
+
+class PlayerPerformanceEndpointTest(ScoringTestMixin, TestCase):
+    def test_patch_records_rally(self):
+        url = reverse('player_performance', kwargs={'match_id': self.match.id})
+        data = {'player_id': self.player_a.id, 'set_number': 1, 'points': 1}
+
+        response = self.client.patch(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Set.objects.get(match=self.match, set_number=1).team_a_points, 1)
+
+    def test_patch_query_count_does_not_grow(self):
+        """El costo de la jugada no depende de cuántas se hayan registrado"""
+        url = reverse('player_performance', kwargs={'match_id': self.match.id})
+        data = {'player_id': self.player_a.id, 'set_number': 1, 'points': 1}
+        self.client.patch(url, data, format='json')
+
+        with CaptureQueriesContext(connection) as first:
+            self.client.patch(url, data, format='json')
+        self.score(self.player_b, 10)
+        with CaptureQueriesContext(connection) as later:
+            self.client.patch(url, data, format='json')
+        self.assertLessEqual(len(first), 8)
+        self.assertEqual(len(first), len(later))
+
+    def test_patch_unknown_player(self):
+        url = reverse('player_performance', kwargs={'match_id': self.match.id})
+        response = self.client.patch(url, {'player_id': 99999, 'set_number': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_delete_without_performance(self):
+        url = reverse('player_performance', kwargs={'match_id': self.match.id})
+        data = {'player_id': self.player_a.id, 'set_number': 1, 'points': 1}
+        response = self.client.delete(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RallyBatchEndpointTest(ScoringTestMixin, TestCase):
+    def post_batch(self, rallies):
+        url = reverse('player_performance_batch', kwargs={'match_id': self.match.id})
+        return self.client.post(url, {'rallies': rallies}, format='json')
+
+    def rally(self, player, set_number=1, **stats):
+        return {'player_id': player.id, 'set_number': set_number, 'points': 1, **stats}
+
+    def test_batch_matches_single_rallies(self):
+        """El resultado en bloque es igual al de aplicar las jugadas una por una"""
+        rallies = [self.rally(self.player_a, aces=1)] * 20 + [self.rally(self.player_b)] * 7
+
+        response = self.post_batch(rallies)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        set_1 = response.data['sets'][0]
+        self.assertEqual((set_1['team_a_points'], set_1['team_b_points']), (20, 7))
+        self.assertEqual(set_1['team_a_stats']['total_aces'], 20)
+        performance = PlayerPerformance.objects.get(set__match=self.match, player=self.player_a)
+        self.assertEqual((performance.points, performance.aces), (20, 20))
+
+    def test_batch_crosses_set_boundary(self):
+        """Las jugadas pueden cerrar un set y continuar en el siguiente"""
+        apply_rally(self.match.id, 1, self.player_a.id, points=3)
+        rallies = ([self.rally(self.player_a)] * 23
+                   + [self.rally(self.player_a)]  # sobre el set cerrado: no suma
+                   + [self.rally(self.player_b, set_number=2)] * 4)
+
+        response = self.post_batch(rallies)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['team_a_sets_won'], 1)
+        self.assertEqual(response.data['current_set'], 2)
+        set_1, set_2 = response.data['sets']
+        self.assertEqual((set_1['team_a_points'], set_1['completed']), (25, True))
+        self.assertEqual(set_2['team_b_points'], 4)
+        performance = PlayerPerformance.objects.get(set__set_number=1, player=self.player_a)
+        self.assertEqual(performance.points, 27)
+
+    def test_batch_is_all_or_nothing(self):
+        rallies = [self.rally(self.player_a), self.rally(self.player_a, set_number=3)]
+
+        response = self.post_batch(rallies)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(PlayerPerformance.objects.exists())
+        self.assertEqual(Set.objects.get(match=self.match, set_number=1).team_a_points, 0)
+
+    def test_batch_query_count_does_not_depend_on_rally_count(self):
+        """Reenviar 50 jugadas cuesta lo mismo que reenviar 5"""
+        apply_rallies(self.match.id, [self.rally(self.player_a), self.rally(self.player_b)])
+        with CaptureQueriesContext(connection) as few:
+            apply_rallies(self.match.id, [self.rally(self.player_a)] * 3
+                          + [self.rally(self.player_b)] * 2)
+        with CaptureQueriesContext(connection) as many:
+            apply_rallies(self.match.id,
+                          [self.rally(self.player_b), self.rally(self.player_a)] * 25)
+        self.assertEqual(len(few), len(many))
+        self.assertLessEqual(len(many), 11)
+
+
+class RallyProjectionRebuildTest(ScoringTestMixin, TestCase):
+    def test_rebuild_restores_projections(self):
+        """Las proyecciones se reconstruyen idénticas desde los eventos"""
+        apply_rally(self.match.id, 1, self.player_a.id, points=1, aces=1)
+        apply_rallies(self.match.id, [
+            {'player_id': self.player_b.id, 'set_number': 1, 'points': 1, 'blocks': 1},
+            {'player_id': self.player_a.id, 'set_number': 1, 'points': 1, 'assists': 2},
+        ])
+        rollback_rally(self.match.id, 1, self.player_a.id, assists=1)
+        expected = list(PlayerPerformance.objects.order_by('player_id').values(
+            'player_id', 'points', 'aces', 'assists', 'blocks'))
+
+        PlayerPerformance.objects.update(points=99, aces=99, assists=99, blocks=99)
+        Set.objects.update(team_a_points=0, team_b_points=0)
+        call_command('rebuild_rally_projections', '--match', str(self.match.id), stdout=StringIO())
+
+        rebuilt = list(PlayerPerformance.objects.order_by('player_id').values(
+            'player_id', 'points', 'aces', 'assists', 'blocks'))
+        self.assertEqual(rebuilt, expected)
+        set_1 = Set.objects.get(match=self.match, set_number=1)
+        self.assertEqual((set_1.team_a_points, set_1.team_b_points), (2, 1))
+
+    def test_events_are_append_only(self):
+        apply_rally(self.match.id, 1, self.player_a.id, points=1)
+        event = RallyEvent.objects.get()
+        event.points = 5
+        with self.assertRaises(ValueError):
+            event.save()
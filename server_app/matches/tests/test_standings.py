@@ -0,0 +1,136 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from matches.models import Match, Standing
+from matches.scoring import apply_rallies
+from matches.standings import league_points, rebuild
+from matches.tests.test_scoring import ScoringTestMixin
+from teams.models import Team
+
+
+class StandingsTest(ScoringTestMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.tournament.teams.set([self.team_a, self.team_b])
+        self.url = reverse('tournaments-standings', kwargs={'pk': self.tournament.pk})
+
+    def play_set(self, set_number, winner, loser_points=0, match=None):
+        match = match or self.match
+        loser = self.player_b if winner == self.player_a else self.player_a
+        winning_points = 15 if set_number == 5 else 25
+        rallies = [{'player_id': loser.id, 'set_number': set_number, 'points': 1}] * loser_points
+        rallies += [{'player_id': winner.id, 'set_number': set_number, 'points': 1}] * winning_points
+        apply_rallies(match.id, rallies)
+
+    def row(self, team):
+        return Standing.objects.get(tournament=self.tournament, team=team)
+
+    def test_league_points(self):
+        self.assertEqual([league_points(3, 0), league_points(3, 1), league_points(3, 2)], [3, 3, 2])
+        self.assertEqual([league_points(0, 3), league_points(1, 3), league_points(2, 3)], [0, 0, 1])
+
+    def test_finished_match_updates_the_table(self):
+        for set_number in (1, 2, 3):
+            self.play_set(set_number, self.player_a, loser_points=20)
+
+        winner, loser = self.row(self.team_a), self.row(self.team_b)
+        self.assertEqual((winner.played, winner.wins, winner.losses), (1, 1, 0))
+        self.assertEqual((winner.sets_won, winner.sets_lost), (3, 0))
+        self.assertEqual((winner.points_won, winner.points_lost), (75, 60))
+        self.assertEqual((winner.league_points, loser.league_points), (3, 0))
+        self.assertEqual((loser.wins, loser.losses, loser.points_won), (0, 1, 60))
+
+    def test_five_set_match_splits_league_points(self):
+        self.play_set(1, self.player_a)
+        self.play_set(2, self.player_b)
+        self.play_set(3, self.player_a)
+        self.play_set(4, self.player_b)
+        self.assertFalse(Standing.objects.exists())
+        self.play_set(5, self.player_b, loser_points=10)
+
+        self.assertEqual(self.row(self.team_b).league_points, 2)
+        self.assertEqual(self.row(self.team_a).league_points, 1)
+        self.assertEqual(self.row(self.team_a).sets_won, 2)
+
+    def test_rebuild_matches_incremental_table(self):
+        for set_number in (1, 2, 3):
+            self.play_set(set_number, self.player_b, loser_points=5)
+        expected = list(Standing.objects.order_by('team_id').values())
+
+        Standing.objects.update(wins=7, league_points=99)
+        out = StringIO()
+        call_command('rebuild_standings', '--tournament', str(self.tournament.pk), stdout=out)
+
+        self.assertEqual(list(Standing.objects.order_by('team_id').values('team_id', 'wins')),
+                         [{'team_id': row['team_id'], 'wins': row['wins']} for row in expected])
+        self.assertEqual(self.row(self.team_b).league_points, 3)
+        self.assertIn("2 filas", out.getvalue())
+
+    def test_editing_a_finished_match_rebuilds_the_table(self):
+        for set_number in (1, 2, 3):
+            self.play_set(set_number, self.player_a)
+        detail = reverse('match_detail', kwargs={'pk': self.match.pk})
+
+        response = self.client.patch(detail, {'team_a_sets_won': 2, 'team_b_sets_won': 3},
+                                     format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((self.row(self.team_a).league_points, self.row(self.team_b).league_points),
+                         (1, 2))
+        self.assertEqual(self.row(self.team_a).played, 1)
+
+        self.client.patch(detail, {'status': 'live'}, format='json')
+        self.assertFalse(Standing.objects.exists())
+
+    def test_deleting_a_finished_match_rebuilds_the_table(self):
+        for set_number in (1, 2, 3):
+            self.play_set(set_number, self.player_a)
+
+        response = self.client.delete(reverse('match_detail', kwargs={'pk': self.match.pk}))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Standing.objects.exists())
+
+    def test_rebuild_rally_projections_rebuilds_the_table(self):
+        for set_number in (1, 2, 3):
+            self.play_set(set_number, self.player_a, loser_points=20)
+        self.match.sets.filter(set_number=1).update(team_a_points=0, team_b_points=0)
+        Standing.objects.update(points_won=0, league_points=99)
+
+        call_command('rebuild_rally_projections', '--match', str(self.match.pk), stdout=StringIO())
+
+        winner = self.row(self.team_a)
+        self.assertEqual((winner.points_won, winner.points_lost), (75, 60))
+        self.assertEqual(winner.league_points, 3)
+
+    def test_endpoint_orders_teams_with_constant_queries(self):
+        idle = Team.objects.create(name="Team C", gender="M", coach="Coach C")
+        self.tournament.teams.add(idle)
+        for set_number in (1, 2, 3):
+            self.play_set(set_number, self.player_b)
+
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['team']['name'] for row in response.data],
+                         ["Team B", "Team A", "Team C"])
+        self.assertEqual(response.data[0]['position'], 1)
+        self.assertIsNone(response.data[0]['set_ratio'])
+        self.assertEqual(response.data[1]['set_ratio'], 0)
+        self.assertEqual(response.data[2]['played'], 0)
+
+        # Más partidos no agregan consultas
+        for _ in range(3):
+            match = Match.objects.create(
+                tournament=self.tournament, team_a=self.team_a, team_b=self.team_b,
+                scheduled_date=timezone.now(), location="Gimnasio")
+            match.start_match()
+            for set_number in (1, 2, 3):
+                self.play_set(set_number, self.player_a, match=match)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data[0]['team']['name'], "Team A")
+        self.assertEqual(rebuild(self.tournament.pk), 2)
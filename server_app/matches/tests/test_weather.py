@@ -0,0 +1,383 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from urllib.parse import parse_qs, urlparse
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from matches import weather
+from matches.models import Match
+from matches.tests.test_instrumentation import sample
+from teams.models import Team
+from tournaments.models import Tournament
+
+
+class StubOpenMeteo(BaseHTTPRequestHandler):
+    """
+    Servidor local que imita a open-meteo. ``script`` define las respuestas
+    en orden (código HTTP o segundos de demora); luego responde 200.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    script = []
+    requests = []
+    clients = []
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        type(self).requests.append(query)
+        type(self).clients.append(self.client_address)
+        step = type(self).script.pop(0) if type(self).script else 200
+        if isinstance(step, float):
+            time.sleep(step)
+            step = 200
+        if step != 200:
+            self.send_response(step)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        day = query['start_date'][0]
+        body = json.dumps({'hourly': {
+            'time': [f"{day}T{hour:02d}:00" for hour in range(24)],
+            'temperature_2m': [10.0 + hour for hour in range(24)],
+            'weathercode': [hour % 4 for hour in range(24)],
+        }}).encode()
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubWeatherServerMixin:
+    """Levanta ``StubOpenMeteo`` y apunta ``WEATHER_API_URL`` a él."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubOpenMeteo)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.weather_settings = override_settings(
+            WEATHER_API_URL=f'http://127.0.0.1:{cls.server.server_port}/v1/forecast',
+            WEATHER_JOB_RUNNER='matches.weather.InlineRunner',
+            WEATHER_TIMEOUT=(0.5, 0.3),
+            WEATHER_RETRY_BACKOFF=0,
+        )
+        cls.weather_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.weather_settings.disable()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        super().setUp()
+        StubOpenMeteo.script = []
+        StubOpenMeteo.requests = []
+        StubOpenMeteo.clients = []
+        caches['weather'].clear()
+        weather._runner = None
+        weather._client = None
+        self.addCleanup(setattr, weather, '_runner', None)
+        self.addCleanup(setattr, weather, '_client', None)
+
+
+class WeatherJobTest(StubWeatherServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        from django.contrib.auth import get_user_model
+        self.client.force_authenticate(get_user_model().objects.create_user(
+            username="admin", email="admin@example.com", password="secret-pass-123"))
+        self.team_a = Team.objects.create(name="Team A", gender="M", coach="Coach A")
+        self.team_b = Team.objects.create(name="Team B", gender="M", coach="Coach B")
+        self.tournament = Tournament.objects.create(
+            name="Torneo", start_date=timezone.now().date(), end_date=timezone.now().date())
+        self.scheduled = (timezone.now() + timedelta(days=2)).replace(
+            hour=18, minute=0, second=0, microsecond=0)
+
+    def create_match(self, execute=True, **extra):
+        payload = {
+            'tournament_id': self.tournament.id,
+            'team_a_id': self.team_a.id,
+            'team_b_id': self.team_b.id,
+            'scheduled_date': self.scheduled.isoformat(),
+            'location': "Gimnasio",
+            'latitude': -33.45,
+            'longitude': -70.66,
+            **extra,
+        }
+        with self.captureOnCommitCallbacks(execute=execute):
+            response = self.client.post(reverse('match_list_create'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return response
+
+    def test_create_only_enqueues(self):
+        """La creación responde sin esperar a la API del clima"""
+        response = self.create_match(execute=False)
+
+        self.assertEqual(response.data['weather_status'], 'pending')
+        self.assertEqual(StubOpenMeteo.requests, [])
+
+    def test_job_stores_weather(self):
+        response = self.create_match()
+
+        match = Match.objects.get(pk=response.data['id'])
+        self.assertEqual(match.weather_status, 'ready')
+        self.assertEqual(match.weather_attempts, 1)
+        self.assertEqual(match.weather_info, {'temperature': 28.0, 'weather_code': 2})
+        self.assertEqual(len(StubOpenMeteo.requests), 1)
+
+    def test_upstream_errors_are_retried(self):
+        StubOpenMeteo.script = [503, 0.6]
+
+        response = self.create_match()
+
+        match = Match.objects.get(pk=response.data['id'])
+        self.assertEqual(match.weather_status, 'ready')
+        self.assertEqual(match.weather_attempts, 1)
+        self.assertEqual(len(StubOpenMeteo.requests), 3)
+
+    def test_failure_after_max_attempts(self):
+        """Si la API no se recupera en WEATHER_MAX_ATTEMPTS el partido queda 'failed'"""
+        StubOpenMeteo.script = [500, 500, 500]
+
+        response = self.create_match()
+
+        match = Match.objects.get(pk=response.data['id'])
+        self.assertEqual(match.weather_status, 'failed')
+        self.assertIsNone(match.weather_info)
+        self.assertEqual(len(StubOpenMeteo.requests), 3)
+
+    def test_match_without_coordinates_is_skipped(self):
+        response = self.create_match(latitude=None, longitude=None)
+
+        self.assertEqual(response.data['weather_status'], 'skipped')
+        self.assertEqual(StubOpenMeteo.requests, [])
+
+    def test_reschedule_requeries_weather(self):
+        """Cambiar la hora vuelve a calcular el clima con el pronóstico en caché"""
+        match_id = self.create_match().data['id']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse('match_detail', kwargs={'pk': match_id}),
+                {'scheduled_date': (self.scheduled + timedelta(hours=2)).isoformat()},
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        match = Match.objects.get(pk=match_id)
+        self.assertEqual(match.weather_status, 'ready')
+        self.assertEqual(match.weather_info['temperature'], 30.0)
+        self.assertEqual(len(StubOpenMeteo.requests), 1)
+
+    def test_refresh_changes_the_live_detail_etag(self):
+        """El detalle en caché de un partido en vivo no conserva el clima anterior"""
+        match_id = self.create_match().data['id']
+        Match.objects.get(pk=match_id).start_match()
+        url = reverse('match_detail', kwargs={'pk': match_id})
+        for refresh in (weather.refresh_weather, lambda pk: weather.refresh_weather_many([pk])):
+            with self.subTest(refresh=refresh):
+                caches['live'].clear()
+                Match.objects.filter(pk=match_id).update(weather_info={'temperature': 0.0})
+                before = self.client.get(url)
+                self.assertEqual(before.data['weather_info'], {'temperature': 0.0})
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    refresh(match_id)
+
+                after = self.client.get(url, HTTP_IF_NONE_MATCH=before['ETag'])
+                self.assertEqual(after.status_code, status.HTTP_200_OK)
+                self.assertNotEqual(after['ETag'], before['ETag'])
+                self.assertEqual(after.data['weather_info']['temperature'], 28.0)
+
+    def test_command_resumes_stale_jobs(self):
+        """refresh_weather retoma los trabajos que quedaron en 'pending'"""
+        match_id = self.create_match(execute=False).data['id']
+        Match.objects.filter(pk=match_id).update(
+            weather_checked_at=timezone.now() - timedelta(hours=1))
+
+        call_command('refresh_weather', stdout=StringIO())
+
+        self.assertEqual(Match.objects.get(pk=match_id).weather_status, 'ready')
+
+
+class ForecastCacheTest(StubWeatherServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.day = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+        self.stats = weather.forecast_cache_stats()
+
+    def delta(self):
+        stats = weather.forecast_cache_stats()
+        return {key: stats[key] - self.stats[key] for key in stats}
+
+    def test_same_cell_and_day_share_one_request(self):
+        """Otra hora y coordenadas de la misma celda se responden desde la caché"""
+        first = weather.get_weather_data(-33.4512, -70.6623, self.day)
+        second = weather.get_weather_data(-33.4488, -70.6591, self.day + timedelta(hours=3))
+
+        self.assertEqual(first['temperature'] + 3, second['temperature'])
+        self.assertEqual(len(StubOpenMeteo.requests), 1)
+        self.assertEqual(StubOpenMeteo.requests[0]['latitude'], ['-33.45'])
+        self.assertEqual(self.delta(), {'hits': 1, 'misses': 1})
+
+    @override_settings(METRICS_TOKEN='secreto')
+    def test_hit_rate_is_exported(self):
+        """Los aciertos de cada worker se publican en /metrics"""
+        weather.get_weather_data(-33.45, -70.66, self.day)
+        weather.get_weather_data(-33.45, -70.66, self.day + timedelta(hours=1))
+
+        text = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+
+        name = 'weather_forecast_cache_requests_total'
+        self.assertEqual(sample(text, name, result='hit'), self.stats['hits'] + 1)
+        self.assertEqual(sample(text, name, result='miss'), self.stats['misses'] + 1)
+
+    def test_other_cell_or_day_misses(self):
+        weather.get_weather_data(-33.45, -70.66, self.day)
+        weather.get_weather_data(-33.47, -70.66, self.day)
+        weather.get_weather_data(-33.45, -70.66, self.day + timedelta(days=1))
+
+        self.assertEqual(len(StubOpenMeteo.requests), 3)
+        self.assertEqual(self.delta(), {'hits': 0, 'misses': 3})
+
+    def test_failures_are_not_cached(self):
+        StubOpenMeteo.script = [503, 503, 503]
+        with self.assertRaises(weather.WeatherUnavailable):
+            weather.get_weather_data(-33.45, -70.66, self.day)
+
+        weather.get_weather_data(-33.45, -70.66, self.day)
+        self.assertEqual(len(StubOpenMeteo.requests), 4)
+
+    def test_entries_expire(self):
+        with override_settings(CACHES={'weather': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'weather-ttl-test',
+            'TIMEOUT': 0.2,
+        }}):
+            weather.get_weather_data(-33.45, -70.66, self.day)
+            time.sleep(0.3)
+            weather.get_weather_data(-33.45, -70.66, self.day)
+
+        self.assertEqual(len(StubOpenMeteo.requests), 2)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        with override_settings(CACHES={'weather': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'weather-lru-test',
+            'OPTIONS': {'MAX_ENTRIES': 2, 'CULL_FREQUENCY': 2},
+        }}):
+            weather.get_weather_data(-33.45, -70.66, self.day)  # A
+            weather.get_weather_data(-34.00, -70.66, self.day)  # B
+            weather.get_weather_data(-33.45, -70.66, self.day)  # A se vuelve reciente
+            weather.get_weather_data(-35.00, -70.66, self.day)  # C expulsa a B
+            weather.get_weather_data(-33.45, -70.66, self.day)  # A sigue en caché
+            weather.get_weather_data(-34.00, -70.66, self.day)  # B vuelve a la red
+
+        self.assertEqual([query['latitude'][0] for query in StubOpenMeteo.requests],
+                         ['-33.45', '-34.00', '-35.00', '-34.00'])
+
+
+class WeatherClientTest(StubWeatherServerMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.day = timezone.now().replace(hour=9, minute=0, second=0, microsecond=0)
+
+    def lookup(self, day_offset=0):
+        return weather.get_weather_data(-33.45, -70.66, self.day + timedelta(days=day_offset))
+
+    def test_connections_are_reused(self):
+        """Las consultas sucesivas usan la misma conexión keep-alive"""
+        for offset in range(3):
+            self.lookup(offset)
+
+        self.assertEqual(len(StubOpenMeteo.clients), 3)
+        self.assertEqual(len(set(StubOpenMeteo.clients)), 1)
+
+    @override_settings(WEATHER_CIRCUIT_FAILURES=3, WEATHER_CIRCUIT_RESET=60)
+    def test_open_circuit_fails_fast(self):
+        """Con open-meteo caído el circuito se abre y no se vuelve a la red"""
+        StubOpenMeteo.script = [503, 503, 503]
+        with self.assertRaises(weather.WeatherUnavailable):
+            self.lookup()
+
+        with self.assertRaises(weather.WeatherDeferred):
+            self.lookup(1)
+
+        self.assertEqual(len(StubOpenMeteo.requests), 3)
+        metrics = weather.get_client().metrics()
+        self.assertEqual(metrics['circuit'], 'open')
+        self.assertEqual((metrics['calls'], metrics['attempts'], metrics['retries']), (2, 3, 2))
+        self.assertEqual((metrics['failures'], metrics['short_circuited']), (1, 1))
+
+    @override_settings(WEATHER_CIRCUIT_FAILURES=1, WEATHER_CIRCUIT_RESET=0)
+    def test_circuit_closes_after_successful_probe(self):
+        StubOpenMeteo.script = [503, 503, 503]
+        with self.assertRaises(weather.WeatherUnavailable):
+            self.lookup()
+
+        self.lookup(1)
+
+        self.assertEqual(weather.get_client().breaker.state, 'closed')
+
+    @override_settings(WEATHER_CIRCUIT_FAILURES=3, WEATHER_CIRCUIT_RESET=60)
+    def test_open_circuit_leaves_match_pending(self):
+        """Mientras el circuito está abierto el partido queda 'pending' sin gastar intentos"""
+        StubOpenMeteo.script = [503, 503, 503]
+        tournament = Tournament.objects.create(
+            name="Torneo", start_date=self.day.date(), end_date=self.day.date())
+        match = Match.objects.create(
+            tournament=tournament,
+            team_a=Team.objects.create(name="Team A", gender="M", coach="Coach A"),
+            team_b=Team.objects.create(name="Team B", gender="M", coach="Coach B"),
+            scheduled_date=self.day, location="Gimnasio", latitude=-33.45, longitude=-70.66)
+
+        self.assertEqual(weather.refresh_weather(match.pk), 'failed')
+        self.assertEqual(weather.refresh_weather(match.pk), 'pending')
+
+        match.refresh_from_db()
+        self.assertEqual((match.weather_status, match.weather_attempts), ('pending', 1))
+        self.assertEqual(len(StubOpenMeteo.requests), 3)
+
+    @override_settings(WEATHER_CIRCUIT_FAILURES=3, WEATHER_CIRCUIT_RESET=60,
+                       METRICS_TOKEN='secreto')
+    def test_client_metrics_are_exported(self):
+        """Latencia, errores y estado del circuito de open-meteo se publican en /metrics"""
+        self.lookup()
+        StubOpenMeteo.script = [503, 503, 503]
+        with self.assertRaises(weather.WeatherUnavailable):
+            self.lookup(1)
+
+        text = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secreto').content.decode()
+
+        service = {'service': 'open-meteo'}
+        self.assertEqual(sample(text, 'outbound_requests_total', **service), 2)
+        self.assertEqual(sample(text, 'outbound_attempts_total', **service), 4)
+        self.assertEqual(sample(text, 'outbound_failures_total', **service), 1)
+        self.assertEqual(sample(text, 'outbound_request_duration_seconds_bucket',
+                                **service, le='+Inf'), 4)
+        self.assertEqual(sample(text, 'outbound_request_duration_seconds_count', **service), 4)
+        self.assertEqual(sample(text, 'outbound_circuit_state', **service, state='open'), 1)
+        self.assertEqual(sample(text, 'outbound_circuit_state', **service, state='closed'), 0)
+
+    def test_latency_is_recorded(self):
+        self.lookup()
+
+        metrics = weather.get_client().metrics()
+        self.assertEqual(metrics['latency_buckets'][-1], 1)
+        self.assertGreater(metrics['latency_sum'], 0)
@@ -3,73 +3,100 @@
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Match, Set, PlayerPerformance
+from .models import Match
 from .serializers import (
-    PlayerPerformanceSerializer, SubstitutePlayerSerializer,
-    TimeoutSerializer, MatchSerializer, MatchDetailSerializer
+    MATCH_LIST_COLUMNS, BulkMatchSerializer, PlayerPerformanceSerializer, RallyBatchSerializer,
+    SubstitutePlayerSerializer, TimeoutSerializer, MatchSerializer, MatchDetailSerializer,
+    match_list_rows
 )
+from . import broadcast, live, standings, weather
+from .scheduling import create_matches
+from .scoreboard import build_scoreboard
+from .scoring import ScoringError, apply_rallies, apply_rally, rollback_rally
 from teams.models import Player
-import requests
+from users.authentication import FlexibleTokenAuthentication
+import asyncio
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.shortcuts import get_object_or_404
-from django.db.models import Sum
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import AuthenticationFailed
+from server_app.pagination import StandardResultsSetPagination
 from django.db import transaction
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 6
-    page_size_query_param = 'page_size'
-    max_page_size = 100
+logger = logging.getLogger(__name__)
+
+# Cambiar cualquiera de estos campos obliga a volver a consultar el clima
+WEATHER_FIELDS = {'latitude', 'longitude', 'scheduled_date'}
+# Campos de un partido terminado que cambian su aporte a la tabla
+STANDINGS_FIELDS = {'status', 'team_a_sets_won', 'team_b_sets_won',
+                    'team_a', 'team_b', 'tournament'}
+
+
+def _conditional(request, resource, version):
+    """
+    Calcula el ETag de un recurso de partido y resuelve ``If-None-Match``.
+
+    Returns:
+        tuple: ``(etag, respuesta)`` donde la respuesta es un 304 si el
+        cliente ya tiene esa versión, o None si hay que generarla
+    """
+    etag = quote_etag(f'{resource}-{version}')
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response['ETag'] = etag
+    return etag, response
 
 
 class MatchListCreateView(generics.ListCreateAPIView):
     queryset = Match.objects.all().select_related('team_a', 'team_b', 'tournament')
     serializer_class = MatchSerializer
     pagination_class = StandardResultsSetPagination
+    # Orden del modo cursor; coincide con el índice match_schedule_idx
+    cursor_ordering = ('-scheduled_date', 'id')
+
+    def list(self, request, *args, **kwargs):
+        # Lectura rápida: solo las columnas del listado, sin serializers por fila
+        queryset = self.filter_queryset(self.get_queryset()).values(*MATCH_LIST_COLUMNS)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(match_list_rows(page))
+        return Response(match_list_rows(queryset))
 
     def perform_create(self, serializer):
-        # Guardamos el partido con los datos proporcionados
-        match = serializer.save(status='upcoming')
-        # Obtenemos latitud, longitud y fecha
-        lat = serializer.validated_data.get('latitude', None)
-        lon = serializer.validated_data.get('longitude', None)
-        scheduled_date = serializer.validated_data.get('scheduled_date', None)
-
-        if lat is not None and lon is not None and scheduled_date is not None:
-            # Llamamos a la API de clima
-            clima_data = self.get_weather_data(lat, lon, scheduled_date)
-            if clima_data:
-                match.weather_info = clima_data
-                match.save()
-
-    def get_weather_data(self, lat, lon, date):
-        # Formatear fecha para la API
-        date_str = date.strftime('%Y-%m-%d')
-        params = {
-            'latitude': lat,
-            'longitude': lon,
-            'hourly': 'temperature_2m,weathercode',
-            'start_date': date_str,
-            'end_date': date_str,
-            'timezone': 'auto'
-        }
-        url = "https://api.open-meteo.com/v1/forecast"
-        response = requests.get(url, params=params)
-        if response.status_code == 200:
-            data = response.json()
-            # Obtener la hora del partido
-            hour = date.hour
-            # Ajustar el índice si es necesario
-            index = data['hourly']['time'].index(f"{date_str}T{hour:02d}:00")
-            # Obtener temperatura y código del clima
-            temperature = data['hourly']['temperature_2m'][index]
-            weather_code = data['hourly']['weathercode'][index]
-            # Mapear weather_code a una descripción si lo deseas
-            weather_info = {
-                'temperature': temperature,
-                'weather_code': weather_code
-            }
-            return weather_info
-        return None
+        # El clima se consulta en segundo plano: aquí solo se encola
+        data = serializer.validated_data
+        has_location = all(data.get(field) is not None
+                           for field in ('latitude', 'longitude', 'scheduled_date'))
+        match = serializer.save(
+            status='upcoming',
+            weather_status='pending' if has_location else 'skipped',
+            weather_checked_at=timezone.now())
+        if has_location:
+            weather.enqueue(match.pk)
+
+
+class MatchBulkCreateView(APIView):
+    """
+    Programa en bloque los partidos de un torneo (hasta 500 por solicitud).
+
+    La validación hace una consulta por modelo, la inserción un
+    ``bulk_create`` y el clima se consulta en segundo plano una vez por
+    sede y día.
+    """
+
+    def post(self, request):
+        serializer = BulkMatchSerializer(data=request.data)
+        if serializer.is_valid():
+            matches = create_matches(serializer.validated_data['matches'])
+            return Response(MatchSerializer(matches, many=True).data,
+                            status=status.HTTP_201_CREATED)
+
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 class MatchDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -94,22 +121,71 @@ class MatchDetailView(generics.RetrieveUpdateDestroyAPIView):
         return obj
 
     def retrieve(self, request, *args, **kwargs):
+        # La versión se resuelve antes de consultar o serializar nada: si
+        # el cliente ya tiene el detalle se responde 304 con una consulta
+        # (o ninguna, si el detalle está en caché).
+        entry = live.get_detail_entry(self.kwargs["pk"])
+        version = entry['version'] if entry else live.change_version(self.kwargs["pk"])
+        etag = None
+        if version is not None:
+            etag, not_modified = _conditional(request, 'detail', version)
+            if not_modified is not None:
+                return not_modified
+            if entry is not None:
+                return Response(entry['data'], headers={'ETag': etag})
         try:
             instance = self.get_object()
             serializer = self.get_serializer(instance)
-            return Response(serializer.data)
+            live.store_detail(instance.pk, serializer.data, version)
+            return Response(serializer.data, headers={'ETag': etag} if etag else None)
         except Exception as e:
-            print(f"Error detallado en MatchDetailView: {str(e)}")
+            logger.exception("Error al obtener el detalle del partido %s", self.kwargs["pk"])
             return Response(
                 {'error': str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        serializer = self.get_serializer(self.get_object(), data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        # Tras guardar se vuelve a cargar con los prefetch: serializar la
+        # instancia guardada consultaría cada set, rendimiento y jugador
+        return Response(self.get_serializer(self.get_object()).data)
+
+    def perform_update(self, serializer):
+        was_finished = serializer.instance.status == 'finished'
+        previous_tournament = serializer.instance.tournament_id
+        if WEATHER_FIELDS & serializer.validated_data.keys():
+            serializer.save(weather_status='pending', weather_checked_at=timezone.now())
+            weather.enqueue(serializer.instance.pk)
+        else:
+            super().perform_update(serializer)
+        live.match_changed(serializer.instance.pk)
+        # record_result solo suma el partido la primera vez que termina: si
+        # se edita el resultado de un partido terminado (o deja de estarlo)
+        # se reconstruye la tabla de los torneos afectados
+        if ((was_finished or serializer.instance.status == 'finished')
+                and STANDINGS_FIELDS & serializer.validated_data.keys()):
+            for tournament_id in {previous_tournament, serializer.instance.tournament_id}:
+                standings.rebuild(tournament_id)
+
+    def perform_destroy(self, instance):
+        match_id, tournament_id = instance.pk, instance.tournament_id
+        finished = instance.status == 'finished'
+        super().perform_destroy(instance)
+        live.evict(match_id)
+        if finished:
+            standings.rebuild(tournament_id)
+
 class StartMatchView(APIView):
     def post(self, request, match_id):
         try:
             match = Match.objects.get(id=match_id)
             match.start_match()
+            live.match_changed(match.id)
+            broadcast.publish(match.id, 'status', {'match_id': match.id, 'status': match.status})
             return Response({"message": "Match started successfully."}, status=status.HTTP_200_OK)
         except Match.DoesNotExist:
             return Response({"error": "Match not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -119,96 +195,30 @@ class StartMatchView(APIView):
 
 class PlayerPerformanceView(APIView):
     def get(self, request, match_id):
-        try:
-            match = Match.objects.get(id=match_id)
-            sets = match.sets.all().order_by('set_number')
-            
-            # Obtener el set actual (el último set no completado o el último set)
-            current_set = sets.filter(completed=False).first() or sets.last()
-            
-            # Preparar la información de los sets
-            sets_data = []
-            for set_obj in sets:
-                set_data = {
-                    'id': set_obj.id,
-                    'set_number': set_obj.set_number,
-                    'team_a_points': set_obj.team_a_points,
-                    'team_b_points': set_obj.team_b_points,
-                    'completed': set_obj.completed,
-                    # Obtener estadísticas de jugadores por equipo en este set
-                    'team_a_stats': PlayerPerformance.objects.filter(
-                        set=set_obj,
-                        player__team=match.team_a
-                    ).aggregate(
-                        total_points=Sum('points'),
-                        total_blocks=Sum('blocks'),
-                        total_aces=Sum('aces'),
-                        total_assists=Sum('assists')
-                    ),
-                    'team_b_stats': PlayerPerformance.objects.filter(
-                        set=set_obj,
-                        player__team=match.team_b
-                    ).aggregate(
-                        total_points=Sum('points'),
-                        total_blocks=Sum('blocks'),
-                        total_aces=Sum('aces'),
-                        total_assists=Sum('assists')
-                    )
-                }
-                sets_data.append(set_data)
-
-            response_data = {
-                'match_id': match_id,
-                'status': match.status,
-                'team_a_sets_won': match.team_a_sets_won,
-                'team_b_sets_won': match.team_b_sets_won,
-                'current_set': current_set.set_number if current_set else 1,
-                'sets': sets_data
-            }
-            
-            return Response(response_data, status=status.HTTP_200_OK)
-            
-        except Match.DoesNotExist:
+        entry = live.get_scoreboard_entry(match_id)
+        version = entry['version'] if entry else live.change_version(match_id)
+        scoreboard = None
+        if version is not None:
+            etag, not_modified = _conditional(request, 'scoreboard', version)
+            if not_modified is not None:
+                return not_modified
+            scoreboard = entry['data'] if entry else live.current_scoreboard(match_id, version)
+        if scoreboard is None:
             return Response(
                 {"error": "Partido no encontrado"}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        return Response(scoreboard, status=status.HTTP_200_OK, headers={'ETag': etag})
+
     def patch(self, request, match_id):
         serializer = PlayerPerformanceSerializer(data=request.data)
         if serializer.is_valid():
-            data = serializer.validated_data
-
-            # Buscar el set usando set_number y match_id
             try:
-                set_instance = Set.objects.get(
-                    match_id=match_id, set_number=data['set_number'])
-            except Set.DoesNotExist:
-                return Response({"error": "Set not found for this match."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Crear o actualizar el rendimiento del jugador en el set
-            performance, created = PlayerPerformance.objects.get_or_create(
-                set=set_instance,
-                player_id=data['player_id'],
-                defaults={
-                    'points': data['points'],
-                    'aces': data['aces'],
-                    'assists': data['assists'],
-                    'blocks': data['blocks'],
-                }
-            )
-            if not created:
-                # Actualizar los puntos y estadísticas
-                performance.points += data['points']
-                performance.aces += data['aces']
-                performance.assists += data['assists']
-                performance.blocks += data['blocks']
-                performance.save()
-
-            # Añadir puntos al equipo correspondiente
-            team = 'A' if Player.objects.get(
-                id=data['player_id']).team_id == Match.objects.get(id=match_id).team_a.id else 'B'
-            set_instance.add_points(team, data['points'])
-
+                set_instance = apply_rally(match_id, **serializer.validated_data)
+            except ScoringError as e:
+                return Response({"error": str(e)}, status=e.status_code)
+            live.match_changed(match_id)
+            broadcast.publish(match_id, 'score', broadcast.score_payload(set_instance))
             return Response({"message": "Performance updated successfully."}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -216,43 +226,49 @@ class PlayerPerformanceView(APIView):
     def delete(self, request, match_id):
         serializer = PlayerPerformanceSerializer(data=request.data)
         if serializer.is_valid():
-            data = serializer.validated_data
-
-            # Buscar el set usando set_number y match_id
             try:
-                set_instance = Set.objects.get(
-                    match_id=match_id, set_number=data['set_number'])
-            except Set.DoesNotExist:
-                return Response({"error": "Set not found for this match."}, status=status.HTTP_404_NOT_FOUND)
+                set_instance = rollback_rally(match_id, **serializer.validated_data)
+            except ScoringError as e:
+                return Response({"error": str(e)}, status=e.status_code)
+            live.match_changed(match_id)
+            broadcast.publish(match_id, 'score', broadcast.score_payload(set_instance))
+            return Response({"message": "Last performance entry rolled back successfully."}, status=status.HTTP_200_OK)
 
-            # Buscar el rendimiento del jugador en el set específico
-            try:
-                performance = PlayerPerformance.objects.get(
-                    set=set_instance, player_id=data['player_id']
-                )
-            except PlayerPerformance.DoesNotExist:
-                return Response({"error": "Player performance not found for this set."}, status=status.HTTP_404_NOT_FOUND)
-
-            # Realizar el rollback restando los últimos puntos y estadísticas
-            performance.points = max(0, performance.points - data['points'])
-            performance.aces = max(0, performance.aces - data['aces'])
-            performance.assists = max(0, performance.assists - data['assists'])
-            performance.blocks = max(0, performance.blocks - data['blocks'])
-            performance.save()
-
-            # Restar puntos al equipo correspondiente
-            team = 'A' if Player.objects.get(
-                id=data['player_id']).team_id == Match.objects.get(id=match_id).team_a.id else 'B'
-            points_to_subtract = data['points']
-            if team == 'A':
-                set_instance.team_a_points = max(
-                    0, set_instance.team_a_points - points_to_subtract)
-            else:
-                set_instance.team_b_points = max(
-                    0, set_instance.team_b_points - points_to_subtract)
-            set_instance.save()
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({"message": "Last performance entry rolled back successfully."}, status=status.HTTP_200_OK)
+
+class PlayerPerformanceBatchView(APIView):
+    """
+    Registra en bloque las jugadas acumuladas por una tablet de anotación
+    y devuelve el marcador resultante.
+    """
+
+    def post(self, request, match_id):
+        serializer = RallyBatchSerializer(data=request.data)
+        if serializer.is_valid():
+            try:
+                match = apply_rallies(match_id, serializer.validated_data['rallies'])
+            except ScoringError as e:
+                return Response({"error": str(e)}, status=e.status_code)
+            version = live.change_version(match.pk)
+            scoreboard = build_scoreboard(match)
+            live.refresh(match.pk, scoreboard=scoreboard, version=version)
+            current = next(
+                (set_data for set_data in scoreboard['sets']
+                 if set_data['set_number'] == scoreboard['current_set']),
+                None)
+            if current is not None:
+                broadcast.publish(match.pk, 'score', {
+                    'match_id': match.pk,
+                    'status': scoreboard['status'],
+                    'set_number': current['set_number'],
+                    'team_a_points': current['team_a_points'],
+                    'team_b_points': current['team_b_points'],
+                    'completed': current['completed'],
+                    'team_a_sets_won': scoreboard['team_a_sets_won'],
+                    'team_b_sets_won': scoreboard['team_b_sets_won'],
+                })
+            return Response(scoreboard, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -290,9 +306,21 @@ class SubstitutePlayerView(APIView):
                     # Guardar todos los cambios
                     player_in.save()
                     player_out.save()
-                    current_set.save()
-
-                    print(f"Sustitución realizada: Jugador {player_in.name} entra por {player_out.name}")
+                    # Solo las sustituciones: el marcador lo escriben los anotadores
+                    current_set.save(update_fields=['team_a_substitutions', 'team_b_substitutions'])
+                    live.match_changed(match.id)
+                    broadcast.publish(match.id, 'substitution', {
+                        'match_id': match.id,
+                        'team': data['team'],
+                        'set_number': current_set.set_number,
+                        'player_in': player_in.id,
+                        'player_out': player_out.id,
+                        'team_a_substitutions': current_set.team_a_substitutions,
+                        'team_b_substitutions': current_set.team_b_substitutions,
+                    })
+
+                    logger.info("Sustitución en el partido %s: jugador %s entra por %s",
+                                match.id, player_in.id, player_out.id)
 
                     return Response({
                         "message": "Players substituted successfully.",
@@ -321,7 +349,7 @@ class SubstitutePlayerView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             except Exception as e:
-                print(f"Error en sustitución: {str(e)}")
+                logger.exception("Error en la sustitución del partido %s", match_id)
                 return Response(
                     {"error": str(e)}, 
                     status=status.HTTP_400_BAD_REQUEST
@@ -348,7 +376,75 @@ class TimeoutView(APIView):
                 else:
                     return Response({"error": "Max timeouts reached for Team B in this set."}, status=status.HTTP_400_BAD_REQUEST)
 
-            match.save()
+            match.save(update_fields=['team_a_timeouts', 'team_b_timeouts'])
+            live.match_changed(match.id)
+            broadcast.publish(match.id, 'timeout', {
+                'match_id': match.id,
+                'team': data['team'],
+                'team_a_timeouts': match.team_a_timeouts,
+                'team_b_timeouts': match.team_b_timeouts,
+            })
             return Response({"message": "Timeout registered successfully."}, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+async def _stream_user(request):
+    """
+    Autentica la conexión del stream con el token habitual, enviado en la
+    cabecera ``Authorization: Bearer <token>`` o, como EventSource no
+    permite cabeceras, en el parámetro ``?token=``.
+    """
+    authentication = FlexibleTokenAuthentication()
+    key = request.GET.get('token')
+    if key is None:
+        header = request.headers.get('Authorization', '').split()
+        if len(header) != 2 or header[0] != authentication.keyword:
+            return None
+        key = header[1]
+    try:
+        user, _ = await sync_to_async(authentication.authenticate_credentials)(key)
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+async def match_stream(request, match_id):
+    """
+    Stream Server-Sent Events con los cambios de un partido.
+
+    Cada conexión recibe primero el marcador actual (evento ``scoreboard``)
+    y luego los deltas ``score``, ``timeout``, ``substitution`` y ``status``
+    a medida que ocurren. Requiere servir la aplicación por ASGI
+    (``server_app.asgi``) para mantener conexiones abiertas.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
+    if await _stream_user(request) is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    scoreboard = await sync_to_async(live.current_scoreboard)(match_id)
+    if scoreboard is None:
+        return JsonResponse({'error': 'Match not found.'}, status=404)
+
+    broker = broadcast.get_broker()
+    subscription = broker.subscribe(match_id)
+    keepalive = settings.SCOREBOARD_STREAM_KEEPALIVE
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            yield broadcast.encode_event('scoreboard', scoreboard)
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscription.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
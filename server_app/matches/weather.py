@@ -0,0 +1,361 @@
+# matches/weather.py
+
+import logging
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from server_app.metrics import samples
+from . import live
+from .models import Match
+from .outbound import CircuitBreaker, CircuitOpenError, HttpClient, UpstreamError
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherUnavailable(Exception):
+    """La API del clima no respondió o no tiene datos para la hora pedida."""
+
+
+class WeatherDeferred(WeatherUnavailable):
+    """open-meteo está marcado como caído: la consulta se pospone sin intentarla."""
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Cliente HTTP compartido para open-meteo, configurado desde settings."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    'open-meteo',
+                    timeout=settings.WEATHER_TIMEOUT,
+                    max_attempts=settings.WEATHER_MAX_ATTEMPTS,
+                    backoff=settings.WEATHER_RETRY_BACKOFF,
+                    breaker=CircuitBreaker(settings.WEATHER_CIRCUIT_FAILURES,
+                                           settings.WEATHER_CIRCUIT_RESET),
+                    pool_size=settings.WEATHER_POOL_SIZE,
+                )
+    return _client
+
+
+FORECAST_KEY = 'forecast:{}:{}:{}'
+HOURLY_FIELDS = ('time', 'temperature_2m', 'weathercode')
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def forecast_cache_stats():
+    """Aciertos y fallos de la caché de pronósticos en este proceso."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _count(outcome):
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+def metric_lines():
+    """
+    Métricas del clima para ``/metrics`` (ver ``server_app.metrics``): la
+    caché de pronósticos y el cliente HTTP de open-meteo.
+    """
+    stats = forecast_cache_stats()
+    yield from samples(
+        'weather_forecast_cache_requests_total',
+        "Pronósticos leídos desde la caché (hit) o consultados a open-meteo (miss)",
+        'counter', [({'result': 'hit'}, stats['hits']), ({'result': 'miss'}, stats['misses'])])
+    yield from get_client().metric_lines()
+
+
+def grid_cell(lat, lon):
+    """
+    Redondea unas coordenadas a la celda de grilla que comparte pronóstico
+    (``WEATHER_GRID_PRECISION`` decimales).
+
+    Returns:
+        tuple[str, str]: Latitud y longitud redondeadas, como texto
+    """
+    precision = settings.WEATHER_GRID_PRECISION
+    # El + 0.0 evita celdas distintas para 0.0 y -0.0
+    return tuple(f"{round(value, precision) + 0.0:.{precision}f}" for value in (lat, lon))
+
+
+def get_forecast(lat, lon, day):
+    """
+    Devuelve el pronóstico horario completo de un día para la celda de
+    grilla de la sede, desde la caché o consultando open-meteo.
+
+    Se guarda la serie de las 24 horas: otros partidos en la misma sede y
+    día, o un cambio de horario, se responden sin ir a la red. La vigencia y
+    la expulsión (TTL y LRU) las define la caché ``WEATHER_FORECAST_CACHE``.
+
+    Args:
+        lat (float): Latitud de la sede
+        lon (float): Longitud de la sede
+        day (date): Día del pronóstico
+
+    Returns:
+        dict: Serie ``hourly`` de open-meteo (``time``, ``temperature_2m``,
+        ``weathercode``)
+
+    Raises:
+        WeatherUnavailable: Si la API falla o responde sin la serie horaria
+    """
+    cell_lat, cell_lon = grid_cell(lat, lon)
+    key = FORECAST_KEY.format(cell_lat, cell_lon, day.isoformat())
+    cache = caches[settings.WEATHER_FORECAST_CACHE]
+    hourly = cache.get(key)
+    if hourly is not None:
+        _count('hits')
+        return hourly
+
+    _count('misses')
+    hourly = _fetch_forecast(cell_lat, cell_lon, day)
+    cache.set(key, hourly)
+    return hourly
+
+
+def _fetch_forecast(lat, lon, day):
+    date_str = day.isoformat()
+    params = {
+        'latitude': lat,
+        'longitude': lon,
+        'hourly': 'temperature_2m,weathercode',
+        'start_date': date_str,
+        'end_date': date_str,
+        'timezone': 'auto'
+    }
+    try:
+        response = get_client().get(settings.WEATHER_API_URL, params=params)
+    except CircuitOpenError as e:
+        raise WeatherDeferred(str(e)) from e
+    except UpstreamError as e:
+        raise WeatherUnavailable(str(e)) from e
+    if response.status_code != 200:
+        raise WeatherUnavailable(f"open-meteo respondió {response.status_code}")
+
+    try:
+        hourly = response.json()['hourly']
+        return {field: hourly[field] for field in HOURLY_FIELDS}
+    except (ValueError, KeyError, TypeError) as e:
+        raise WeatherUnavailable("Respuesta de open-meteo sin serie horaria") from e
+
+
+def get_weather_data(lat, lon, date):
+    """
+    Obtiene la temperatura y el código del clima para la hora del partido.
+
+    Args:
+        lat (float): Latitud de la sede
+        lon (float): Longitud de la sede
+        date (datetime): Fecha y hora programada del partido
+
+    Returns:
+        dict: ``{'temperature': ..., 'weather_code': ...}``
+
+    Raises:
+        WeatherUnavailable: Si la API falla, excede el tiempo de espera o no
+            trae datos para esa hora
+    """
+    return _at_hour(get_forecast(lat, lon, date.date()), date)
+
+
+def _at_hour(hourly, date):
+    date_str = date.strftime('%Y-%m-%d')
+    try:
+        # Obtener la hora del partido
+        index = hourly['time'].index(f"{date_str}T{date.hour:02d}:00")
+        return {
+            'temperature': hourly['temperature_2m'][index],
+            'weather_code': hourly['weathercode'][index],
+        }
+    except (IndexError, ValueError) as e:
+        raise WeatherUnavailable(f"Sin pronóstico para {date_str} {date.hour:02d}:00") from e
+
+
+def refresh_weather(match_id):
+    """
+    Trabajo en segundo plano: obtiene el clima de un partido y registra el
+    resultado en ``weather_status``.
+
+    Los reintentos los hace el cliente HTTP. Si el circuito de open-meteo
+    está abierto el partido queda en ``pending`` sin gastar un intento, y
+    ``manage.py refresh_weather`` lo retoma cuando el servicio se recupere.
+    Escribe con ``update()`` solo las columnas del clima, para no pisar
+    cambios hechos sobre el partido mientras se consultaba la API, y
+    actualiza el estado en caché del partido si está en vivo.
+
+    Returns:
+        str | None: Estado final, o None si el partido ya no existe
+    """
+    match = Match.objects.filter(pk=match_id).only(
+        'id', 'latitude', 'longitude', 'scheduled_date').first()
+    if match is None:
+        return None
+    if match.latitude is None or match.longitude is None or match.scheduled_date is None:
+        _finish(match_id, 'skipped')
+        return 'skipped'
+
+    try:
+        weather_info = get_weather_data(match.latitude, match.longitude, match.scheduled_date)
+    except WeatherDeferred as e:
+        logger.info("Clima del partido %s pospuesto: %s", match_id, e)
+        _finish(match_id, 'pending', attempt=False)
+        return 'pending'
+    except WeatherUnavailable as e:
+        logger.warning("Clima del partido %s no disponible: %s", match_id, e)
+        _finish(match_id, 'failed')
+        return 'failed'
+    _finish(match_id, 'ready', weather_info=weather_info)
+    return 'ready'
+
+
+def refresh_weather_many(match_ids):
+    """
+    Trabajo en segundo plano para partidos creados en bloque.
+
+    Agrupa los partidos por celda de grilla y día, pide el pronóstico una
+    sola vez por grupo y guarda todos los resultados con un
+    ``bulk_update``. Los estados son los mismos que en ``refresh_weather``.
+
+    Returns:
+        dict: Cantidad de partidos por estado final
+    """
+    matches = list(Match.objects.filter(pk__in=match_ids).only(
+        'id', 'latitude', 'longitude', 'scheduled_date', 'weather_attempts', 'version'))
+    groups = defaultdict(list)
+    now = timezone.now()
+    for match in matches:
+        match.weather_checked_at = now
+        if match.latitude is None or match.longitude is None or match.scheduled_date is None:
+            match.weather_status = 'skipped'
+            match.weather_attempts += 1
+            continue
+        day = match.scheduled_date.date()
+        groups[(grid_cell(match.latitude, match.longitude), day)].append(match)
+
+    for (cell, day), group in groups.items():
+        first = group[0]
+        try:
+            hourly = get_forecast(first.latitude, first.longitude, day)
+        except WeatherDeferred as e:
+            logger.info("Clima de %s partidos pospuesto: %s", len(group), e)
+            for match in group:
+                match.weather_status = 'pending'
+            continue
+        except WeatherUnavailable as e:
+            logger.warning("Clima de %s partidos no disponible: %s", len(group), e)
+            for match in group:
+                match.weather_attempts += 1
+                match.weather_status = 'failed'
+            continue
+        for match in group:
+            match.weather_attempts += 1
+            try:
+                match.weather_info = _at_hour(hourly, match.scheduled_date)
+            except WeatherUnavailable:
+                match.weather_status = 'failed'
+            else:
+                match.weather_status = 'ready'
+
+    fields = ['weather_status', 'weather_checked_at', 'weather_attempts', 'version']
+    for match in matches:
+        match.version = F('version') + 1
+    ready = [match for match in matches if match.weather_status == 'ready']
+    Match.objects.bulk_update(ready, fields + ['weather_info'], batch_size=500)
+    Match.objects.bulk_update(
+        [match for match in matches if match.weather_status != 'ready'], fields, batch_size=500)
+    # Solo los partidos en vivo tienen detalle y marcador en caché
+    for match_id in Match.objects.filter(
+            pk__in=[match.pk for match in matches], status='live').values_list('pk', flat=True):
+        live.match_changed(match_id)
+
+    totals = defaultdict(int)
+    for match in matches:
+        totals[match.weather_status] += 1
+    return dict(totals)
+
+
+def _finish(match_id, weather_status, attempt=True, **fields):
+    if attempt:
+        fields['weather_attempts'] = F('weather_attempts') + 1
+    Match.objects.filter(pk=match_id).update(
+        weather_status=weather_status,
+        weather_checked_at=timezone.now(),
+        version=F('version') + 1,
+        **fields,
+    )
+    live.match_changed(match_id)
+
+
+class ThreadRunner:
+    """
+    Ejecuta los trabajos en un pool de hilos del propio proceso.
+
+    Los trabajos que no alcancen a ejecutarse (por ejemplo, si el proceso se
+    reinicia) quedan en ``pending`` y los retoma ``manage.py refresh_weather``.
+    """
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='weather')
+
+    def submit(self, func, *args):
+        self.executor.submit(self._run, func, *args)
+
+    @staticmethod
+    def _run(func, *args):
+        close_old_connections()
+        try:
+            func(*args)
+        except Exception:
+            logger.exception("Falló el trabajo %s%r", func.__name__, args)
+        finally:
+            close_old_connections()
+
+
+class InlineRunner:
+    """Ejecuta los trabajos en el momento; útil en pruebas y comandos."""
+
+    def submit(self, func, *args):
+        func(*args)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """Devuelve la instancia única del ejecutor configurado."""
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = import_string(settings.WEATHER_JOB_RUNNER)()
+    return _runner
+
+
+def enqueue(match_id):
+    """
+    Encola la consulta del clima para cuando la transacción en curso
+    confirme el partido.
+    """
+    transaction.on_commit(lambda: get_runner().submit(refresh_weather, match_id))
+
+
+def enqueue_many(match_ids):
+    """Igual que ``enqueue``, con un solo trabajo para todos los partidos."""
+    match_ids = list(match_ids)
+    transaction.on_commit(lambda: get_runner().submit(refresh_weather_many, match_ids))
@@ -0,0 +1,190 @@
+"""
+Métricas de solicitudes HTTP en memoria y su exposición en formato de
+texto de Prometheus.
+
+``InstrumentationMiddleware`` (``server_app.middleware``) registra cada
+solicitud con ``observe_request``; ``/metrics`` devuelve los histogramas
+acumulados por ruta, método y estado, junto con los aciertos del caché de
+autenticación por token (``users.authentication``) y las métricas que otros
+módulos agregan con ``registry.register``. Los valores son por proceso: con
+varios workers, Prometheus debe consultar cada uno (o agregarse con la
+etiqueta de instancia).
+"""
+
+import threading
+from bisect import bisect_left
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """
+    Histograma con series por etiquetas. Guarda conteos por cubeta sin
+    acumular; se acumulan al exportar para que registrar sea O(log n).
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}  # etiquetas -> [conteos por cubeta..., +Inf, suma]
+
+    def observe(self, labels, value):
+        row = self.series.get(labels)
+        if row is None:
+            row = self.series[labels] = [0] * (len(self.buckets) + 1) + [0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def expose(self, label_names):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, row in sorted(self.series.items()):
+            pairs = ','.join(f'{name}="{_escape(value)}"'
+                             for name, value in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), row):
+                cumulative += count
+                yield f'{self.name}_bucket{{{pairs},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_sum{{{pairs}}} {row[-1]:.6g}'
+            yield f'{self.name}_count{{{pairs}}} {cumulative}'
+
+
+class Counter:
+    """Contador con series por etiquetas."""
+
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.series = {}  # etiquetas -> valor
+
+    def inc(self, labels):
+        self.series[labels] = self.series.get(labels, 0) + 1
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        for labels, value in sorted(self.series.items()):
+            pairs = ','.join(f'{name}="{_escape(label)}"'
+                             for name, label in zip(self.label_names, labels))
+            yield f'{self.name}{{{pairs}}} {value}'
+
+
+def samples(name, documentation, kind, rows):
+    """
+    Líneas de una métrica ``counter`` o ``gauge`` con valores ya calculados,
+    para los colectores. ``rows`` es ``[(etiquetas, valor)]`` con las
+    etiquetas como diccionario.
+    """
+    yield f'# HELP {name} {documentation}'
+    yield f'# TYPE {name} {kind}'
+    for labels, value in rows:
+        pairs = ','.join(f'{label}="{_escape(text)}"' for label, text in labels.items())
+        yield f'{name}{{{pairs}}} {value}'
+
+
+def histogram_samples(name, documentation, labels, bounds, cumulative, total):
+    """
+    Líneas de un histograma cuyos conteos ya están acumulados por cubeta
+    (``cumulative[i]`` cuenta las observaciones ``<= bounds[i]``; la última
+    cubeta es ``inf``).
+    """
+    pairs = ''.join(f'{label}="{_escape(text)}",' for label, text in labels.items())
+    yield f'# HELP {name} {documentation}'
+    yield f'# TYPE {name} histogram'
+    for bound, count in zip(bounds, cumulative):
+        yield f'{name}_bucket{{{pairs}le="{"+Inf" if bound == float("inf") else bound}"}} {count}'
+    yield f'{name}_sum{{{pairs.rstrip(",")}}} {total:.6g}'
+    yield f'{name}_count{{{pairs.rstrip(",")}}} {cumulative[-1]}'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+class Registry:
+    """Métricas del proceso, protegidas por un único candado."""
+
+    LABELS = ('route', 'method', 'status')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.collectors = []
+        self.reset()
+
+    def register(self, collector):
+        """
+        Agrega ``collector``, una función sin argumentos que devuelve líneas
+        en formato de texto y se llama en cada exposición. Sobrevive a
+        ``reset``.
+        """
+        self.collectors.append(collector)
+
+    def reset(self):
+        with self.lock:
+            self.duration = Histogram(
+                'http_request_duration_seconds',
+                "Tiempo total de la solicitud", DURATION_BUCKETS)
+            self.db_duration = Histogram(
+                'http_request_db_duration_seconds',
+                "Tiempo en consultas SQL por solicitud", DURATION_BUCKETS)
+            self.render_duration = Histogram(
+                'http_request_render_duration_seconds',
+                "Tiempo de renderizado de la respuesta", DURATION_BUCKETS)
+            self.queries = Histogram(
+                'http_request_db_queries',
+                "Consultas SQL por solicitud", QUERY_BUCKETS)
+            self.token_cache = Counter(
+                'auth_token_cache_requests_total',
+                "Autenticaciones por token resueltas desde el caché (hit) o la base (miss)",
+                ('result',))
+
+    def observe_request(self, route, method, status, total, db, render, queries):
+        labels = (route, method, str(status))
+        with self.lock:
+            self.duration.observe(labels, total)
+            self.db_duration.observe(labels, db)
+            self.render_duration.observe(labels, render)
+            self.queries.observe(labels, queries)
+
+    def observe_token_cache(self, hit):
+        with self.lock:
+            self.token_cache.inc(('hit',) if hit else ('miss',))
+
+    def expose(self):
+        with self.lock:
+            lines = [line
+                     for histogram in (self.duration, self.db_duration,
+                                       self.render_duration, self.queries)
+                     for line in histogram.expose(self.LABELS)]
+            lines.extend(self.token_cache.expose())
+        for collector in self.collectors:
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def metrics_view(request):
+    """
+    Métricas del proceso en formato de texto de Prometheus.
+
+    Si ``METRICS_TOKEN`` está definido se exige la cabecera
+    ``Authorization: Bearer <token>``. Sin token solo se sirven con
+    ``DEBUG``: en producción no quedan expuestas por olvido.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if not token and not settings.DEBUG:
+        return HttpResponseForbidden()
+    if token and not constant_time_compare(request.headers.get('Authorization', ''),
+                                           f'Bearer {token}'):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.expose(), content_type=CONTENT_TYPE)
@@ -0,0 +1,149 @@
+"""
+Detección de consultas N+1.
+
+Cada sentencia SQL de una solicitud se reduce a su forma (``fingerprint``:
+sin literales y con las listas ``IN`` colapsadas) y se cuenta. Si una
+misma forma se ejecuta más de ``NPLUSONE_THRESHOLD`` veces se informa con
+el lugar del código del proyecto que la disparó, que es casi siempre un
+serializer anidado o un bucle sobre una relación sin ``prefetch_related``.
+
+``InstrumentationMiddleware`` lo aplica a cada solicitud con
+``NPLUSONE_ENABLED`` (por defecto igual a ``DEBUG``). Con
+``NPLUSONE_RAISE`` la solicitud falla con ``NPlusOneError``; el runner de
+tests (``server_app.test_runner``) activa ambos, así que un N+1 nuevo
+hace fallar el test que lo ejercita. Fuera de una solicitud se usa
+``detect()``; un test que repite consultas a propósito (p. ej. una carga
+masiva) se exceptúa con ``allow()``.
+"""
+
+import logging
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)', re.IGNORECASE)
+_SPACES = re.compile(r'\s+')
+# Sentencias de control de transacciones: se repiten por diseño
+_IGNORED = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+_THIS_FILE = str(Path(__file__))
+_MIDDLEWARE_FILE = str(Path(__file__).with_name('middleware.py'))
+
+
+class NPlusOneError(AssertionError):
+    """Una solicitud repitió una misma forma de consulta más veces que el umbral."""
+
+
+def fingerprint(sql):
+    """
+    Forma normalizada de una sentencia: literales como ``?``, listas
+    ``IN`` de cualquier largo como ``IN (...)`` y espacios colapsados.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _SPACES.sub(' ', sql).strip()
+
+
+def call_site():
+    """
+    Primer marco de la pila que pertenece al proyecto (ni Django, ni
+    DRF, ni este detector), como ``ruta:línea en función``.
+    """
+    base = str(settings.BASE_DIR)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if (filename.startswith(base) and 'site-packages' not in filename
+                and filename not in (_THIS_FILE, _MIDDLEWARE_FILE)):
+            return (f'{Path(filename).relative_to(base)}:{frame.f_lineno} '
+                    f'en {frame.f_code.co_name}')
+        frame = frame.f_back
+    return 'desconocido'
+
+
+class QueryTracker:
+    """
+    Cuenta las formas de consulta de una unidad de trabajo (una solicitud).
+
+    El lugar del código solo se busca cuando una forma supera el umbral,
+    así que contar cuesta una normalización por consulta.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = {}
+        self.sites = {}
+
+    def add(self, sql):
+        if sql.startswith(_IGNORED):
+            return
+        shape = fingerprint(sql)
+        count = self.counts.get(shape, 0) + 1
+        self.counts[shape] = count
+        if count == self.threshold + 1:
+            self.sites[shape] = call_site()
+
+    @property
+    def offenders(self):
+        """``[(forma, ejecuciones, lugar)]`` de las formas sobre el umbral."""
+        return [(shape, self.counts[shape], site) for shape, site in self.sites.items()]
+
+    def report(self, label):
+        """Describe los N+1 encontrados, o devuelve ``None`` si no hay."""
+        if not self.sites:
+            return None
+        lines = [f"N+1 en {label}:"]
+        for shape, count, site in self.offenders:
+            lines.append(f"  {count} ejecuciones en {site}: {shape[:300]}")
+        return '\n'.join(lines)
+
+
+def check(tracker, label):
+    """Informa (o, con ``NPLUSONE_RAISE``, lanza ``NPlusOneError``) los N+1 del tracker."""
+    report = tracker.report(label)
+    if report is None:
+        return
+    if getattr(settings, 'NPLUSONE_RAISE', False):
+        raise NPlusOneError(report)
+    logger.warning(report)
+
+
+@contextmanager
+def detect(label='bloque', threshold=None):
+    """
+    Aplica la detección a un bloque de código fuera de una solicitud,
+    p. ej. en un test o un comando::
+
+        with nplusone.detect('tabla de posiciones'):
+            standings.table(tournament)
+    """
+    from server_app.middleware import tracking  # evita el import circular
+
+    tracker = QueryTracker(settings.NPLUSONE_THRESHOLD if threshold is None else threshold)
+    with tracking(tracker):
+        yield tracker
+    check(tracker, label)
+
+
+def allow(threshold=None):
+    """
+    Exceptúa un test, una clase de tests o un bloque de la detección
+    estricta del runner. Sin ``threshold`` la desactiva; con él solo sube
+    el umbral, así que un N+1 mayor sigue fallando::
+
+        @nplusone.allow(threshold=50)
+        def test_importa_el_plantel(self):
+            ...
+    """
+    from django.test.utils import override_settings  # solo se usa en tests
+
+    if threshold is None:
+        return override_settings(NPLUSONE_ENABLED=False)
+    return override_settings(NPLUSONE_THRESHOLD=threshold)
@@ -0,0 +1,97 @@
+# server_app/pagination.py
+
+from collections import OrderedDict
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Paginación por cursor (keyset): cada página filtra desde la última fila
+    de la anterior en lugar de usar ``OFFSET``, así que cuesta lo mismo a
+    cualquier profundidad si el orden tiene un índice.
+
+    El orden sale del ``OrderingFilter`` de la vista si lo tiene, o de su
+    atributo ``cursor_ordering``. El total es opcional (``?count=true``),
+    porque es la única consulta que recorre todas las filas.
+    """
+
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = getattr(view, 'cursor_ordering', self.ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param, '').lower() in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        body = OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+        ])
+        if self.count is not None:
+            body['count'] = self.count
+        body['results'] = data
+        return Response(body)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': "Incluir el total de resultados (consulta adicional)",
+            'schema': {'type': 'boolean'},
+        }]
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """
+    Paginación por número de página, o por cursor si la solicitud trae el
+    parámetro ``cursor`` (vacío para la primera página).
+
+    El modo por página mantiene la respuesta de siempre (``count`` y
+    enlaces ``?page=``); el modo cursor delega en ``KeysetPagination`` con
+    los mismos tamaños de página.
+    """
+
+    cursor_query_param = KeysetPagination.cursor_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.cursor_query_param in request.query_params:
+            self.keyset = KeysetPagination()
+            self.keyset.page_size = self.page_size
+            self.keyset.page_size_query_param = self.page_size_query_param
+            self.keyset.max_page_size = self.max_page_size
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': "Cursor de paginación; vacío para la primera página en modo cursor",
+            'schema': {'type': 'string'},
+        }, {
+            'name': KeysetPagination.count_query_param,
+            'required': False,
+            'in': 'query',
+            'description': "En modo cursor, incluir el total de resultados",
+            'schema': {'type': 'boolean'},
+        }]
+
+
+class StandardResultsSetPagination(PageOrCursorPagination):
+    page_size = 6
+    page_size_query_param = 'page_size'
+    max_page_size = 100
@@ -76,9 +76,22 @@ REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
 
+# Caché en memoria de tokens resueltos (users/authentication.py). El logout
+# y los cambios guardados del usuario cambian su generación, que vive en la
+# caché TOKEN_CACHE_GENERATIONS y se revisa en cada acierto. Con REDIS_URL
+# esa caché es compartida y la invalidación llega a todos los workers; sin
+# Redis cada worker solo ve la suya, así que las entradas duran segundos.
+# Los cambios con QuerySet.update() no disparan señales: siguen valiendo
+# hasta TOKEN_CACHE_TTL salvo que se llame a token_cache.invalidate_user().
+# Con 0 se desactiva.
+TOKEN_CACHE_GENERATIONS = 'live'
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "60" if os.getenv('REDIS_URL') else "5"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
 APPEND_SLASH = False
 
 MIDDLEWARE = [
+    'server_app.middleware.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -89,6 +102,24 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentación por solicitud (server_app/middleware.py): histogramas por
+# ruta en /metrics y, con SERVER_TIMING, cabeceras Server-Timing y
+# X-Query-Count en cada respuesta. Esas cabeceras muestran a cualquier
+# cliente los tiempos de base de datos, así que por defecto siguen a DEBUG.
+SERVER_TIMING = os.getenv("SERVER_TIMING", str(DEBUG)).lower() in ("true", "1", "t")
+# Si se define, /metrics exige "Authorization: Bearer <METRICS_TOKEN>". Sin
+# DEBUG y sin METRICS_TOKEN /metrics responde 403.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Detección de N+1 (server_app/nplusone.py): una misma forma de consulta
+# repetida más de NPLUSONE_THRESHOLD veces en una solicitud se informa con
+# el lugar del código que la ejecutó. El runner de tests la activa y hace
+# fallar la solicitud (NPLUSONE_RAISE).
+NPLUSONE_ENABLED = os.getenv("NPLUSONE_ENABLED", str(DEBUG)).lower() in ("true", "1", "t")
+NPLUSONE_THRESHOLD = int(os.getenv("NPLUSONE_THRESHOLD", "5"))
+NPLUSONE_RAISE = False
+TEST_RUNNER = 'server_app.test_runner.NPlusOneTestRunner'
+
 ROOT_URLCONF = 'server_app.urls'
 
 TEMPLATES = [
@@ -130,6 +161,70 @@ DATABASES = {
 if not all([DATABASES['default']['NAME'], DATABASES['default']['USER'], DATABASES['default']['PASSWORD'], DATABASES['default']['HOST']]):
     raise ValueError("La configuración de la base de datos no está completa en las variables de entorno.")
 
+# Caché del estado de partidos en vivo (matches/live.py). Solo el worker
+# que atiende una escritura refresca su entrada, así que sin REDIS_URL (en
+# memoria de cada proceso) las entradas duran segundos: con varios workers
+# un marcador o un ETag viejo se sirve como mucho LIVE_LOCAL_CACHE_TIMEOUT.
+# Con REDIS_URL todos los workers comparten la misma caché.
+LIVE_SCOREBOARD_CACHE = 'live'
+LIVE_LOCAL_CACHE_TIMEOUT = 5  # segundos
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'live': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'live-scoreboard',
+        'TIMEOUT': LIVE_LOCAL_CACHE_TIMEOUT,
+    },
+    # Pronósticos por celda de grilla y día (matches/weather.py). LocMem
+    # reordena las claves al leerlas; con CULL_FREQUENCY igual a MAX_ENTRIES
+    # al llenarse descarta solo la menos usada recientemente (LRU).
+    'weather': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'weather-forecasts',
+        'TIMEOUT': 3 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 512, 'CULL_FREQUENCY': 512},
+    },
+}
+
+if os.getenv('REDIS_URL'):
+    CACHES['live'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+        'KEY_PREFIX': 'volley',
+        'TIMEOUT': 6 * 60 * 60,
+    }
+    # La expulsión LRU queda a cargo de maxmemory-policy de Redis
+    CACHES['weather'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+        'KEY_PREFIX': 'volley',
+        'TIMEOUT': 3 * 60 * 60,
+    }
+
+# Difusión de cambios de marcador por Server-Sent Events (matches/broadcast.py).
+# Sin REDIS_URL los eventos solo llegan a los clientes del mismo proceso, así
+# que el stream requiere un único worker ASGI; con Redis se difunden por
+# pub/sub a todos los workers.
+SCOREBOARD_BROKER_URL = os.getenv('REDIS_URL')
+SCOREBOARD_BROKER = ('matches.broadcast.RedisBroker' if SCOREBOARD_BROKER_URL
+                     else 'matches.broadcast.LocalBroker')
+SCOREBOARD_STREAM_KEEPALIVE = 15  # segundos
+
+# Consulta del clima en segundo plano (matches/weather.py).
+WEATHER_API_URL = os.getenv('WEATHER_API_URL', 'https://api.open-meteo.com/v1/forecast')
+WEATHER_TIMEOUT = (3.05, 5)  # segundos: conexión, lectura
+WEATHER_MAX_ATTEMPTS = 3  # por consulta, incluido el primer intento
+WEATHER_RETRY_BACKOFF = 0.5  # segundos; tope de la espera aleatoria, se duplica por reintento
+WEATHER_CIRCUIT_FAILURES = 5  # fallos seguidos que abren el circuito
+WEATHER_CIRCUIT_RESET = 30  # segundos con el circuito abierto antes de probar de nuevo
+WEATHER_POOL_SIZE = 10  # conexiones keep-alive a open-meteo
+WEATHER_JOB_RUNNER = 'matches.weather.ThreadRunner'
+WEATHER_FORECAST_CACHE = 'weather'
+WEATHER_GRID_PRECISION = 2  # decimales de lat/lon: celdas de ~1 km
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
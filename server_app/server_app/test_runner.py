@@ -0,0 +1,25 @@
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class NPlusOneTestRunner(DiscoverRunner):
+    """
+    Runner de tests que activa la detección de N+1 en modo estricto: toda
+    solicitud de los tests que repita una forma de consulta más de
+    ``NPLUSONE_THRESHOLD`` veces falla con ``NPlusOneError``.
+
+    Los tests que repiten consultas a propósito se exceptúan con
+    ``server_app.nplusone.allow()`` (sin argumentos la desactiva, con
+    ``threshold=`` sube el umbral) o con ``override_settings`` de
+    ``NPLUSONE_THRESHOLD`` o ``NPLUSONE_RAISE``. Para un bloque fuera de
+    una solicitud, ``nplusone.detect(threshold=...)``.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.nplusone = override_settings(NPLUSONE_ENABLED=True, NPLUSONE_RAISE=True)
+        self.nplusone.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.nplusone.disable()
+        super().teardown_test_environment(**kwargs)
@@ -2,6 +2,7 @@
 
 from django.contrib import admin
 from django.urls import path, include
+from server_app.metrics import metrics_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -10,4 +11,5 @@ urlpatterns = [
     path('api/', include('tournaments.urls')),
     path('api/', include('matches.urls')),
     path('api/', include('docs.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
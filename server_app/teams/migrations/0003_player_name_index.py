@@ -0,0 +1,17 @@
+# Generated by Django 5.1.1 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("teams", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="player",
+            index=models.Index(fields=["name", "id"], name="player_name_idx"),
+        ),
+    ]
@@ -130,6 +130,15 @@ class Player(models.Model):
         Sobreescribe el método save para manejar la asignación automática de avatares
         y realizar validaciones antes de guardar el jugador.
         """
+        self.prepare()
+        super().save(*args, **kwargs)
+
+    def prepare(self):
+        """
+        Asigna el avatar por defecto y valida el jugador. Lo usa ``save`` y
+        debe llamarse antes de guardar jugadores con ``bulk_create`` o
+        ``bulk_update``, que no pasan por ``save``.
+        """
         # Asigna un avatar por defecto basado en el género del equipo si no se ha proporcionado uno
         if not self.avatar:
             if self.team.gender == 'M':
@@ -139,7 +148,6 @@ class Player(models.Model):
 
         # Llamar a la validación personalizada antes de guardar
         self.clean()
-        super().save(*args, **kwargs)
 
     def clean(self):
         """
@@ -161,4 +169,8 @@ class Player(models.Model):
         verbose_name = "Jugador"
         verbose_name_plural = "Jugadores"
         ordering = ['team', 'name']
-        unique_together = [['team', 'jersey_number']]  # Asegura números únicos por equipo
\ No newline at end of file
+        unique_together = [['team', 'jersey_number']]  # Asegura números únicos por equipo
+        indexes = [
+            # Respalda la paginación por cursor de /api/players/ (orden por nombre)
+            models.Index(fields=['name', 'id'], name='player_name_idx'),
+        ]
@@ -72,7 +72,7 @@ class TeamSerializer(serializers.ModelSerializer):
     
     players = PlayerSerializer(many=True)
     created_by = serializers.ReadOnlyField(
-        source='created_by.id',
+        source='created_by_id',
         help_text="ID del usuario que creó el equipo"
     )
 
@@ -135,10 +135,13 @@ class TeamSerializer(serializers.ModelSerializer):
         """
         players_data = validated_data.pop('players', [])
         team = Team.objects.create(**validated_data)
-        
-        for player_data in players_data:
-            Player.objects.create(team=team, **player_data)
-        
+
+        # Un solo INSERT para todo el plantel
+        players = [Player(team=team, **player_data) for player_data in players_data]
+        for player in players:
+            player.prepare()
+        Player.objects.bulk_create(players)
+
         return team
 
     def update(self, instance, validated_data):
@@ -175,16 +178,20 @@ class TeamSerializer(serializers.ModelSerializer):
                 ]
             }
         """
-        players_data = validated_data.pop('players', [])
+        players_data = validated_data.pop('players', None)
 
         # Actualizar campos del equipo
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
 
+        # Una actualización parcial sin 'players' no toca el plantel
+        if players_data is None:
+            return instance
+
         # Mapear jugadores existentes por ID para búsqueda rápida
         existing_players = {player.id: player for player in instance.players.all()}
-        processed_ids = []
+        updated, created, fields = [], [], set()
 
         # Procesar datos de jugadores
         for player_data in players_data:
@@ -196,15 +203,25 @@ class TeamSerializer(serializers.ModelSerializer):
                 for attr, value in player_data.items():
                     if attr != 'id':  # No actualizar el ID
                         setattr(player, attr, value)
-                player.save()
-                processed_ids.append(player_id)
+                        fields.add(attr)
+                updated.append(player)
             else:
-                # Crear nuevo jugador
-                new_player = Player.objects.create(team=instance, **player_data)
-                processed_ids.append(new_player.id)
-
-        # Eliminar jugadores no incluidos en la actualización
-        instance.players.exclude(id__in=processed_ids).delete()
+                # Crear nuevo jugador. El id lo asigna la base: uno enviado
+                # que no es de este equipo se ignora
+                created.append(Player(
+                    team=instance,
+                    **{attr: value for attr, value in player_data.items() if attr != 'id'}))
+
+        # Eliminar primero los jugadores no incluidos, para que sus números
+        # de camiseta queden libres para los nuevos
+        instance.players.exclude(id__in=[player.id for player in updated]).delete()
+
+        # Una escritura por tipo de cambio en lugar de una por jugador
+        for player in updated + created:
+            player.prepare()
+        if updated:
+            Player.objects.bulk_update(updated, fields | {'avatar'})
+        Player.objects.bulk_create(created)
 
         return instance
 
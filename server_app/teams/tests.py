@@ -1,3 +1,97 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from .models import Player, Team
 
-# Create your tests here.
+
+class TeamRosterWriteTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(
+            username='entrenador', email='entrenador@example.com', password='secret-pass-123'))
+        self.team = Team.objects.create(name="Equipo", gender='M', coach="Coach")
+        self.kept = Player.objects.create(team=self.team, name="Titular", jersey_number=1,
+                                          position='AR', is_starter=True)
+        self.dropped = Player.objects.create(team=self.team, name="Suplente", jersey_number=7,
+                                             position='OP', is_starter=False)
+        self.rival = Player.objects.create(
+            team=Team.objects.create(name="Rival", gender='M', coach="Coach"),
+            name="Rival", jersey_number=3, position='CE', is_starter=True)
+
+    def put(self, players):
+        response = self.client.put(
+            reverse('teams-detail', args=[self.team.pk]),
+            {'name': "Equipo", 'gender': 'M', 'coach': "Coach", 'players': players},
+            format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_create_assigns_default_avatars(self):
+        response = self.client.post(reverse('teams-list'), {
+            'name': "Nuevo", 'gender': 'F', 'coach': "Coach",
+            'players': [{'name': "Jugadora", 'jersey_number': 4, 'position': 'LI',
+                         'is_starter': False}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['players'][0]['avatar'], Player.DEFAULT_AVATAR_FEMALE)
+
+    def test_players_left_out_are_deleted(self):
+        self.put([{'id': self.kept.pk, 'name': "Titular", 'jersey_number': 1,
+                   'position': 'AR', 'is_starter': True},
+                  {'name': "Nuevo", 'jersey_number': 9, 'position': 'CE', 'is_starter': False}])
+
+        self.assertEqual(sorted(self.team.players.values_list('name', flat=True)),
+                         ["Nuevo", "Titular"])
+        self.assertFalse(Player.objects.filter(pk=self.dropped.pk).exists())
+
+    def test_existing_ids_are_updated_in_place(self):
+        self.put([{'id': self.kept.pk, 'name': "Capitán", 'jersey_number': 10,
+                   'position': 'AR', 'is_starter': True}])
+
+        self.kept.refresh_from_db()
+        self.assertEqual((self.kept.name, self.kept.jersey_number), ("Capitán", 10))
+        self.assertEqual(self.kept.avatar, Player.DEFAULT_AVATAR_MALE)
+
+    def test_patch_without_players_keeps_the_roster(self):
+        response = self.client.patch(reverse('teams-detail', args=[self.team.pk]),
+                                     {'coach': "Otro"}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['players']), 2)
+        self.assertEqual(self.team.players.count(), 2)
+
+    def test_patch_with_players_replaces_the_roster(self):
+        response = self.client.patch(reverse('teams-detail', args=[self.team.pk]), {
+            'players': [{'id': self.kept.pk, 'name': "Titular", 'jersey_number': 1,
+                         'position': 'AR', 'is_starter': True}],
+        }, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(list(self.team.players.values_list('id', flat=True)), [self.kept.pk])
+
+    def test_new_players_ignore_client_ids(self):
+        """Un id ajeno al equipo crea un jugador nuevo sin tocar el original"""
+        response = self.put([
+            {'id': self.rival.pk, 'name': "Nuevo", 'jersey_number': 3,
+             'position': 'CE', 'is_starter': False},
+            {'id': 999999, 'name': "Otro", 'jersey_number': 4,
+             'position': 'LI', 'is_starter': False},
+        ])
+
+        created = {player['name']: player['id'] for player in response.data['players']}
+        self.assertNotIn(created['Nuevo'], (self.rival.pk, 999999))
+        self.assertNotEqual(created['Otro'], 999999)
+        self.rival.refresh_from_db()
+        self.assertEqual((self.rival.team.name, self.rival.name), ("Rival", "Rival"))
+
+    def test_dropped_jersey_number_can_be_reused(self):
+        self.put([
+            {'id': self.kept.pk, 'name': "Titular", 'jersey_number': 1,
+             'position': 'AR', 'is_starter': True},
+            {'name': "Refuerzo", 'jersey_number': 7, 'position': 'OP', 'is_starter': False},
+        ])
+
+        self.assertEqual(self.team.players.get(jersey_number=7).name, "Refuerzo")
+        self.assertFalse(Player.objects.filter(pk=self.dropped.pk).exists())
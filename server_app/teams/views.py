@@ -6,17 +6,11 @@ from rest_framework.response import Response
 from .models import Team, Player
 from .serializers import TeamSerializer, PlayerSerializer
 from django.db import transaction
-from rest_framework.pagination import PageNumberPagination
+from server_app.pagination import PageOrCursorPagination, StandardResultsSetPagination
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 6
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 @extend_schema_view(
     list=extend_schema(
         tags=['Teams'],
@@ -90,7 +84,8 @@ class StandardResultsSetPagination(PageNumberPagination):
     )
 )
 class TeamViewSet(viewsets.ModelViewSet):
-    queryset = Team.objects.all()
+    # Los jugadores anidados se cargan en una sola consulta por página
+    queryset = Team.objects.prefetch_related('players')
     serializer_class = TeamSerializer
     pagination_class = StandardResultsSetPagination
     permission_classes = [permissions.IsAuthenticated]
@@ -113,6 +108,10 @@ class TeamViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             self.perform_update(serializer)
 
+        if getattr(instance, '_prefetched_objects_cache', None):
+            # Los jugadores cambiaron: no responder con la lista precargada
+            instance._prefetched_objects_cache = {}
+
         return Response(serializer.data)
 
     def destroy(self, request, *args, **kwargs):
@@ -189,6 +188,7 @@ class TeamViewSet(viewsets.ModelViewSet):
 class PlayerViewSet(viewsets.ModelViewSet):
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
+    pagination_class = PageOrCursorPagination
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'team__name', 'position']
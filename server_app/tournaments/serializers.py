@@ -1,10 +1,56 @@
 # tournaments/serializers.py
 
+from datetime import time
+from django.core.exceptions import ValidationError
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
 from .models import Tournament
 from teams.models import Team
 from teams.serializers import TeamSerializer
 
+class BulkManyRelatedField(ManyRelatedField):
+    """
+    Lista de claves primarias validada con una sola consulta ``in_bulk``,
+    con los mismos valores y mensajes de error que ``ManyRelatedField``.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, ValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+
+        objects = queryset.in_bulk(set(pks))
+        for item, pk in zip(data, pks):
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=item)
+        return [objects[pk] for pk in pks]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """``PrimaryKeyRelatedField`` que con ``many=True`` valida en una consulta, no una por ID."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        list_kwargs.update(
+            (key, value) for key, value in kwargs.items() if key in MANY_RELATION_KWARGS)
+        return BulkManyRelatedField(**list_kwargs)
+
+
 class TournamentSerializer(serializers.ModelSerializer):
     """
     Serializer para el modelo Tournament.
@@ -25,7 +71,7 @@ class TournamentSerializer(serializers.ModelSerializer):
     """
 
     # Campo para escribir - acepta IDs de equipos
-    teams = serializers.PrimaryKeyRelatedField(
+    teams = BulkPrimaryKeyRelatedField(
         queryset=Team.objects.all(),
         many=True,
         required=False,  # Hace el campo opcional en la creación
@@ -126,10 +172,47 @@ class TournamentSerializer(serializers.ModelSerializer):
         Returns:
             dict: Representación personalizada del torneo
         """
+        # Equipos y jugadores en dos consultas; no consulta nada si la
+        # vista ya los precargó
+        prefetch_related_objects([instance], 'teams__players')
         representation = super().to_representation(instance)
         
         # Asegurar que teams_detail esté presente incluso si está vacío
         if 'teams_detail' not in representation:
             representation['teams_detail'] = []
             
-        return representation
\ No newline at end of file
+        return representation
+
+class CourtSerializer(serializers.Serializer):
+    """Cancha donde se juegan los partidos del calendario."""
+    location = serializers.CharField(max_length=255)
+    latitude = serializers.FloatField(required=False, allow_null=True)
+    longitude = serializers.FloatField(required=False, allow_null=True)
+
+
+class FixtureSerializer(serializers.Serializer):
+    """
+    Parámetros para generar el calendario todos contra todos de un torneo
+    (ver ``matches.scheduling.generate_fixture``).
+    """
+    start = serializers.DateTimeField(help_text="Primer momento en que se puede jugar")
+    courts = CourtSerializer(many=True, allow_empty=False, help_text="Canchas disponibles")
+    slot_minutes = serializers.IntegerField(default=90, min_value=10, max_value=600)
+    day_start = serializers.TimeField(default=time(9))
+    day_end = serializers.TimeField(default=time(21))
+    min_rest_minutes = serializers.IntegerField(default=0, min_value=0)
+    double = serializers.BooleanField(default=False, help_text="Ida y vuelta")
+    pools = serializers.IntegerField(default=1, min_value=1)
+
+    def validate(self, data):
+        """
+        Validates:
+            - La jornada alcanza para al menos una franja
+        """
+        start = data['day_start'].hour * 60 + data['day_start'].minute
+        end = data['day_end'].hour * 60 + data['day_end'].minute
+        if end - start < data['slot_minutes']:
+            raise serializers.ValidationError({
+                "day_end": "La jornada debe durar al menos una franja"
+            })
+        return data
@@ -1,3 +1,36 @@
 from django.test import TestCase
+from rest_framework import serializers
+from teams.models import Team
+from .serializers import BulkPrimaryKeyRelatedField
 
-# Create your tests here.
+
+class BulkPrimaryKeyRelatedFieldTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teams = [Team.objects.create(name=f"Equipo {index}", gender='M', coach="Coach")
+                     for index in range(3)]
+
+    def fields(self):
+        bulk = BulkPrimaryKeyRelatedField(queryset=Team.objects.all(), many=True)
+        standard = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), many=True)
+        return bulk, standard
+
+    def test_ids_are_resolved_in_one_query(self):
+        bulk, standard = self.fields()
+        ids = [team.pk for team in self.teams] + [self.teams[0].pk, str(self.teams[1].pk)]
+
+        with self.assertNumQueries(1):
+            resolved = bulk.run_validation(ids)
+
+        self.assertEqual(resolved, standard.run_validation(ids))
+
+    def test_errors_match_primary_key_related_field(self):
+        """Mismos mensajes de error que el campo estándar de DRF"""
+        bulk, standard = self.fields()
+        for data in ([self.teams[0].pk, 999], ['abc'], [True], [None], [{}], 'abc', 5):
+            with self.subTest(data=data):
+                with self.assertRaises(serializers.ValidationError) as expected:
+                    standard.run_validation(data)
+                with self.assertRaises(serializers.ValidationError) as raised:
+                    bulk.run_validation(data)
+                self.assertEqual(raised.exception.detail, expected.exception.detail)
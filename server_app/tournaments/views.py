@@ -1,9 +1,21 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
 from .models import Tournament
-from .serializers import TournamentSerializer
+from .serializers import FixtureSerializer, TournamentSerializer
+from teams.serializers import TeamSerializer
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiExample
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from matches.scheduling import FixtureError, schedule_tournament
+from matches.leaderboards import leaders, rank
+from matches.serializers import LeaderboardEntrySerializer, StandingSerializer
+from matches.standings import table as standings_table
+
+class LeaderboardPagination(PageNumberPagination):
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
 
 @extend_schema_view(
     list=extend_schema(
@@ -64,6 +76,13 @@ class TournamentViewSet(viewsets.ModelViewSet):
     serializer_class = TournamentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve', 'teams_list'):
+            # Equipos y jugadores anidados en dos consultas, no una por torneo
+            queryset = queryset.prefetch_related('teams__players')
+        return queryset
+
     @extend_schema(
         summary="Lista equipos del torneo",
         description="Obtiene la lista de equipos participantes en el torneo",
@@ -74,4 +93,68 @@ class TournamentViewSet(viewsets.ModelViewSet):
         """Endpoint adicional para listar equipos de un torneo específico"""
         tournament = self.get_object()
         teams = tournament.teams.all()
-        return Response(TeamSerializer(teams, many=True).data)
\ No newline at end of file
+        return Response(TeamSerializer(teams, many=True).data)
+
+    @extend_schema(
+        summary="Genera el calendario del torneo",
+        description=("Programa un todos contra todos (simple, ida y vuelta o por grupos) "
+                     "entre los equipos inscritos, repartido en canchas y franjas horarias "
+                     "con descanso mínimo entre partidos de un mismo equipo"),
+        request=FixtureSerializer,
+        tags=['Tournaments']
+    )
+    @action(detail=True, methods=['post'])
+    def fixture(self, request, pk=None):
+        """Genera y guarda en bloque los partidos del torneo"""
+        tournament = self.get_object()
+        serializer = FixtureSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = dict(serializer.validated_data)
+        courts = options.pop('courts')
+        start = options.pop('start')
+        try:
+            matches = schedule_tournament(tournament, courts, start, **options)
+        except FixtureError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'matches': len(matches),
+            'first_match': matches[0].scheduled_date,
+            'last_match': matches[-1].scheduled_date,
+        }, status=status.HTTP_201_CREATED)
+
+
+    @extend_schema(
+        summary="Tabla de posiciones del torneo",
+        description=("Posiciones por puntos de la tabla, partidos ganados, cociente de sets "
+                     "y cociente de puntos. Se lee de la tabla precalculada: el costo "
+                     "depende de la cantidad de equipos, no de partidos"),
+        tags=['Tournaments']
+    )
+    @action(detail=True, methods=['get'])
+    def standings(self, request, pk=None):
+        """Endpoint adicional con la tabla de posiciones del torneo"""
+        tournament = self.get_object()
+        rows = standings_table(tournament)
+        positions = {row.team_id: index for index, row in enumerate(rows, start=1)}
+        return Response(StandingSerializer(rows, many=True, context={'positions': positions}).data)
+
+
+    @extend_schema(
+        summary="Líderes del torneo por estadística",
+        description=("Ranking de jugadores por puntos, aces, asistencias o bloqueos, con "
+                     "empates (1, 2, 2, 4) y paginación. Se lee de los totales por jugador "
+                     "precalculados, así que no depende de cuántas jugadas tenga el torneo"),
+        tags=['Tournaments']
+    )
+    @action(detail=True, methods=['get'],
+            url_path=r'leaderboards/(?P<stat>points|aces|assists|blocks)')
+    def leaderboards(self, request, pk=None, stat=None):
+        """Endpoint adicional con el ranking de jugadores de un torneo"""
+        tournament = self.get_object()
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(leaders(tournament.pk, stat), request, view=self)
+        offset = (paginator.page.number - 1) * paginator.page.paginator.per_page
+        for position, row in rank(page, offset, tournament.pk, stat):
+            row.rank = position
+        return paginator.get_paginated_response(
+            LeaderboardEntrySerializer(page, many=True).data)
@@ -1,11 +1,133 @@
+import copy
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
 from rest_framework.authentication import TokenAuthentication
+from server_app.metrics import registry
+
+
+def _generations():
+    return caches[settings.TOKEN_CACHE_GENERATIONS]
+
+
+def _generation_key(user_id):
+    return f'auth-token-generation:{user_id}'
+
+
+class TokenCache:
+    """
+    Caché en memoria del proceso de token -> (usuario, token), con
+    expiración (``TOKEN_CACHE_TTL`` segundos) y desalojo del menos usado
+    al pasar de ``TOKEN_CACHE_SIZE`` entradas.
+
+    Cada entrada guarda la generación de su usuario, que vive en la caché
+    compartida ``TOKEN_CACHE_GENERATIONS`` y se compara en cada acierto.
+    ``invalidate_user`` la reemplaza por un valor nuevo, así que el logout
+    o un cambio del usuario invalidan sus entradas en todos los workers que
+    comparten esa caché. Si la generación falta (expulsión de la caché) la
+    entrada cuenta como fallo y se vuelve a consultar la base.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # clave -> (expira, usuario, token, generación)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+        generation = _generations().get(_generation_key(entry[1].pk))
+        if generation is None or generation != entry[3]:
+            self.discard(key)
+            return None
+        return entry[1], entry[2]
+
+    def set(self, key, user, token):
+        # La generación se crea antes de guardar la entrada: si faltara, la
+        # entrada no se distinguiría de una invalidada cuya generación se
+        # perdió
+        generations, generation_key = _generations(), _generation_key(user.pk)
+        generations.add(generation_key, uuid.uuid4().hex, None)
+        generation = generations.get(generation_key)
+        if generation is None:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic() + settings.TOKEN_CACHE_TTL, user, token,
+                                 generation)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.TOKEN_CACHE_SIZE:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_user(self, user_id):
+        """
+        Invalida los tokens del usuario en todos los workers. Lo llaman las
+        señales de logout y de guardado del usuario; quien lo modifique con
+        ``QuerySet.update()`` debe llamarlo a mano.
+        """
+        # Un valor que no se repite: una generación expulsada y vuelta a
+        # crear nunca coincide con la de una entrada vieja
+        _generations().set(_generation_key(user_id), uuid.uuid4().hex, None)
+        with self.lock:
+            for key in [key for key, entry in self.entries.items() if entry[1].pk == user_id]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
 
 class FlexibleTokenAuthentication(TokenAuthentication):
     """
     Autenticación personalizada que usa 'Bearer' como palabra clave para tokens.
-    
+
     Esta clase modifica el comportamiento estándar de TokenAuthentication
     para aceptar el formato: 'Bearer <token>' en lugar de 'Token <token>'.
+    Los tokens resueltos se guardan en ``token_cache``, así que la consulta
+    del token y su usuario solo se hace una vez por ``TOKEN_CACHE_TTL``.
     """
-    
-    keyword = 'Bearer'
\ No newline at end of file
+
+    keyword = 'Bearer'
+
+    def authenticate_credentials(self, key):
+        if settings.TOKEN_CACHE_TTL <= 0:
+            return super().authenticate_credentials(key)
+        cached = token_cache.get(key)
+        registry.observe_token_cache(cached is not None)
+        if cached is None:
+            user, token = super().authenticate_credentials(key)
+            token_cache.set(key, user, token)
+            cached = user, token
+        # Copias: cada solicitud puede modificar o cachear relaciones en
+        # sus instancias sin afectar a las demás
+        user, token = copy.copy(cached[0]), copy.copy(cached[1])
+        token.user = user
+        return user, token
+
+
+def _token_deleted(sender, instance, **kwargs):
+    token_cache.invalidate_user(instance.user_id)
+
+
+def _user_saved(sender, instance, created, **kwargs):
+    if not created:
+        token_cache.invalidate_user(instance.pk)
+
+
+post_delete.connect(_token_deleted, sender='authtoken.Token')
+post_save.connect(_user_saved, sender=settings.AUTH_USER_MODEL)
@@ -1,3 +1,113 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from server_app.metrics import registry
+from matches.tests.test_instrumentation import sample
+from .authentication import FlexibleTokenAuthentication, TokenCache, _generation_key, token_cache
 
-# Create your tests here.
+
+class TokenCacheTest(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        caches['live'].clear()
+        registry.reset()
+        self.user = get_user_model().objects.create_user(
+            username='anotador', email='anotador@example.com', password='secret-pass-123')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token.key}')
+        self.url = reverse('teams-list')
+
+    def auth_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries
+                if 'authtoken_token' in query['sql']]
+
+    def test_second_request_skips_the_token_query(self):
+        self.assertEqual(len(self.auth_queries()), 1)
+        self.assertEqual(self.auth_queries(), [])
+
+        text = registry.expose()
+        self.assertEqual(sample(text, 'auth_token_cache_requests_total', result='hit'), 1)
+        self.assertEqual(sample(text, 'auth_token_cache_requests_total', result='miss'), 1)
+
+    def test_logout_invalidates_the_token(self):
+        self.client.get(self.url)
+
+        self.assertEqual(self.client.post(reverse('api_logout')).status_code, 200)
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.url)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_other_workers_see_the_invalidation(self):
+        """Otro proceso, con su propio caché, desactiva al usuario con update()"""
+        self.client.get(self.url)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        TokenCache().invalidate_user(self.user.pk)
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_invalidated_token_stays_rejected_after_losing_the_generation(self):
+        """Otro worker revoca el token y luego la generación se expulsa de la caché"""
+        self.client.get(self.url)
+
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+        TokenCache().invalidate_user(self.user.pk)
+        caches['live'].delete(_generation_key(self.user.pk))
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_lost_generation_forces_a_miss(self):
+        token_cache.invalidate_user(self.user.pk)
+        self.client.get(self.url)
+
+        caches['live'].clear()
+
+        self.assertEqual(len(self.auth_queries()), 1)
+
+    def test_each_request_gets_its_own_user_instance(self):
+        first, _ = self.authenticate()
+        first.username = 'modificado'
+
+        second, token = self.authenticate()
+
+        self.assertEqual(second.username, 'anotador')
+        self.assertIs(token.user, second)
+
+    @override_settings(TOKEN_CACHE_TTL=0)
+    def test_disabled_cache_queries_every_time(self):
+        self.assertEqual(len(self.auth_queries()), 1)
+        self.assertEqual(len(self.auth_queries()), 1)
+
+    @override_settings(TOKEN_CACHE_SIZE=2)
+    def test_least_recently_used_entries_are_evicted(self):
+        token_cache.set('a', self.user, self.token)
+        token_cache.set('b', self.user, self.token)
+        token_cache.get('a')
+        token_cache.set('c', self.user, self.token)
+
+        self.assertIsNotNone(token_cache.get('a'))
+        self.assertIsNone(token_cache.get('b'))
+
+    @override_settings(TOKEN_CACHE_TTL=-1)
+    def test_expired_entries_are_dropped(self):
+        token_cache.set('a', self.user, self.token)
+        self.assertIsNone(token_cache.get('a'))
+
+    def authenticate(self):
+        return FlexibleTokenAuthentication().authenticate_credentials(self.token.key)